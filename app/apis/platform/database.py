@@ -1,5 +1,7 @@
 from app.loggers import ExceptionLogger
 from app.models import PlatformModel
+from app.response import JSONResponse
+from app.database import QueryProfiler
 
 
 class MySQLAPI:
@@ -21,4 +23,15 @@ class MySQLAPI:
     @ExceptionLogger.handle_program_exception_async
     async def get_basic_clan_overview():
         result = await PlatformModel.get_basic_clan_overview()
-        return result
\ No newline at end of file
+        return result
+
+    @ExceptionLogger.handle_program_exception_async
+    async def get_slow_queries(order: str, limit: int):
+        "获取耗时最多的查询，需要开启SLOW_QUERY_PROFILING"
+        result = QueryProfiler.get_top(order, limit)
+        return JSONResponse.get_success_response(result)
+
+    @ExceptionLogger.handle_program_exception_async
+    async def reset_slow_queries():
+        QueryProfiler.reset()
+        return JSONResponse.API_1000_Success
\ No newline at end of file
@@ -1,7 +1,13 @@
 from app.loggers import ExceptionLogger
-from app.utils import TimeUtils
+from app.utils import TimeUtils, ReferenceData
 from app.health import ServiceMetrics
+from app.network import (
+    HttpClientPool, SingleFlight, UpstreamLimiter, CircuitBreaker, ResponseCache
+)
 from app.response import JSONResponse
+from app.apis.statistics import StatsCache, StatsExecutor
+from app.models import ReadCache
+from app.database import MysqlConnection
 
 
 class StatusAPI:
@@ -14,10 +20,10 @@ class StatusAPI:
             "timeatamp": TimeUtils.timestamp(),
             "metrics": {}
         }
+        # 先写入内存中的计数，保证读取到的数据是最新的
+        await ServiceMetrics.flush()
         overall = ServiceMetrics.collect_today_hourly_metrics()
-        api = await ServiceMetrics.collect_api_metrics()
-        celery = await ServiceMetrics.collect_celery_metrics()
-        http_count, http, error = await ServiceMetrics.collect_http_metrics()
+        api, celery, (http_count, http, error) = await ServiceMetrics.collect_redis_metrics()
         result['metrics'] ={
             'today': {
                 'requests': overall['summary']['total_requests'],
@@ -30,6 +36,16 @@ class StatusAPI:
             "api_request_30d": api,
             "celery_tasks_30d": celery,
             "api_calls_14d": http,
-            "api_failed_rate_14d": error
+            "api_failed_rate_14d": error,
+            "http_requests": HttpClientPool.get_stats(),
+            "http_single_flight": SingleFlight.get_stats(),
+            "http_rate_limit": UpstreamLimiter.get_stats(),
+            "http_circuit_breaker": CircuitBreaker.get_stats(),
+            "http_response_cache": ResponseCache.get_stats(),
+            "reference_data": ReferenceData.get_stats(),
+            "stats_result_cache": StatsCache.get_stats(),
+            "stats_executor": StatsExecutor.get_stats(),
+            "db_read_cache": ReadCache.get_stats(),
+            "mysql_pools": MysqlConnection.get_stats()
         }
         return JSONResponse.get_success_response(result)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from app.loggers import ExceptionLogger
 from app.network import ExternalAPI
-from app.models import RecentModel, BotUserModel
+from app.models import RecentModel, BotUserModel, ReadCache
 from app.middlewares import RedisClient
 from app.utils import TimeUtils
 from app.response import JSONResponse
@@ -36,12 +36,13 @@ class RecentOverallAPI:
             premium_status['data'] and 
             (len(premium_status['data']['users']) < premium_status['data']['level'])
         ):
-            user_id = premium_status['data']['id']
             # Premium用户
             if lbt is None or now_timestamp - lbt > 90*24*60*60:
                 return JSONResponse.API_2016_AccountNotEligible
             else:
-                result = await RecentModel.enable_recent_pro(region, account_id, user_id, premium_status['data']['limit'])
+                result = await RecentModel.enable_recent_pro(region, account_id, premium_status['data']['id'], premium_status['data']['limit'])
+                # premium信息中包含启用了RecentPro的账号
+                await ReadCache.invalidate('premium', platform, user_id)
                 return result
         else:
             # 普通用户
@@ -63,7 +64,6 @@ class RecentOverallAPI:
         if premium_status['code'] != 1000:
             return premium_status 
         if premium_status['data']:
-            user_id = premium_status['data']['id']
             is_user = False
             for user in premium_status['data']['users']:
                 if account_id == user[1]:
@@ -71,6 +71,8 @@ class RecentOverallAPI:
             if is_user == False:
                 return JSONResponse.API_2021_RecentDataDeletionFailed
             else:
-                return await RecentModel.disable_recent_pro(region, account_id, user_id)
+                result = await RecentModel.disable_recent_pro(region, account_id, premium_status['data']['id'])
+                await ReadCache.invalidate('premium', platform, user_id)
+                return result
         else:
             return JSONResponse.API_2018_ContactAuthorForDataDeletion
\ No newline at end of file
@@ -1,7 +1,11 @@
 from .search import SearchAPI
 from .stats import StatsAPI
+from .cache import StatsCache
+from .executor import StatsExecutor
 
 __all__ = [
     'SearchAPI',
-    'StatsAPI'
+    'StatsAPI',
+    'StatsCache',
+    'StatsExecutor'
 ]
\ No newline at end of file
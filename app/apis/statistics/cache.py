@@ -0,0 +1,92 @@
+from typing import Optional
+
+from app.core import EnvConfig
+from app.middlewares import RedisClient
+
+
+class StatsCache:
+    '''处理完成的统计数据缓存
+
+    key按(服务器, 用户id, 数据类型, 是否使用ac, 静态数据版本)区分，静态数据更新后旧缓存自然失效
+
+    写入时记录数据库中的场次，读取时场次不一致则视为过期
+
+    数据库中的场次由定时任务更新，可能落后于实际的场次，由STATS_CACHE_TTL限制最长的过期时间
+
+    基本数据(basic)不写入缓存，命中时由调用方从brief的ReadCache读取
+    '''
+    _stats: dict[str, dict] = {}
+
+    @staticmethod
+    def get_key(region: str, account_id: int, kind: str, ac_present: bool, version: str) -> str:
+        return f"cache:stats:{region}:{account_id}:{kind}:{1 if ac_present else 0}:{version}"
+
+    @classmethod
+    def _count(cls, kind: str, name: str) -> None:
+        kind = kind.split(':')[0]
+        if kind not in cls._stats:
+            cls._stats[kind] = {'hits': 0, 'misses': 0, 'stale': 0}
+        cls._stats[kind][name] += 1
+
+    @classmethod
+    async def get(
+        cls,
+        region: str,
+        account_id: int,
+        kind: str,
+        ac_present: bool,
+        version: str,
+        battles: Optional[int]
+    ) -> Optional[dict]:
+        '''读取缓存，不存在或已过期返回None
+
+        参数：
+            kind: 数据类型，例如 pvp:pvp:1 / cb
+            version: 计算时使用的静态数据版本
+            battles: 数据库中当前的场次，为None时无法校验，不使用缓存
+        '''
+        if not EnvConfig.get_config().STATS_CACHE_ENABLED or battles is None:
+            return None
+        key = cls.get_key(region, account_id, kind, ac_present, version)
+        result = await RedisClient.get_compressed(key)
+        if result['code'] != 1000 or result['data'] is None:
+            cls._count(kind, 'misses')
+            return None
+        if result['data']['battles'] != battles:
+            # 用户在缓存写入后又进行了战斗
+            cls._count(kind, 'stale')
+            return None
+        cls._count(kind, 'hits')
+        return result['data']['data']
+
+    @classmethod
+    async def set(
+        cls,
+        region: str,
+        account_id: int,
+        kind: str,
+        ac_present: bool,
+        version: str,
+        battles: Optional[int],
+        data: dict
+    ) -> None:
+        "写入缓存"
+        config = EnvConfig.get_config()
+        if not config.STATS_CACHE_ENABLED or battles is None:
+            return None
+        key = cls.get_key(region, account_id, kind, ac_present, version)
+        await RedisClient.set_compressed(
+            key,
+            {'battles': battles, 'data': {key: value for key, value in data.items() if key != 'basic'}},
+            config.STATS_CACHE_TTL
+        )
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        "获取各类型的缓存命中率"
+        result = {}
+        for kind, stats in cls._stats.items():
+            total = stats['hits'] + stats['misses'] + stats['stale']
+            result[kind] = dict(stats)
+            result[kind]['hit_ratio'] = 0 if total == 0 else round(stats['hits'] / total, 4)
+        return result
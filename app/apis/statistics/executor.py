@@ -0,0 +1,104 @@
+import time
+import asyncio
+import multiprocessing
+from typing import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core import EnvConfig, api_logger
+from app.utils import ReferenceData
+
+
+def warm_worker() -> None:
+    "子进程启动时预先加载静态数据"
+    ReferenceData.load_all()
+
+
+class StatsExecutor:
+    '''CPU密集的统计数据计算的进程池
+
+    功能逻辑：
+    1. 船只数量超过STATS_EXECUTOR_THRESHOLD的用户放到进程池中计算，避免阻塞事件循环
+    2. 数量较少的用户、进程池未启用或进程池异常时直接在当前进程计算
+    3. 子进程启动时就加载好静态数据，之后随文件修改时间自动更新
+    '''
+    _pool: ProcessPoolExecutor = None
+    _workers: int = 0
+    _stats = {
+        'offloaded': 0,
+        'inline': 0,
+        'fallbacks': 0,
+        'pending': 0,
+        'max_pending': 0,
+        'elapsed_ms': 0
+    }
+
+    @staticmethod
+    def create_pool(workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=warm_worker
+        )
+
+    @classmethod
+    async def init_pool(cls, workers: int = None) -> None:
+        "初始化进程池，workers为0时不启用"
+        if workers is None:
+            workers = EnvConfig.get_config().STATS_EXECUTOR_WORKERS
+        if workers <= 0:
+            return
+        cls._pool = cls.create_pool(workers)
+        cls._workers = workers
+        # 提前启动所有子进程，避免第一批请求等待进程启动
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(cls._pool, time.sleep, 0) for _ in range(workers)])
+        api_logger.info(f'Stats executor started with {workers} workers')
+
+    @classmethod
+    def close_pool(cls) -> None:
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=False, cancel_futures=True)
+            cls._pool = None
+            cls._workers = 0
+
+    @classmethod
+    async def run(cls, func: Callable, size: int, *args):
+        '''执行计算函数
+
+        参数:
+            func: 模块级的函数，需要能被pickle
+            size: 数据量，超过阈值时放到进程池中计算
+            args: 函数参数
+        '''
+        if cls._pool is None or size < EnvConfig.get_config().STATS_EXECUTOR_THRESHOLD:
+            cls._stats['inline'] += 1
+            return func(*args)
+        cls._stats['pending'] += 1
+        cls._stats['max_pending'] = max(cls._stats['max_pending'], cls._stats['pending'])
+        start_time = time.perf_counter()
+        pool = cls._pool
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            # 子进程异常退出，重建进程池，本次改为直接计算
+            api_logger.warning('Stats executor is broken, falling back to inline execution')
+            cls._stats['fallbacks'] += 1
+            # 同时失败的其他请求不再重复重建
+            if pool is cls._pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                cls._pool = cls.create_pool(cls._workers)
+            return func(*args)
+        finally:
+            cls._stats['pending'] -= 1
+        cls._stats['offloaded'] += 1
+        cls._stats['elapsed_ms'] += int((time.perf_counter() - start_time) * 1000)
+        return result
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        "获取进程池的使用情况"
+        result = dict(cls._stats)
+        result['workers'] = cls._workers
+        result['avg_ms'] = 0 if result['offloaded'] == 0 else round(result['elapsed_ms'] / result['offloaded'], 2)
+        return result
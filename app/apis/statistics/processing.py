@@ -1,7 +1,8 @@
 from typing import Dict
 
-from app.utils import RatingUtils
-from app.schemas import ShipDataDict, ShipInfoDict
+from app.utils import RatingUtils, RatingEngine, ReferenceData
+from app.utils.ship_stats import BATTLES_COUNT
+from app.schemas import ShipInfoDict
 
 
 NoneProcessedData = {
@@ -31,36 +32,46 @@ ProcessedData = {
     'rating_class': 0
 }
 
-def pvp_calculate_rating(region: str, data: Dict[str, Dict], server_data: dict):
+def pvp_calculate_rating(region: str, data: Dict[str, Dict], server_data: dict, version: int = None):
     if region == 'ru':
         keys = ['pvp', 'pvp_solo', 'pvp_div2', 'pvp_div3', 'rating_solo', 'rating_div']
     else:
         keys = ['pvp', 'pvp_solo', 'pvp_div2', 'pvp_div3']
-    for ship_id, ship_data in data.items():
-        for key in keys:
-            RatingUtils.get_rating_by_data(
-                key,
-                ship_data[key],
-                server_data.get(ship_id).get(region)
-            )
-    return data
+    # 所有船只所有模式一次性计算，结果与逐条调用RatingUtils.get_rating_by_data一致
+    return RatingEngine.calculate(region, data, keys, server_data, version)
 
-def processing_overall_data(data: Dict[str, Dict], field: str):
-    original_data = NoneProcessedData.copy()
-    for _, ship_info in data.items():
-        ship_data: ShipDataDict = ship_info[field]
-        if ship_data == {}:
-            continue
-        for key in ['battles_count','wins','damage_dealt','frags','original_exp']:
-            original_data[key] += ship_data[key]
-        if ship_data['personal_rating'] != -1:
-            original_data['value_battles_count'] += ship_data['battles_count']
-            original_data['personal_rating'] += ship_data['personal_rating']
-            original_data['n_damage_dealt'] += ship_data['damage_rating']
-            original_data['n_frags'] += ship_data['frags_rating']
+# ------------------------------------------------------
+# 单次遍历的pvp数据聚合
+# 功能逻辑：
+# 1. 遍历一次用户的船只数据，同时累加总体、各战斗类型、各船只类型和等级x类型图表的数据
+# 2. 累加值使用list保存，顺序与NoneProcessedData一致，避免dict查找和copy
+# 3. 累加完成后统一格式化，结果与原有的四次遍历的结果完全一致(见tests/test_pvp_statistics.py)
+# 4. 输入为processing_pvp_data生成的ShipStats
+# ------------------------------------------------------
+BATTLE_TYPES = ['pvp_solo', 'pvp_div2', 'pvp_div3']
+SHIP_TYPES = ['AirCarrier', 'Battleship', 'Cruiser', 'Destroyer', 'Submarine']
+SHIP_TYPE_INDEX = {ship_type: index for index, ship_type in enumerate(SHIP_TYPES)}
+
+
+def accumulate_ship_data(total: list, ship_data: list):
+    battles_count, wins, damage_dealt, frags, original_exp, personal_rating, damage_rating, frags_rating = ship_data
+    total[0] += battles_count
+    total[1] += wins
+    total[2] += damage_dealt
+    total[3] += frags
+    total[4] += original_exp
+    if personal_rating != -1:
+        total[5] += battles_count
+        total[6] += personal_rating
+        total[7] += damage_rating
+        total[8] += frags_rating
+
+def format_processed_data(total: list, overall: bool):
+    battles_count, wins, damage_dealt, frags, original_exp, value_battles_count, personal_rating, n_damage_dealt, n_frags = total
     result = ProcessedData.copy()
-    result['type'] = 'pr'
-    if original_data['battles_count'] == 0:
+    if overall:
+        result['type'] = 'pr'
+    if battles_count == 0:
         result['battles_count'] = '-'
         result['win_rate'] = '-'
         result['avg_damage'] = '-'
@@ -68,186 +79,98 @@ def processing_overall_data(data: Dict[str, Dict], field: str):
         result['avg_exp'] = '-'
         result['rating'] = '-1'
         result['rating_next'] = '1'
+        return result
+    result['win_rate'] = round(wins/battles_count*100,2)
+    if overall:
+        result['avg_damage'] = damage_dealt//battles_count
+        result['avg_exp'] = original_exp//battles_count
     else:
-        result['battles_count'] = original_data['battles_count']
-        result['win_rate'] = round(original_data['wins']/original_data['battles_count']*100,2)
-        result['avg_damage'] = original_data['damage_dealt']//original_data['battles_count']
-        result['avg_frags'] = round(original_data['frags']/original_data['battles_count'],2)
-        result['avg_exp'] = original_data['original_exp']//original_data['battles_count']
-        if original_data['value_battles_count'] != 0:
-            result['rating'] = original_data['personal_rating']//original_data['value_battles_count']
-            rating_class, rating_next = RatingUtils.get_pr_rating_class(result['rating'],True)
-            result['rating_next'] = str(rating_next)
-            result['win_rate_class'] = RatingUtils.get_content_class(0, result['win_rate'])
-            result['avg_damage_class'] = RatingUtils.get_content_class(1, original_data['n_damage_dealt']/original_data['value_battles_count'])
-            result['avg_frags_class'] = RatingUtils.get_content_class(2, original_data['n_frags']/original_data['value_battles_count'])
-            result['rating_class'] = rating_class
+        result['avg_damage'] = int(damage_dealt/battles_count)
+        result['avg_exp'] = int(original_exp/battles_count)
+    result['avg_frags'] = round(frags/battles_count,2)
+    if value_battles_count != 0:
+        if overall:
+            result['rating'] = personal_rating//value_battles_count
         else:
-            result['rating'] = -1
-            rating_class, rating_next = RatingUtils.get_pr_rating_class(-1,True)
-            result['rating_next'] = str(rating_next)
-            result['win_rate_class'] = RatingUtils.get_content_class(0, -1)
-            result['avg_damage_class'] = RatingUtils.get_content_class(1, -1)
-            result['avg_frags_class'] = RatingUtils.get_content_class(2, -1)
-            result['rating_class'] = rating_class
-        result['battles_count'] = '{:,}'.format(result['battles_count']).replace(',', ' ')
-        result['win_rate'] = '{:.2f}%'.format(result['win_rate'])
-        result['avg_damage'] = '{:,}'.format(result['avg_damage']).replace(',', ' ')
-        result['avg_frags'] = '{:.2f}'.format(result['avg_frags'])
-        result['avg_exp'] = '{:,}'.format(result['avg_exp']).replace(',', ' ')
-        result['rating'] = '{:,}'.format(result['rating']).replace(',', ' ')
+            result['rating'] = int(personal_rating/value_battles_count)
+        rating_class, rating_next = RatingUtils.get_pr_rating_class(result['rating'],overall)
+        result['win_rate_class'] = RatingUtils.get_content_class(0, result['win_rate'])
+        result['avg_damage_class'] = RatingUtils.get_content_class(1, n_damage_dealt/value_battles_count)
+        result['avg_frags_class'] = RatingUtils.get_content_class(2, n_frags/value_battles_count)
+    else:
+        result['rating'] = -1
+        rating_class, rating_next = RatingUtils.get_pr_rating_class(-1,overall)
+        result['win_rate_class'] = RatingUtils.get_content_class(0, -1)
+        result['avg_damage_class'] = RatingUtils.get_content_class(1, -1)
+        result['avg_frags_class'] = RatingUtils.get_content_class(2, -1)
+    result['rating_next'] = str(rating_next)
+    result['rating_class'] = rating_class
+    result['battles_count'] = '{:,}'.format(battles_count).replace(',', ' ')
+    result['win_rate'] = '{:.2f}%'.format(result['win_rate'])
+    result['avg_damage'] = '{:,}'.format(result['avg_damage']).replace(',', ' ')
+    result['avg_frags'] = '{:.2f}'.format(result['avg_frags'])
+    result['avg_exp'] = '{:,}'.format(result['avg_exp']).replace(',', ' ')
+    result['rating'] = '{:,}'.format(result['rating']).replace(',', ' ')
     return result
 
-def processing_battle_type_data(data: Dict[str, Dict]):
-    original_data = {
-        'pvp_solo': NoneProcessedData.copy(),
-        'pvp_div2': NoneProcessedData.copy(),
-        'pvp_div3': NoneProcessedData.copy()
-    }
-    for _, ship_info in data.items():
-        for field in ['pvp_solo', 'pvp_div2', 'pvp_div3']:
-            ship_data: ShipDataDict = ship_info[field]
-            if ship_data == {}:
-                continue
-            for key in ['battles_count','wins','damage_dealt','frags','original_exp']:
-                original_data[field][key] += ship_data[key]
-            if ship_data['personal_rating'] != -1:
-                original_data[field]['value_battles_count'] += ship_data['battles_count']
-                original_data[field]['personal_rating'] += ship_data['personal_rating']
-                original_data[field]['n_damage_dealt'] += ship_data['damage_rating']
-                original_data[field]['n_frags'] += ship_data['frags_rating']
-    result = {
-        'pvp_solo': ProcessedData.copy(),
-        'pvp_div2': ProcessedData.copy(),
-        'pvp_div3': ProcessedData.copy()
-    }
-    for field in ['pvp_solo', 'pvp_div2', 'pvp_div3']:
-        if original_data[field]['battles_count'] == 0:
-            result[field]['battles_count'] = '-'
-            result[field]['win_rate'] = '-'
-            result[field]['avg_damage'] = '-'
-            result[field]['avg_frags'] = '-'
-            result[field]['avg_exp'] = '-'
-            result[field]['rating'] = '-1'
-            result[field]['rating_next'] = '1'
-        else:
-            result[field]['battles_count'] = original_data[field]['battles_count']
-            result[field]['win_rate'] = round(original_data[field]['wins']/original_data[field]['battles_count']*100,2)
-            result[field]['avg_damage'] = int(original_data[field]['damage_dealt']/original_data[field]['battles_count'])
-            result[field]['avg_frags'] = round(original_data[field]['frags']/original_data[field]['battles_count'],2)
-            result[field]['avg_exp'] = int(original_data[field]['original_exp']/original_data[field]['battles_count'])
-            if original_data[field]['value_battles_count'] != 0:
-                result[field]['rating'] = int(original_data[field]['personal_rating']/original_data[field]['value_battles_count'])
-                rating_class, rating_next = RatingUtils.get_rating_class(result[field]['rating'])
-                result[field]['rating_next'] = str(rating_next)
-                result[field]['win_rate_class'] = RatingUtils.get_content_class(0, result[field]['win_rate'])
-                result[field]['avg_damage_class'] = RatingUtils.get_content_class(1, original_data[field]['n_damage_dealt']/original_data[field]['value_battles_count'])
-                result[field]['avg_frags_class'] = RatingUtils.get_content_class(2, original_data[field]['n_frags']/original_data[field]['value_battles_count'])
-                result[field]['rating_class'] = rating_class
-            else:
-                result[field]['rating'] = -1
-                rating_class, rating_next = RatingUtils.get_rating_class(-1)
-                result[field]['rating_next'] = str(rating_next)
-                result[field]['win_rate_class'] = RatingUtils.get_content_class(0, -1)
-                result[field]['avg_damage_class'] = RatingUtils.get_content_class(1, -1)
-                result[field]['avg_frags_class'] = RatingUtils.get_content_class(2, -1)
-                result[field]['rating_class'] = rating_class
-            result[field]['battles_count'] = '{:,}'.format(result[field]['battles_count']).replace(',', ' ')
-            result[field]['win_rate'] = '{:.2f}%'.format(result[field]['win_rate'])
-            result[field]['avg_damage'] = '{:,}'.format(result[field]['avg_damage']).replace(',', ' ')
-            result[field]['avg_frags'] = '{:.2f}'.format(result[field]['avg_frags'])
-            result[field]['avg_exp'] = '{:,}'.format(result[field]['avg_exp']).replace(',', ' ')
-            result[field]['rating'] = '{:,}'.format(result[field]['rating']).replace(',', ' ')
-    return result
+def processing_pvp_statistics(data: Dict[str, Dict], shipid_data: dict):
+    '''
+    一次遍历计算pvp的总体、战斗类型、船只类型和图表数据
 
-def processing_ship_type_data(data: Dict[str, Dict], battle_field: str, shipid_data: dict):
-    original_data = {
-        'AirCarrier': NoneProcessedData.copy(),
-        'Battleship': NoneProcessedData.copy(),
-        'Cruiser': NoneProcessedData.copy(),
-        'Destroyer': NoneProcessedData.copy(),
-        'Submarine': NoneProcessedData.copy()
-    }
-    for ship_id, ship_info in data.items():
-        ship_data: ShipDataDict = ship_info[battle_field]
-        if ship_data == {}:
-            continue
-        field = shipid_data.get(ship_id).get('type')
-        if field is None:
-            continue
-        for key in ['battles_count','wins','damage_dealt','frags','original_exp']:
-            original_data[field][key] += ship_data[key]
-        if ship_data['personal_rating'] != -1:
-            original_data[field]['value_battles_count'] += ship_data['battles_count']
-            original_data[field]['personal_rating'] += ship_data['personal_rating']
-            original_data[field]['n_damage_dealt'] += ship_data['damage_rating']
-            original_data[field]['n_frags'] += ship_data['frags_rating']
-    result = {
-        'AirCarrier': ProcessedData.copy(),
-        'Battleship': ProcessedData.copy(),
-        'Cruiser': ProcessedData.copy(),
-        'Destroyer': ProcessedData.copy(),
-        'Submarine': ProcessedData.copy()
-    }
-    for field in ['AirCarrier', 'Battleship', 'Cruiser', 'Destroyer', 'Submarine']:
-        if original_data[field]['battles_count'] == 0:
-            result[field]['battles_count'] = '-'
-            result[field]['win_rate'] = '-'
-            result[field]['avg_damage'] = '-'
-            result[field]['avg_frags'] = '-'
-            result[field]['avg_exp'] = '-'
-            result[field]['rating'] = '-1'
-            result[field]['rating_next'] = '1'
-        else:
-            result[field]['battles_count'] = original_data[field]['battles_count']
-            result[field]['win_rate'] = round(original_data[field]['wins']/original_data[field]['battles_count']*100,2)
-            result[field]['avg_damage'] = int(original_data[field]['damage_dealt']/original_data[field]['battles_count'])
-            result[field]['avg_frags'] = round(original_data[field]['frags']/original_data[field]['battles_count'],2)
-            result[field]['avg_exp'] = int(original_data[field]['original_exp']/original_data[field]['battles_count'])
-            if original_data[field]['value_battles_count'] != 0:
-                result[field]['rating'] = int(original_data[field]['personal_rating']/original_data[field]['value_battles_count'])
-                rating_class, rating_next = RatingUtils.get_rating_class(result[field]['rating'])
-                result[field]['rating_next'] = str(rating_next)
-                result[field]['win_rate_class'] = RatingUtils.get_content_class(0, result[field]['win_rate'])
-                result[field]['avg_damage_class'] = RatingUtils.get_content_class(1, original_data[field]['n_damage_dealt']/original_data[field]['value_battles_count'])
-                result[field]['avg_frags_class'] = RatingUtils.get_content_class(2, original_data[field]['n_frags']/original_data[field]['value_battles_count'])
-                result[field]['rating_class'] = rating_class
-            else:
-                result[field]['rating'] = -1
-                rating_class, rating_next = RatingUtils.get_rating_class(-1)
-                result[field]['rating_next'] = str(rating_next)
-                result[field]['win_rate_class'] = RatingUtils.get_content_class(0, -1)
-                result[field]['avg_damage_class'] = RatingUtils.get_content_class(1, -1)
-                result[field]['avg_frags_class'] = RatingUtils.get_content_class(2, -1)
-                result[field]['rating_class'] = rating_class
-            result[field]['battles_count'] = '{:,}'.format(result[field]['battles_count']).replace(',', ' ')
-            result[field]['win_rate'] = '{:.2f}%'.format(result[field]['win_rate'])
-            result[field]['avg_damage'] = '{:,}'.format(result[field]['avg_damage']).replace(',', ' ')
-            result[field]['avg_frags'] = '{:.2f}'.format(result[field]['avg_frags'])
-            result[field]['avg_exp'] = '{:,}'.format(result[field]['avg_exp']).replace(',', ' ')
-            result[field]['rating'] = '{:,}'.format(result[field]['rating']).replace(',', ' ')
-    return result
+    参数:
+        data: 计算过PR的用户船只数据 {ship_id: {battle_type: ShipStats格式的list}}
+        shipid_data: 船只信息
 
-def processing_pvp_chart(data: Dict[str, Dict], shipid_data: dict):
-    result = [[0,0,0,0,0] for _ in range(11)]
+    返回:
+        (overall, battle_type, ship_type, chart)
+    '''
+    overall = [0] * 9
+    battle_type = [[0] * 9 for _ in BATTLE_TYPES]
+    ship_type = [[0] * 9 for _ in SHIP_TYPES]
+    chart = [[0,0,0,0,0] for _ in range(11)]
     for ship_id, ship_info in data.items():
-        ship_data: ShipDataDict = ship_info['pvp']
-        if ship_data == {}:
+        for index, field in enumerate(BATTLE_TYPES):
+            ship_data: list = ship_info[field]
+            if ship_data:
+                accumulate_ship_data(battle_type[index], ship_data)
+        ship_data: list = ship_info['pvp']
+        if not ship_data:
             continue
-        ship_name:ShipInfoDict = shipid_data.get(ship_id)
+        accumulate_ship_data(overall, ship_data)
+        ship_name: ShipInfoDict = shipid_data.get(ship_id)
         if ship_name is None:
             continue
-        ship_tier = ship_name['tier']
-        ship_type = ship_name['type']
-        ship_type_dict = {
-            'AirCarrier': 0,
-            'Battleship': 1,
-            'Cruiser': 2,
-            'Destroyer': 3,
-            'Submarine': 4
-            }
-        result[ship_tier-1][ship_type_dict[ship_type]] += ship_data['battles_count']
-    return result
+        type_index = SHIP_TYPE_INDEX[ship_name['type']]
+        accumulate_ship_data(ship_type[type_index], ship_data)
+        chart[ship_name['tier']-1][type_index] += ship_data[BATTLES_COUNT]
+    return (
+        format_processed_data(overall, True),
+        {field: format_processed_data(battle_type[index], False) for index, field in enumerate(BATTLE_TYPES)},
+        {field: format_processed_data(ship_type[index], False) for index, field in enumerate(SHIP_TYPES)},
+        chart
+    )
+
+def calculate_pvp_statistics(region: str, data: Dict[str, Dict], shipid_name: str):
+    '''
+    计算PR并聚合pvp数据，可以在进程池中执行
+
+    参数:
+        region: 服务器
+        data: 用户的船只数据
+        shipid_name: 船只信息的文件名
+
+    返回:
+        (overall, battle_type, ship_type, chart)
+    '''
+    server_data = ReferenceData.get('ship_data')
+    shipid_data = ReferenceData.get(shipid_name)
+    original_data = pvp_calculate_rating(
+        region,
+        data,
+        server_data['ship_data'],
+        ReferenceData.get_version('ship_data')
+    )
+    return processing_pvp_statistics(original_data, shipid_data)
 
 def processing_cb_overall_data(data: list):
     original_data = NoneProcessedData.copy()
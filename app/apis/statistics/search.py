@@ -1,3 +1,5 @@
+import asyncio
+
 from app.network import ExternalAPI
 from app.utils import NameUtils
 from app.response import JSONResponse
@@ -33,6 +35,9 @@ class SearchAPI:
         content: str,
         language: str
     ):
+        # 静态数据更新后需要重新构建名称索引和BK树，耗时数百毫秒，放到线程中避免阻塞事件循环
+        if not NameUtils.has_name_index(region):
+            await asyncio.to_thread(NameUtils.get_name_index, region)
         result = JSONResponse.get_success_response(NameUtils.search_ship(region,content,language))
         return result
     
@@ -42,7 +47,8 @@ class SearchAPI:
         region: str,
         query_condition: ShipFilter
     ):
-        result = NameUtils.query_ship(region, query_condition)
+        # 超过50条时直接返回，不需要取出全部结果
+        result = NameUtils.query_ship(region, query_condition, 50)
         if result == {}:
             return JSONResponse.API_2006_ShipDataNotMatched
         elif len(result) >= 50:
@@ -1,18 +1,26 @@
 from app.response import JSONResponse
 from app.loggers import ExceptionLogger
 from app.models import PlatyerModel
-from app.utils import GameUtils, JsonUtils
+from app.utils import GameUtils, ReferenceData
 from app.middlewares import RedisClient
 from app.network import ExternalAPI
 from .processing import (
-    pvp_calculate_rating, 
-    processing_overall_data, 
-    processing_battle_type_data,
-    processing_ship_type_data,
-    processing_pvp_chart,
+    calculate_pvp_statistics,
     processing_cb_overall_data,
     processing_cb_seasons_data
 )
+from .cache import StatsCache
+from .executor import StatsExecutor
+
+async def get_basic_data(region: str, region_id: int, account_id: int, ac: str = None, fetch: bool = True) -> dict:
+    "读取用户的基本数据，先读数据库(优先读取缓存)，读不到数据且fetch为True时再请求"
+    result = await PlatyerModel.get_user_brief(region_id, account_id)
+    if result['code'] != 1000 or not fetch:
+        return result
+    if result['data'] is None:
+        # 数据库中无用户数据，进行网络请求获取数据
+        result = await ExternalAPI.get_user_brief(region, account_id, ac)
+    return result
 
 class StatsAPI:
     @ExceptionLogger.handle_program_exception_async
@@ -45,21 +53,37 @@ class StatsAPI:
             ac = result['data'].get('ac')
         else:
             ac = None
-        # 先读数据库，读不到数据再请求
-        result = await PlatyerModel.get_user_brief(region_id, account_id)
-        if result['code'] != 1000:
-            return result
-        if result['data'] is None:
-            # 数据库中无用户数据，进行网络请求获取数据
-            result = await ExternalAPI.get_user_brief(region, account_id, ac)
+        # 读取数据库中的场次，场次没有变化则直接返回上次的计算结果
+        battles_result = await PlatyerModel.get_user_battles(region_id, account_id)
+        if battles_result['code'] != 1000:
+            return battles_result
+        battles = battles_result['data']['pvp_battles'] if battles_result['data'] else None
+        if region == 'ru':
+            shipid_name = 'ship_name_lesta'
+        else:
+            shipid_name = 'ship_name_wg'
+        version = f"{ReferenceData.get_file_version('ship_data')}-{ReferenceData.get_file_version(shipid_name)}"
+        cache_kind = f"pvp:{field}:{1 if include_old else 0}"
+        cache_data = await StatsCache.get(region, account_id, cache_kind, ac != None, version, battles)
+        if cache_data is not None:
+            # 用户名和工会等基本数据不写入缓存，命中时从brief的ReadCache读取，不请求外部接口
+            # 读不到基本数据时按未命中处理
+            result = await get_basic_data(region, region_id, account_id, ac, fetch=False)
             if result['code'] != 1000:
                 return result
+            if result['data'] is not None:
+                cache_data['basic'] = result['data']
+                return JSONResponse.get_success_response(cache_data)
+        result = await get_basic_data(region, region_id, account_id, ac)
+        if result['code'] != 1000:
+            return result
         data = {
             'type': field,
             'basic': result['data'],
             'statistics': {}
         }
-        result = await ExternalAPI.get_user_pvp(region, account_id, ac, field, include_old)
+        # 场次已经读取过，传入后不再重复查询
+        result = await ExternalAPI.get_user_pvp(region, account_id, ac, field, include_old, battles_result)
         if result['code'] != 1000:
             return result
         data['statistics'] = {
@@ -70,17 +94,22 @@ class StatsAPI:
             'chart': {}
         }
         
-        server_data = JsonUtils.read('ship_data')
-        if region == 'ru':
-            shipid_data = JsonUtils.read('ship_name_lesta')
-        else:
-            shipid_data = JsonUtils.read('ship_name_wg')
-        original_data = pvp_calculate_rating(region, result['data']['original_data'], server_data['ship_data'])
-        data['statistics']['overall'] = processing_overall_data(original_data, 'pvp')
-        data['statistics']['battle_type'] = processing_battle_type_data(original_data)
-        data['statistics']['ship_type'] = processing_ship_type_data(original_data, 'pvp', shipid_data)
-        data['statistics']['chart'] = processing_pvp_chart(original_data, shipid_data)
+        # 船只较多的用户放到进程池中计算
+        original_data = result['data']['original_data']
+        (
+            data['statistics']['overall'],
+            data['statistics']['battle_type'],
+            data['statistics']['ship_type'],
+            data['statistics']['chart']
+        ) = await StatsExecutor.run(
+            calculate_pvp_statistics,
+            len(original_data),
+            region,
+            original_data,
+            shipid_name
+        )
         data['statistics']['record'] = result['data']['record']
+        await StatsCache.set(region, account_id, cache_kind, ac != None, version, battles, data)
 
         return JSONResponse.get_success_response(data)
     
@@ -103,15 +132,24 @@ class StatsAPI:
             ac = None
         if ac:
             return JSONResponse.API_2027_ACQueryNotSupported
-        # 先读数据库，读不到数据再请求
-        result = await PlatyerModel.get_user_brief(region_id, account_id)
+        # 读取数据库中的场次，场次没有变化则直接返回上次的计算结果
+        result = await PlatyerModel.get_user_battles(region_id, account_id)
         if result['code'] != 1000:
             return result
-        if result['data'] is None:
-            # 数据库中无用户数据，进行网络请求获取数据
-            result = await ExternalAPI.get_user_brief(region, account_id, ac)
+        battles = result['data']['total_battles'] if result['data'] else None
+        cache_data = await StatsCache.get(region, account_id, 'cb', False, '0', battles)
+        if cache_data is not None:
+            # 用户名和工会等基本数据不写入缓存，命中时从brief的ReadCache读取，不请求外部接口
+            # 读不到基本数据时按未命中处理
+            result = await get_basic_data(region, region_id, account_id, ac, fetch=False)
             if result['code'] != 1000:
                 return result
+            if result['data'] is not None:
+                cache_data['basic'] = result['data']
+                return JSONResponse.get_success_response(cache_data)
+        result = await get_basic_data(region, region_id, account_id, ac)
+        if result['code'] != 1000:
+            return result
         data = {
             'type': 'clan_battle',
             'basic': result['data'],
@@ -127,5 +165,6 @@ class StatsAPI:
         }
         data['statistics']['overall'] = processing_cb_overall_data(result['data']['seasons'])
         data['statistics']['seasons'] = processing_cb_seasons_data(result['data']['seasons'])
+        await StatsCache.set(region, account_id, 'cb', False, '0', battles, data)
 
         return JSONResponse.get_success_response(data)
\ No newline at end of file
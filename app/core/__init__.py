@@ -4,6 +4,7 @@ from .logger import api_logger
 from .paths import (
     ERROR_LOG_PATH,
     API_LOG_PATH,
+    SLOW_QUERY_LOG_PATH,
     JSON_FILE_PATH,
     DB_FILE_PATH,
     BACKUP_PATH
@@ -16,6 +17,7 @@ __all__ = [
     'split_config',
     'ERROR_LOG_PATH',
     'API_LOG_PATH',
+    'SLOW_QUERY_LOG_PATH',
     'JSON_FILE_PATH',
     'DB_FILE_PATH',
     'BACKUP_PATH'
@@ -28,6 +28,76 @@ class LoadConfig(BaseSettings):
     WG_API_TOKEN: str
     LESTA_API_TOKEN: str
 
+    # 外部API连接池配置
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30
+    HTTP2_ENABLED: bool = True
+    # 相同GET请求结果的复用时间(秒)，为0表示只合并并发请求
+    HTTP_SINGLE_FLIGHT_WINDOW: float = 0
+
+    # 外部API全局限流配置(按host)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_SECOND: float = 20
+    RATE_LIMIT_BURST: int = 20
+    RATE_LIMIT_BACKGROUND_RATIO: float = 0.5
+    RATE_LIMIT_MAX_WAIT: float = 5
+
+    # 外部API熔断配置(按host)
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_ERROR_RATE: float = 0.5
+    CIRCUIT_MIN_REQUESTS: int = 10
+    CIRCUIT_WINDOW_SECONDS: float = 30
+    CIRCUIT_OPEN_SECONDS: float = 30
+    CIRCUIT_HALF_OPEN_REQUESTS: int = 1
+
+    # 外部API返回数据的缓存配置
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SHIPS: int = 600
+    RESPONSE_CACHE_TTL_CB: int = 1800
+
+    # 处理完成的统计数据缓存配置
+    STATS_CACHE_ENABLED: bool = True
+    STATS_CACHE_TTL: int = 600
+
+    # 数据库只读查询(绑定、会员信息、用户基本数据)的缓存，负缓存使用更短的过期时间
+    READ_CACHE_ENABLED: bool = True
+    READ_CACHE_TTL: int = 600
+    READ_CACHE_NEGATIVE_TTL: int = 60
+
+    # MySQL连接池大小，超过MYSQL_POOL_LEAK_TIMEOUT秒未释放的连接视为泄漏
+    MYSQL_POOL_MINSIZE: int = 1
+    MYSQL_POOL_MAXSIZE: int = 10
+    MYSQL_POOL_LEAK_TIMEOUT: float = 30
+
+    # 慢查询统计，关闭时没有额外开销，超过阈值(ms)的查询写入滚动日志
+    SLOW_QUERY_PROFILING: bool = False
+    SLOW_QUERY_THRESHOLD: float = 200
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10485760
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+
+    # MySQL从库，为空时不启用，只读查询全部使用主库
+    MYSQL_REPLICA_HOST: str = ''
+    MYSQL_REPLICA_PORT: int = 3306
+    # 可接受的复制延迟(秒)，超过时只读查询回落到主库
+    MYSQL_REPLICA_MAX_LAG: int = 5
+    MYSQL_REPLICA_CHECK_INTERVAL: float = 5
+
+    # 船只搜索无结果时的模糊搜索配置
+    SHIP_FUZZY_TOP_K: int = 5
+    SHIP_FUZZY_MAX_DISTANCE: int = 2
+    SHIP_FUZZY_TIME_BUDGET: float = 0.02
+
+    # json文件备份保留的份数
+    JSON_BACKUP_RETENTION: int = 10
+
+    # 统计数据计算进程池，进程数为0时不启用
+    STATS_EXECUTOR_WORKERS: int = 2
+    STATS_EXECUTOR_THRESHOLD: int = 200
+
+    # 指标计数写入redis的间隔(秒)
+    METRICS_FLUSH_INTERVAL: float = 5
+
     class Config:
         env_file = ".env"
 
@@ -5,6 +5,7 @@ LOG_DIR = '/app/logs'
 
 ERROR_LOG_PATH = os.path.join(LOG_DIR, "error")
 API_LOG_PATH = os.path.join(LOG_DIR, "metrics")
+SLOW_QUERY_LOG_PATH = os.path.join(LOG_DIR, "slow_query")
 BACKUP_PATH = os.path.join(DATA_DIR, "backup")
 JSON_FILE_PATH = os.path.join(DATA_DIR, "json")
 DB_FILE_PATH = os.path.join(DATA_DIR, "db")
\ No newline at end of file
@@ -1,8 +1,10 @@
 from .mysql import MysqlConnection
 from .sqlite import SQLiteConnection
+from .profiler import QueryProfiler
 
 
 __all__ = [
     'MysqlConnection',
+    'QueryProfiler',
     'SQLiteConnection'
 ]
\ No newline at end of file
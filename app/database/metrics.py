@@ -0,0 +1,137 @@
+import sys
+import time
+from bisect import bisect_left
+
+from app.core import api_logger
+
+
+def get_frame_name(frame) -> str:
+    '''获取frame所在的方法名，例如BotUserModel.post_user_bind
+
+    Python 3.11之前没有co_qualname，从第一个参数(self/cls)取类名
+    '''
+    code = frame.f_code
+    qualname = getattr(code, 'co_qualname', None)
+    if qualname is not None:
+        return qualname
+    if code.co_argcount:
+        owner = frame.f_locals.get(code.co_varnames[0])
+        if code.co_varnames[0] in ('self', 'cls') and owner is not None:
+            owner = owner if isinstance(owner, type) else type(owner)
+            return f'{owner.__name__}.{code.co_name}'
+    return code.co_name
+
+def get_caller(depth: int = 2) -> str:
+    "获取调用方的方法名，depth为相对调用get_caller的函数的层数，2为调用该函数的方法"
+    return get_frame_name(sys._getframe(depth))
+
+
+# 直方图的桶上限(ms)，超过最后一个桶的记入溢出桶
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Histogram:
+    "固定分桶的耗时直方图，分位数取所在桶的上限(不超过最大值)"
+    __slots__ = ('counts', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float:
+        count = sum(self.counts)
+        if count == 0:
+            return 0
+        rank = count * q
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(BUCKETS_MS[i], round(self.max, 2)) if i < len(BUCKETS_MS) else round(self.max, 2)
+        return round(self.max, 2)
+
+    def to_dict(self) -> dict:
+        count = sum(self.counts)
+        buckets = {}
+        for i, n in enumerate(self.counts):
+            if n:
+                buckets[f'<={BUCKETS_MS[i]}' if i < len(BUCKETS_MS) else f'>{BUCKETS_MS[-1]}'] = n
+        return {
+            'count': count,
+            'avg_ms': 0 if count == 0 else round(self.total / count, 2),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max, 2),
+            'buckets': buckets
+        }
+
+
+class PoolMetrics:
+    '''MySQL连接的获取等待时间和占用时间统计
+
+    功能逻辑：
+    1. 按调用get_connection的模型方法分别统计等待时间(acquire)和占用时间(acquire到release)
+    2. 记录所有未释放的连接，超过MYSQL_POOL_LEAK_TIMEOUT仍未释放的视为泄漏，输出日志并计数
+    3. 泄漏的连接之后被释放时，占用时间照常记录
+    '''
+    _methods: dict[str, dict[str, Histogram]] = {}
+    # id(conn) -> [连接池, 方法, 获取时间, 是否已报告泄漏]
+    _held: dict[int, list] = {}
+    _leaks: int = 0
+
+    @classmethod
+    def acquired(cls, pool: str, method: str, conn: object, start: float) -> None:
+        "start为开始等待连接的时间(perf_counter)"
+        now = time.perf_counter()
+        if method not in cls._methods:
+            cls._methods[method] = {'wait': Histogram(), 'hold': Histogram()}
+        cls._methods[method]['wait'].observe((now - start) * 1000)
+        cls._held[id(conn)] = [pool, method, now, False]
+
+    @classmethod
+    def released(cls, conn: object) -> None:
+        item = cls._held.pop(id(conn), None)
+        if item is None:
+            return
+        pool, method, acquired_at, leaked = item
+        held = time.perf_counter() - acquired_at
+        cls._methods[method]['hold'].observe(held * 1000)
+        if leaked:
+            api_logger.info(f'Leaked MySQL connection from {method} ({pool}) was released after {round(held, 1)}s')
+
+    @classmethod
+    def check_leaks(cls, timeout: float) -> list[dict]:
+        "返回占用时间超过timeout秒的连接，新发现的泄漏输出日志"
+        now = time.perf_counter()
+        result = []
+        for item in cls._held.values():
+            pool, method, acquired_at, leaked = item
+            held = now - acquired_at
+            if held < timeout:
+                continue
+            if not leaked:
+                item[3] = True
+                cls._leaks += 1
+                api_logger.warning(f'MySQL connection from {method} ({pool}) has not been released for {round(held, 1)}s')
+            result.append({'pool': pool, 'method': method, 'held_s': round(held, 1)})
+        return result
+
+    @classmethod
+    def get_stats(cls, timeout: float) -> dict:
+        return {
+            'held': len(cls._held),
+            'leaks': cls._leaks,
+            'leaked': cls.check_leaks(timeout),
+            'methods': {
+                method: {name: histogram.to_dict() for name, histogram in histograms.items()}
+                for method, histograms in sorted(cls._methods.items())
+            }
+        }
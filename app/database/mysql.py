@@ -1,3 +1,5 @@
+import time
+import asyncio
 from typing import Optional
 
 import aiomysql
@@ -6,11 +8,56 @@ from aiomysql.connection import Connection
 from aiomysql.cursors import Cursor
 
 from app.core import EnvConfig, api_logger
+from .metrics import PoolMetrics, get_caller
+from .profiler import ProfilingCursor
+
+
+def get_replica_lag(row: Optional[dict]) -> Optional[int]:
+    '''从SHOW REPLICA STATUS的结果中读取复制延迟(秒)
+
+    没有结果说明该实例不是从库(例如测试时使用的第二个独立实例)，延迟记为0
+
+    复制线程停止时Seconds_Behind_Source为NULL，返回None表示从库不可用
+    '''
+    if not row:
+        return 0
+    for key in ('Seconds_Behind_Source', 'Seconds_Behind_Master'):
+        if key in row:
+            return row[key]
+    return None
 
 
 class MysqlConnection:
-    '''管理MySQL连接'''
+    '''管理MySQL连接
+
+    写连接池禁用隐式事务，需要手动begin/commit
+
+    只读连接池开启autocommit，只读的查询不需要begin/commit，每条查询少两次往返
+
+    配置MYSQL_REPLICA_HOST后只读查询优先使用从库：
+    1. replica_monitor_loop定期检测从库的复制延迟
+    2. 从库不可用、延迟超过MYSQL_REPLICA_MAX_LAG或者检测结果过期时，只读查询回落到主库的只读连接池
+    3. 可以通过max_lag指定更小的可接受延迟
+    4. 复制延迟只能精确到秒，且检测结果最多有3个检测间隔的滞后，写入缓存等不能读到旧数据的查询使用allow_replica=False只读取主库
+
+    每次获取连接按调用的模型方法记录等待时间和占用时间，见PoolMetrics
+    '''
     __pool: Optional[Pool] = None
+    __read_pool: Optional[Pool] = None
+    __replica_pool: Optional[Pool] = None
+    # 并发的第一次请求只创建一个连接池，否则先创建的连接池会被覆盖，其连接无法释放
+    # 在第一次使用时创建，避免在导入时绑定事件循环
+    _init_lock: Optional[asyncio.Lock] = None
+    # 从库状态，lag为None表示从库不可用
+    _replica: dict = {'lag': None, 'checked_at': 0.0, 'error': None}
+    # 各连接池的计数，waits为获取时连接已全部占用、需要排队的次数
+    _stats: dict[str, dict] = {
+        'primary': {'acquires': 0, 'waits': 0},
+        'read': {'acquires': 0, 'waits': 0},
+        'replica': {'acquires': 0, 'waits': 0, 'fallbacks': 0, 'errors': 0}
+    }
+    # 使用中的只读连接所属的连接池，释放时归还到对应的连接池
+    _read_conns: dict[Connection, Pool] = {}
     
     async def __init_connection(self) -> None:
         "初始化MySQL连接"
@@ -22,17 +69,79 @@ class MysqlConnection:
                 user=config.MYSQL_USERNAME, 
                 password=config.MYSQL_PASSWORD, 
                 db=config.MAIN_DB,
+                minsize=config.MYSQL_POOL_MINSIZE,
+                maxsize=config.MYSQL_POOL_MAXSIZE,
                 pool_recycle=3600, # 设置连接的回收时间
+                cursorclass=ProfilingCursor if config.SLOW_QUERY_PROFILING else Cursor,
                 autocommit=False   # 禁用隐式事务
                 # 由于禁用了隐式事务，必须确保事务被正确提交或者回滚！
                 # 如果未调用，事务将保持未提交状态，可能会导致死锁或连接超时问题
             )
-            api_logger.info(f'MySQL connection pool initialized for database: {config.MAIN_DB}')
+            api_logger.info(
+                f'MySQL connection pool initialized for database: {config.MAIN_DB} '
+                f'(minsize={config.MYSQL_POOL_MINSIZE}, maxsize={config.MYSQL_POOL_MAXSIZE})'
+            )
         except Exception as e:
             api_logger.error(f'Failed to initialize the MySQL connection')
             api_logger.error(e)
             raise e
 
+    async def __init_read_connection(self) -> None:
+        "初始化MySQL只读连接"
+        try:
+            config = EnvConfig.get_config()
+            self.__read_pool = await aiomysql.create_pool(
+                host=config.MYSQL_HOST, 
+                port=config.MYSQL_PORT, 
+                user=config.MYSQL_USERNAME, 
+                password=config.MYSQL_PASSWORD, 
+                db=config.MAIN_DB,
+                minsize=config.MYSQL_POOL_MINSIZE,
+                maxsize=config.MYSQL_POOL_MAXSIZE,
+                pool_recycle=3600, # 设置连接的回收时间
+                cursorclass=ProfilingCursor if config.SLOW_QUERY_PROFILING else Cursor,
+                autocommit=True    # 只读查询，每条语句自动提交
+                # 只能用于SELECT，需要事务的读写操作必须使用get_connection
+            )
+            api_logger.info(f'MySQL read-only connection pool initialized for database: {config.MAIN_DB}')
+        except Exception as e:
+            api_logger.error(f'Failed to initialize the MySQL read-only connection')
+            api_logger.error(e)
+            raise e
+
+    async def __init_replica_connection(self) -> None:
+        "初始化MySQL从库连接，失败时由check_replica处理"
+        config = EnvConfig.get_config()
+        self.__replica_pool = await aiomysql.create_pool(
+            host=config.MYSQL_REPLICA_HOST, 
+            port=config.MYSQL_REPLICA_PORT, 
+            user=config.MYSQL_USERNAME, 
+            password=config.MYSQL_PASSWORD, 
+            db=config.MAIN_DB,
+            minsize=config.MYSQL_POOL_MINSIZE,
+            maxsize=config.MYSQL_POOL_MAXSIZE,
+            pool_recycle=3600, # 设置连接的回收时间
+            cursorclass=ProfilingCursor if config.SLOW_QUERY_PROFILING else Cursor,
+            autocommit=True    # 从库只用于SELECT
+        )
+        api_logger.info(f'MySQL replica connection pool initialized for {config.MYSQL_REPLICA_HOST}:{config.MYSQL_REPLICA_PORT}')
+
+    def __get_init_lock(self) -> asyncio.Lock:
+        "获取创建连接池使用的锁"
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        return self._init_lock
+
+    async def __acquire(self, pool: Pool, name: str, method: str) -> Connection:
+        "从连接池获取连接，记录等待时间"
+        if pool.freesize == 0 and pool.size >= pool.maxsize:
+            self._stats[name]['waits'] += 1
+        start = time.perf_counter()
+        conn = await pool.acquire()
+        self._stats[name]['acquires'] += 1
+        PoolMetrics.acquired(name, method, conn, start)
+        return conn
+
     @classmethod
     async def test_mysql(self) -> None:
         "测试MySQL连接"
@@ -66,16 +175,144 @@ class MysqlConnection:
     @classmethod
     async def get_connection(self):
         "获取一条连接，记得使用完要使用release释放"
+        # 调用方的方法名，例如BotUserModel.post_user_bind
+        method = get_caller()
         if not self.__pool:
-            await self.__init_connection(self)
-        return await self.__pool.acquire()
+            async with self.__get_init_lock(self):
+                if not self.__pool:
+                    await self.__init_connection(self)
+        return await self.__acquire(self, self.__pool, 'primary', method)
 
     @classmethod
     async def release_connection(self, conn):
         "释放连接"
+        PoolMetrics.released(conn)
         if self.__pool:
             await self.__pool.release(conn)
 
+    @classmethod
+    def use_replica(self, max_lag: Optional[int] = None) -> bool:
+        "判断只读查询是否可以使用从库，max_lag为可接受的复制延迟(秒)，默认为MYSQL_REPLICA_MAX_LAG"
+        config = EnvConfig.get_config()
+        if not config.MYSQL_REPLICA_HOST or self.__replica_pool is None:
+            return False
+        lag = self._replica['lag']
+        if lag is None:
+            return False
+        # 检测任务停止或者卡住时，不再信任上一次的检测结果
+        if time.monotonic() - self._replica['checked_at'] > config.MYSQL_REPLICA_CHECK_INTERVAL * 3:
+            return False
+        if max_lag is None:
+            max_lag = config.MYSQL_REPLICA_MAX_LAG
+        return lag <= max_lag
+
+    @classmethod
+    async def get_read_connection(self, max_lag: Optional[int] = None, allow_replica: bool = True):
+        '''获取一条只读连接，不需要begin/commit，记得使用完要使用release_read_connection释放
+
+        从库可用且延迟不超过max_lag时使用从库，否则使用主库
+
+        allow_replica为False时只使用主库，用于结果会写入缓存的查询
+        '''
+        method = get_caller()
+        if allow_replica and self.use_replica(max_lag):
+            try:
+                conn = await self.__acquire(self, self.__replica_pool, 'replica', method)
+                self._read_conns[conn] = self.__replica_pool
+                return conn
+            except Exception as e:
+                # 从库连接失败，在下一次检测成功前不再使用从库
+                self._stats['replica']['errors'] += 1
+                self._replica['lag'] = None
+                self._replica['error'] = type(e).__name__
+                api_logger.warning(f'Failed to acquire a MySQL replica connection, fall back to the primary: {type(e).__name__}')
+        if allow_replica and EnvConfig.get_config().MYSQL_REPLICA_HOST:
+            self._stats['replica']['fallbacks'] += 1
+        if not self.__read_pool:
+            async with self.__get_init_lock(self):
+                if not self.__read_pool:
+                    await self.__init_read_connection(self)
+        conn = await self.__acquire(self, self.__read_pool, 'read', method)
+        self._read_conns[conn] = self.__read_pool
+        return conn
+
+    @classmethod
+    async def release_read_connection(self, conn):
+        "释放只读连接"
+        PoolMetrics.released(conn)
+        pool = self._read_conns.pop(conn, None)
+        if pool:
+            await pool.release(conn)
+
+    @classmethod
+    async def check_replica(self) -> None:
+        "检测从库的复制延迟"
+        config = EnvConfig.get_config()
+        in_use = self.use_replica()
+        try:
+            if self.__replica_pool is None:
+                await self.__init_replica_connection(self)
+            async with self.__replica_pool.acquire() as conn:
+                conn: Connection
+                async with conn.cursor(aiomysql.DictCursor) as cur:
+                    try:
+                        await cur.execute("SHOW REPLICA STATUS;")
+                    except aiomysql.ProgrammingError:
+                        # MySQL 8.0.22之前的版本不支持REPLICA关键字
+                        await cur.execute("SHOW SLAVE STATUS;")
+                    row = await cur.fetchone()
+            lag = get_replica_lag(row)
+            self._replica['lag'] = lag
+            self._replica['error'] = None if lag is not None else 'ReplicationStopped'
+        except Exception as e:
+            self._replica['lag'] = None
+            self._replica['error'] = type(e).__name__
+        self._replica['checked_at'] = time.monotonic()
+        lag = self._replica['lag']
+        # 只在状态变化时输出日志
+        if in_use and not self.use_replica():
+            if lag is None:
+                api_logger.warning(f'MySQL replica is unavailable ({self._replica["error"]}), reads fall back to the primary')
+            else:
+                api_logger.warning(f'MySQL replica lag {lag}s exceeds {config.MYSQL_REPLICA_MAX_LAG}s, reads fall back to the primary')
+        elif not in_use and self.use_replica():
+            api_logger.info(f'MySQL replica is available, lag: {lag}s')
+
+    @classmethod
+    async def replica_monitor_loop(self) -> None:
+        "定期检测从库状态，未配置从库时直接返回"
+        config = EnvConfig.get_config()
+        if not config.MYSQL_REPLICA_HOST:
+            return
+        while True:
+            await self.check_replica()
+            await asyncio.sleep(config.MYSQL_REPLICA_CHECK_INTERVAL)
+
+    @classmethod
+    async def leak_monitor_loop(self) -> None:
+        "定期检查超时未释放的连接"
+        config = EnvConfig.get_config()
+        while True:
+            await asyncio.sleep(config.MYSQL_POOL_LEAK_TIMEOUT / 2)
+            PoolMetrics.check_leaks(config.MYSQL_POOL_LEAK_TIMEOUT)
+
+    @classmethod
+    def get_stats(self) -> dict:
+        "获取各连接池的状态和计数，以及各方法的等待/占用时间"
+        config = EnvConfig.get_config()
+        result = {}
+        for name, pool in [('primary', self.__pool), ('read', self.__read_pool), ('replica', self.__replica_pool)]:
+            result[name] = dict(self._stats[name])
+            result[name]['size'] = pool.size if pool else 0
+            result[name]['free'] = pool.freesize if pool else 0
+            result[name]['maxsize'] = pool.maxsize if pool else config.MYSQL_POOL_MAXSIZE
+        result['replica']['enabled'] = bool(EnvConfig.get_config().MYSQL_REPLICA_HOST)
+        result['replica']['in_use'] = self.use_replica()
+        result['replica']['lag'] = self._replica['lag']
+        result['replica']['error'] = self._replica['error']
+        result['connections'] = PoolMetrics.get_stats(config.MYSQL_POOL_LEAK_TIMEOUT)
+        return result
+
     @classmethod
     async def close_mysql(self) -> None:
         "关闭MySQL连接"
@@ -86,6 +323,14 @@ class MysqlConnection:
                 api_logger.info('The MySQL connection is closed')
             else:
                 api_logger.warning('The MySQL connection is empty and cannot be closed')
+            if self.__read_pool:
+                self.__read_pool.close()
+                await self.__read_pool.wait_closed()
+                api_logger.info('The MySQL read-only connection is closed')
+            if self.__replica_pool:
+                self.__replica_pool.close()
+                await self.__replica_pool.wait_closed()
+                api_logger.info('The MySQL replica connection is closed')
         except Exception as e:
             api_logger.error(f'Failed to close the MySQL connection')
             api_logger.error(e)
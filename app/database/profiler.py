@@ -0,0 +1,160 @@
+import os
+import re
+import sys
+import time
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+from aiomysql.cursors import Cursor
+
+from app.core import EnvConfig, SLOW_QUERY_LOG_PATH
+from .metrics import get_frame_name
+
+
+_WHITESPACE = re.compile(r'\s+')
+# 字符串、数字和占位符统一替换为?
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b|%s")
+# IN (?, ?, ?) 和多行VALUES (?, ?), (?, ?) 合并，参数个数不同的查询归为同一条
+_IN_LIST = re.compile(r'\bIN \(\?(?:, ?\?)*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'\bVALUES (\([?, ]+\))(?:, ?\([?, ]+\))*', re.IGNORECASE)
+
+def normalize_sql(query: str) -> str:
+    "去掉多余的空白，字面量和参数替换为?"
+    sql = _WHITESPACE.sub(' ', query).strip()
+    sql = _LITERALS.sub('?', sql)
+    sql = _VALUES_LIST.sub(r'VALUES \1, ...', sql)
+    return _IN_LIST.sub('IN (?, ...)', sql)
+
+
+class QueryProfiler:
+    '''MySQL查询的耗时统计
+
+    功能逻辑：
+    1. SLOW_QUERY_PROFILING开启时，连接池使用ProfilingCursor，关闭时使用原本的Cursor，没有额外开销
+    2. 按调用位置(方法名:行号)和归一化后的SQL统计次数、耗时和返回/影响的行数
+    3. 超过SLOW_QUERY_THRESHOLD(ms)的查询写入滚动的慢查询日志，写文件在单独的线程中进行
+    '''
+    # 统计的查询条数上限，超过后新的查询只写慢查询日志
+    MAX_ENTRIES = 2000
+    # (方法名, 行号, 归一化后的SQL) -> [count, total_ms, max_ms, rows]
+    _stats: dict[tuple, list] = {}
+    _normalized: dict[str, str] = {}
+    _logger: Optional[logging.Logger] = None
+    _listener: Optional[QueueListener] = None
+
+    @classmethod
+    def get_slow_logger(cls) -> logging.Logger:
+        "第一次写入慢查询时创建日志文件"
+        if cls._logger is None:
+            config = EnvConfig.get_config()
+            os.makedirs(SLOW_QUERY_LOG_PATH, exist_ok=True)
+            handler = RotatingFileHandler(
+                os.path.join(SLOW_QUERY_LOG_PATH, 'slow_query.log'),
+                maxBytes=config.SLOW_QUERY_LOG_MAX_BYTES,
+                backupCount=config.SLOW_QUERY_LOG_BACKUPS,
+                encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            log_queue = queue.SimpleQueue()
+            cls._listener = QueueListener(log_queue, handler)
+            cls._listener.start()
+            logger = logging.getLogger('slow_query')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(QueueHandler(log_queue))
+            cls._logger = logger
+        return cls._logger
+
+    @classmethod
+    def close(cls) -> None:
+        "写入剩余的日志并停止写入线程"
+        if cls._listener is not None:
+            cls._listener.stop()
+            cls._listener = None
+            cls._logger.handlers.clear()
+            cls._logger = None
+
+    @classmethod
+    def record(cls, method: str, lineno: int, query: str, args, elapsed_ms: float, rows: int) -> None:
+        # 参数个数不同的IN列表和多行VALUES归为同一条
+        key = (method, lineno, cls.normalize(query))
+        entry = cls._stats.get(key)
+        if entry is None:
+            if len(cls._stats) < cls.MAX_ENTRIES:
+                entry = cls._stats[key] = [0, 0.0, 0.0, 0]
+        if entry is not None:
+            entry[0] += 1
+            entry[1] += elapsed_ms
+            if elapsed_ms > entry[2]:
+                entry[2] = elapsed_ms
+            if rows > 0:
+                entry[3] += rows
+        if elapsed_ms >= EnvConfig.get_config().SLOW_QUERY_THRESHOLD:
+            cls.get_slow_logger().info(
+                f'{round(elapsed_ms, 2)}ms rows={rows} {method}:{lineno} | '
+                f'{key[2]} | args={str(args)[:200]}'
+            )
+
+    @classmethod
+    def normalize(cls, query: str) -> str:
+        sql = cls._normalized.get(query)
+        if sql is None:
+            if len(cls._normalized) >= cls.MAX_ENTRIES:
+                cls._normalized.clear()
+            sql = cls._normalized[query] = normalize_sql(query)
+        return sql
+
+    @classmethod
+    def get_top(cls, order: str = 'total', limit: int = 20) -> list[dict]:
+        "按total/max/avg/count排序，返回前limit条，调用位置不同的同一条SQL分开统计"
+        result = []
+        for (method, lineno, sql), (count, total_ms, max_ms, rows) in cls._stats.items():
+            result.append({
+                'site': f'{method}:{lineno}',
+                'sql': sql,
+                'count': count,
+                'total_ms': round(total_ms, 2),
+                'avg_ms': round(total_ms / count, 2),
+                'max_ms': round(max_ms, 2),
+                'avg_rows': round(rows / count, 2)
+            })
+        result.sort(key=lambda item: item[f'{order}_ms' if order != 'count' else 'count'], reverse=True)
+        return result[:limit]
+
+    @classmethod
+    def reset(cls) -> None:
+        cls._stats.clear()
+
+
+class ProfilingCursor(Cursor):
+    "记录每条查询耗时的Cursor，调用位置为调用execute的方法"
+    _in_many = False
+
+    async def execute(self, query, args=None):
+        if self._in_many:
+            return await super().execute(query, args)
+        frame = sys._getframe(1)
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, args)
+        finally:
+            QueryProfiler.record(
+                get_frame_name(frame), frame.f_lineno, query, args,
+                (time.perf_counter() - start) * 1000, self._rowcount
+            )
+
+    async def executemany(self, query, args):
+        # executemany内部会多次调用execute，只记录一次
+        frame = sys._getframe(1)
+        start = time.perf_counter()
+        self._in_many = True
+        try:
+            return await super().executemany(query, args)
+        finally:
+            self._in_many = False
+            QueryProfiler.record(
+                get_frame_name(frame), frame.f_lineno, query, f'{len(args or [])} rows',
+                (time.perf_counter() - start) * 1000, self._rowcount
+            )
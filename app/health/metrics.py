@@ -1,21 +1,64 @@
 import os
 import csv
+import asyncio
+from typing import Optional
 from collections import defaultdict
 from datetime import datetime, timedelta
 
-from app.core import API_LOG_PATH, ERROR_LOG_PATH
+from app.core import API_LOG_PATH, ERROR_LOG_PATH, EnvConfig, api_logger
 from app.middlewares import RedisClient
 
 
+# 每天各服务器外部接口的请求量和错误量
+HTTP_METRICS_KEYS = [
+    'asia_total','eu_total','na_total','ru_total','cn_total',
+    'asia_error','eu_error','na_error','ru_error','cn_error'
+]
+
+
 class ServiceMetrics:
+    # ------------------------------------------------------
+    # 计数类指标先在内存中累加，由flush_loop定期通过pipeline写入redis
+    # 避免每个请求都要额外等待redis的往返
+    # 程序关闭时在lifespan中调用flush，保证计数不丢失
+    # ------------------------------------------------------
+    _buffer: dict[str, int] = defaultdict(int)
+    # 同时只有一次写入，第一次写入时创建
+    _flush_lock: Optional[asyncio.Lock] = None
+
     async def requests_incr(key: str, date: str):
-        await RedisClient.incr(f"metrics:{key}:{date}")
+        ServiceMetrics._buffer[f"metrics:{key}:{date}"] += 1
 
     async def http_incrby(region: str, date: str, amount: int):
-        await RedisClient.incrby(f"metrics:http:{date}:{region}_total", amount)
+        ServiceMetrics._buffer[f"metrics:http:{date}:{region}_total"] += amount
 
     async def http_error_incrby(region: str, date: str, amount: int):
-        await RedisClient.incrby(f"metrics:http:{date}:{region}_error", amount)
+        ServiceMetrics._buffer[f"metrics:http:{date}:{region}_error"] += amount
+
+    @staticmethod
+    async def flush():
+        "将内存中累加的计数写入redis"
+        if ServiceMetrics._flush_lock is None:
+            ServiceMetrics._flush_lock = asyncio.Lock()
+        async with ServiceMetrics._flush_lock:
+            if not ServiceMetrics._buffer:
+                return
+            values = ServiceMetrics._buffer
+            ServiceMetrics._buffer = defaultdict(int)
+            result = await RedisClient.incr_many(dict(values))
+            if result['code'] != 1000:
+                # 写入失败，计数合并回缓冲区等待下次写入
+                for key, amount in values.items():
+                    ServiceMetrics._buffer[key] += amount
+                api_logger.warning(f'Failed to flush {len(values)} metrics')
+
+    @staticmethod
+    async def flush_loop():
+        "定期写入计数"
+        while True:
+            await asyncio.sleep(EnvConfig.get_config().METRICS_FLUSH_INTERVAL)
+            # 任务被取消时正在进行的写入继续完成，关闭时的flush会等待其完成
+            await asyncio.shield(ServiceMetrics.flush())
     
     @staticmethod
     def collect_today_hourly_metrics():
@@ -80,42 +123,41 @@ class ServiceMetrics:
         }
     
     @staticmethod
-    async def collect_api_metrics():
+    async def collect_redis_metrics():
+        '''
+        读取近30天的api请求量、celery任务量和近15天各服务器的外部接口请求量
+
+        所有key通过一个pipeline的三条MGET读取，只需要一次往返
+        '''
         now = datetime.now()
-        keys = []
+        days = []
         for i in range(30, 0, -1):
             day = now - timedelta(days=i)
-            keys.append(day.date().isoformat())
-        values = await RedisClient.get_by_pipe("metrics:api:key", keys)
-        if values['code'] != 1000:
-            values = [None * 30]
+            days.append(day.date().isoformat())
+        # 外部接口为近14天加上今天
+        http_days = days[-14:] + [now.date().isoformat()]
+        async with RedisClient.pipeline() as pipe:
+            pipe.mget([f"metrics:api:{day}" for day in days])
+            pipe.mget([f"metrics:celery:{day}" for day in days])
+            pipe.mget([f"metrics:http:{day}:{name}" for day in http_days for name in HTTP_METRICS_KEYS])
+        if pipe.result['code'] != 1000:
+            api = celery = [None] * len(days)
+            http = [None] * len(http_days) * len(HTTP_METRICS_KEYS)
         else:
-            values = values['data']
-        return {
-            "keys": keys,
-            "series":[
-                    {
-                    "name": "resquest",
-                    "type": "bar",
-                    "data": values
-                }
+            api, celery, http = [
+                [int(value) if value else 0 for value in values]
+                for values in pipe.result['data']
             ]
-        }
-    
+        return (
+            ServiceMetrics.build_daily_chart(days, api),
+            ServiceMetrics.build_daily_chart(days, celery),
+            ServiceMetrics.build_http_charts(http_days[:-1], http)
+        )
+
     @staticmethod
-    async def collect_celery_metrics():
-        now = datetime.now()
-        keys = []
-        for i in range(30, 0, -1):
-            day = now - timedelta(days=i)
-            keys.append(day.date().isoformat())
-        values = await RedisClient.get_by_pipe("metrics:celery:key", keys)
-        if values['code'] != 1000:
-            values = [None * 30]
-        else:
-            values = values['data']
+    def build_daily_chart(days: list, values: list):
         return {
-            "keys": keys,
+            "keys": days,
             "series":[
                     {
                     "name": "resquest",
@@ -124,40 +166,29 @@ class ServiceMetrics:
                 }
             ]
         }
-    
+
     @staticmethod
-    async def collect_http_metrics():
-        now = datetime.now()
+    def build_http_charts(dates: list, values: list):
+        "values为每天HTTP_METRICS_KEYS个值，最后一天为今天"
+        size = len(HTTP_METRICS_KEYS)
+        today = values[-size:]
         today_count = [0,0]
-        dates = []
+        if today[0] is not None:
+            today_count[0] = today[0] + today[1] + today[2] + today[3] + today[4]
+            today_count[1] = today[5] + today[6] + today[7] + today[8] + today[9]
         counts = [[],[],[],[],[],[],[],[],[],[]]
-        for i in range(14, -1, -1):
-            if i == 0:
-                keys = ['asia_total','eu_total','na_total','ru_total','cn_total','asia_error','eu_error','na_error','ru_error','cn_error']
-                values = await RedisClient.get_by_pipe(f"metrics:http:{day.date().isoformat()}:key", keys)
-                if values['code'] == 1000:
-                    values = values['data']
-                    today_count[0] = values[0] + values[1] + values[2] + values[3] + values[4]
-                    today_count[1] = values[5] + values[6] + values[7] + values[8] + values[9]
-            else:
-                day = now - timedelta(days=i)
-                dates.append(day.date().isoformat())
-                keys = ['asia_total','eu_total','na_total','ru_total','cn_total','asia_error','eu_error','na_error','ru_error','cn_error']
-                values = await RedisClient.get_by_pipe(f"metrics:http:{day.date().isoformat()}:key", keys)
-                if values['code'] != 1000:
-                    values = [None * 10]
-                else:
-                    values = values['data']
-                j = 0
-                for count in values:
-                    if count != None:
-                        if j > 4:
-                            counts[j].append(0 if values[j-5] == 0 else round(count/values[j-5],1))
-                        else:
-                            counts[j].append(count)
+        for i in range(len(dates)):
+            day_values = values[i*size:(i+1)*size]
+            j = 0
+            for count in day_values:
+                if count != None:
+                    if j > 4:
+                        counts[j].append(0 if day_values[j-5] == 0 else round(count/day_values[j-5],1))
                     else:
-                        counts[j].append(None)
-                    j += 1
+                        counts[j].append(count)
+                else:
+                    counts[j].append(None)
+                j += 1
         return today_count, {
             "keys": dates,
             "series":[
@@ -7,18 +7,20 @@ from typing import Optional
 from fastapi import FastAPI, Request, HTTPException, Security
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.gzip import GZipMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from starlette.responses import StreamingResponse
 
-from app.response import JSONResponse
+from app.response import JSONResponse, RawJSONResponse
 from app.schemas import Region, Platform, AuthResponse, ACResponse
 from app.core import EnvConfig, api_logger
-from app.utils import TimeUtils, GameUtils
+from app.utils import TimeUtils, GameUtils, ReferenceData, NameUtils
 from app.loggers import CSVWriter, log_queue
-from app.database import MysqlConnection
+from app.database import MysqlConnection, QueryProfiler
 from app.health import HealthManager, ServiceMetrics
+from app.network import HttpClientPool
 from app.apis.robot import BindAPI, TokenAPI
 from app.apis.platform import StatusAPI
+from app.apis.statistics import StatsExecutor
 from app.middlewares import (
     IPAccessListManager, 
     RedisConnection,
@@ -65,6 +67,13 @@ def csv_writer_thread():
     api_logger.info('The log writing thread has exited.')
 
 
+async def stop_task(task: asyncio.Task) -> None:
+    "取消后台任务并等待其退出"
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+
 # ------------------------------------------------------
 # 应用程序的生命周期管理
 # 功能逻辑：
@@ -82,14 +91,36 @@ async def lifespan(app: FastAPI):
     writer_thread.start()
     # 初始化mysql并测试mysql连接
     await MysqlConnection.test_mysql()
+    # 启动从库复制延迟的定期检测(未配置从库时直接退出)
+    replica_task = asyncio.create_task(MysqlConnection.replica_monitor_loop())
+    # 启动未释放连接的定期检查
+    leak_task = asyncio.create_task(MysqlConnection.leak_monitor_loop())
     # 初始化并测试redis连接
     await RedisConnection.test_redis()
+    # 初始化外部API的连接池
+    HttpClientPool.init_clients()
+    # 加载船只数据等静态数据
+    ReferenceData.load_all()
+    # 提前构建船只名称索引，第一次搜索时不需要等待
+    await asyncio.to_thread(NameUtils.load_name_indexes)
+    # 启动统计数据计算的进程池
+    await StatsExecutor.init_pool()
+    # 启动指标计数的定期写入
+    metrics_task = asyncio.create_task(ServiceMetrics.flush_loop())
     # 启动 lifespan
     try:
         yield
     finally:
+        # 先停止定期写入，再把剩余的计数写入redis
+        await stop_task(metrics_task)
+        await ServiceMetrics.flush()
+        await stop_task(replica_task)
+        await stop_task(leak_task)
         await MysqlConnection.close_mysql()
+        QueryProfiler.close()
         await RedisConnection.close_redis()
+        await HttpClientPool.close_clients()
+        StatsExecutor.close_pool()
         # 发送退出信号，等待剩下数据写入并退出线程
         log_queue.put(None)
         writer_thread.join()
@@ -100,7 +131,7 @@ async def lifespan(app: FastAPI):
 # 初始化模板
 templates = Jinja2Templates(directory="app/templates")
 # 加载APP
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=RawJSONResponse)
 
 app.add_middleware(
     GZipMiddleware,
@@ -1,11 +1,14 @@
-import json
+import gzip
+import base64
 from typing import Optional
+from contextlib import asynccontextmanager
 import redis.asyncio as redis
-from redis.asyncio.client import Redis
+from redis.asyncio.client import Redis, Pipeline
 
 from app.loggers import ExceptionLogger
 from app.response import JSONResponse
 from app.core import EnvConfig, api_logger
+from app.utils import JsonCodec
 
 
 class RedisConnection:
@@ -79,6 +82,20 @@ class RedisConnection:
             api_logger.error(e)
             return None
         
+class RedisPipeline:
+    '''RedisClient.pipeline返回的对象
+
+    命令直接调用redis的Pipeline，退出async with时一次发送，
+    result为JSONResponse格式，data为各命令的返回值列表
+    '''
+    def __init__(self, pipe: Pipeline):
+        self.pipe = pipe
+        self.result: Optional[dict] = None
+
+    def __getattr__(self, name: str):
+        return getattr(self.pipe, name)
+
+
 class RedisClient:
     @staticmethod
     @ExceptionLogger.handle_cache_exception_async
@@ -86,22 +103,67 @@ class RedisClient:
         redis_client = RedisConnection.get_connection()
         data = await redis_client.get(key)
         if data:
-            data = json.loads(data)
+            data = JsonCodec.loads(data)
         return JSONResponse.get_success_response(data)
-    
+
     @staticmethod
     @ExceptionLogger.handle_cache_exception_async
-    async def get_by_pipe(redis_key: str, keys: list) -> dict:
-        """用于统计api相关指标"""
+    async def mget(keys: list) -> dict:
+        """一次MGET读取多个key的原始值，data和keys顺序一致，不存在的key为None"""
         redis_client = RedisConnection.get_connection()
-        data = []
-        pipe = redis_client.pipeline()
-        for key in keys:
-            pipe.get(redis_key.replace('key', key))
-        values = await pipe.execute()
-        for v in values:
-            data.append(int(v) if v else 0)
+        data = await redis_client.mget(keys) if keys else []
         return JSONResponse.get_success_response(data)
+
+    @staticmethod
+    @ExceptionLogger.handle_cache_exception_async
+    async def get_many(keys: list) -> dict:
+        """批量读取set写入的数据，data为{key: value}，不存在的key为None"""
+        redis_client = RedisConnection.get_connection()
+        values = await redis_client.mget(keys) if keys else []
+        data = {
+            key: JsonCodec.loads(value) if value else None
+            for key, value in zip(keys, values)
+        }
+        return JSONResponse.get_success_response(data)
+
+    @staticmethod
+    @ExceptionLogger.handle_cache_exception_async
+    async def set_many(values: dict, ex: int | dict = None) -> dict:
+        """通过pipeline批量写入，ex为统一的过期时间，或者{key: 过期时间}"""
+        redis_client = RedisConnection.get_connection()
+        pipe = redis_client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.set(
+                name=key,
+                value=JsonCodec.dumps(value),
+                ex=ex.get(key) if isinstance(ex, dict) else ex
+            )
+        await pipe.execute()
+        return JSONResponse.API_1000_Success
+
+    @staticmethod
+    @ExceptionLogger.handle_cache_exception_async
+    async def execute_pipeline(pipe: Pipeline) -> dict:
+        data = await pipe.execute()
+        return JSONResponse.get_success_response(data)
+
+    @staticmethod
+    @asynccontextmanager
+    async def pipeline(transaction: bool = False):
+        """pipeline的上下文管理器，用法：
+
+            async with RedisClient.pipeline() as pipe:
+                pipe.get(key)
+                pipe.mget(keys)
+            if pipe.result['code'] == 1000:
+                value, values = pipe.result['data']
+
+        块内抛出异常时不发送任何命令
+        """
+        redis_client = RedisConnection.get_connection()
+        pipe = RedisPipeline(redis_client.pipeline(transaction=transaction))
+        yield pipe
+        pipe.result = await RedisClient.execute_pipeline(pipe.pipe)
     
     @staticmethod
     @ExceptionLogger.handle_cache_exception_async
@@ -115,6 +177,20 @@ class RedisClient:
         redis_client = RedisConnection.get_connection()
         await redis_client.incrby(key, amount)
     
+    @staticmethod
+    @ExceptionLogger.handle_cache_exception_async
+    async def incr_many(values: dict, ex: int | dict = None) -> dict:
+        """通过pipeline批量增加多个key的值，ex为统一的过期时间，或者{key: 过期时间}"""
+        redis_client = RedisConnection.get_connection()
+        pipe = redis_client.pipeline(transaction=False)
+        for key, amount in values.items():
+            pipe.incrby(key, amount)
+            ttl = ex.get(key) if isinstance(ex, dict) else ex
+            if ttl:
+                pipe.expire(key, ttl)
+        await pipe.execute()
+        return JSONResponse.API_1000_Success
+
     @staticmethod
     @ExceptionLogger.handle_cache_exception_async
     async def exists(key: str) -> dict:
@@ -135,7 +211,30 @@ class RedisClient:
         redis_client = RedisConnection.get_connection()
         await redis_client.set(
             name=key, 
-            value=json.dumps(value),
+            value=JsonCodec.dumps(value),
             ex=ex
         )
-        return JSONResponse.API_1000_Success
\ No newline at end of file
+        return JSONResponse.API_1000_Success
+
+    @staticmethod
+    @ExceptionLogger.handle_cache_exception_async
+    async def get_compressed(key: str) -> dict:
+        """读取gzip压缩后存储的数据"""
+        redis_client = RedisConnection.get_connection()
+        data = await redis_client.get(key)
+        if data:
+            data = JsonCodec.loads(gzip.decompress(base64.b64decode(data)))
+        return JSONResponse.get_success_response(data)
+
+    @staticmethod
+    @ExceptionLogger.handle_cache_exception_async
+    async def set_compressed(key: str, value: dict, ex: int = None):
+        """gzip压缩后写入，连接开启了decode_responses，所以需要base64编码"""
+        redis_client = RedisConnection.get_connection()
+        data = gzip.compress(JsonCodec.dumpb(value), compresslevel=5)
+        await redis_client.set(
+            name=key,
+            value=base64.b64encode(data).decode('ascii'),
+            ex=ex
+        )
+        return JSONResponse.API_1000_Success
@@ -1,3 +1,4 @@
+from .cache import ReadCache
 from .platform import PlatformModel
 from .game import GameModel
 from .bind import BotUserModel
@@ -6,6 +7,7 @@ from .recent import RecentModel
 from .premium import PremiumModel
 
 __all__ = [
+    'ReadCache',
     'PlatformModel',
     'GameModel',
     'BotUserModel',
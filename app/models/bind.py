@@ -6,11 +6,25 @@ from app.loggers import ExceptionLogger
 from app.response import JSONResponse
 from app.utils import GameUtils, TimeUtils
 from app.constants import Limits
+from .cache import ReadCache
 
 
 class BotUserModel:
-    @ExceptionLogger.handle_database_exception_async
+    async def invalidate_cache(platform: str, platform_user_id: str):
+        "绑定数据修改后删除相关的缓存"
+        for kind in ['bind', 'bind_list', 'premium']:
+            await ReadCache.invalidate(kind, platform, platform_user_id)
+
     async def get_user_bind(platform: str, platform_user_id: str):
+        "读取用户绑定的账号，优先读取缓存"
+        return await ReadCache.load(
+            'bind',
+            (platform, platform_user_id),
+            lambda: BotUserModel.query_user_bind(platform, platform_user_id)
+        )
+
+    @ExceptionLogger.handle_database_exception_async
+    async def query_user_bind(platform: str, platform_user_id: str):
         '''
         从数据库中读取用户的绑定的账号
 
@@ -19,39 +33,32 @@ class BotUserModel:
             user_id: 用户id
         '''
         try:
-            connection: Connection = await MysqlConnection.get_connection()
-            await connection.begin()
+            # 查询结果会写入缓存，不使用从库，避免缓存修改前的旧数据
+            connection: Connection = await MysqlConnection.get_read_connection(allow_replica=False)
             cursor: Cursor = await connection.cursor()
 
             platform_id = GameUtils.get_platform_id(platform) 
+            # 绑定索引和当前绑定的账号一次查询读取
             sql = """
                 SELECT 
-                    current_id 
-                FROM bind_idx 
-                WHERE platform_id = %s 
-                  AND platform_user_id = %s;
+                    i.current_id, 
+                    b.region_id, 
+                    b.account_id, 
+                    b.username, 
+                    UNIX_TIMESTAMP(b.register_time), 
+                    b.insignias 
+                FROM bind_idx AS i 
+                LEFT JOIN user_base AS b 
+                    ON b.id = i.current_id 
+                WHERE i.platform_id = %s 
+                  AND i.platform_user_id = %s;
             """
             await cursor.execute(
                 sql,[platform_id, platform_user_id]
             )
             user = await cursor.fetchone()
             if user and user[0] != None:
-                current_id = user[0]
-                sql = """
-                    SELECT 
-                        region_id, 
-                        account_id, 
-                        username, 
-                        UNIX_TIMESTAMP(register_time), 
-                        insignias 
-                    FROM user_base 
-                    WHERE id = %s;
-                """
-                await cursor.execute(
-                    sql,[current_id]
-                )
-                result = await cursor.fetchone()
-                if result is None:
+                if user[1] is None:
                     # 正常来说，用户绑定后该账号数据一定存在于数据库
                     # 但是保险起见，还是在此抛出error
                     return JSONResponse.get_error_response(
@@ -60,26 +67,30 @@ class BotUserModel:
                     )
                 else:
                     data = {
-                        'region': GameUtils.get_region(result[0]),
-                        'account_id': result[1],
-                        'username': result[2],
-                        'register_time': result[3],
-                        'insignias': result[4]
+                        'region': GameUtils.get_region(user[1]),
+                        'account_id': user[2],
+                        'username': user[3],
+                        'register_time': user[4],
+                        'insignias': user[5]
                     }
             else:
                 data = None
 
-            await connection.commit()
             return JSONResponse.get_success_response(data)
-        except Exception as e:
-            await connection.rollback()
-            raise e
         finally:
             await cursor.close()
-            await MysqlConnection.release_connection(connection)
+            await MysqlConnection.release_read_connection(connection)
     
-    @ExceptionLogger.handle_database_exception_async
     async def get_user_bind_list(platform: str, platform_user_id: str):
+        "读取用户的绑定的账号列表，优先读取缓存"
+        return await ReadCache.load(
+            'bind_list',
+            (platform, platform_user_id),
+            lambda: BotUserModel.query_user_bind_list(platform, platform_user_id)
+        )
+
+    @ExceptionLogger.handle_database_exception_async
+    async def query_user_bind_list(platform: str, platform_user_id: str):
         '''
         从数据库中读取用户的绑定的账号列表
 
@@ -88,8 +99,8 @@ class BotUserModel:
             platform_user_id: 用户id
         '''
         try:
-            connection: Connection = await MysqlConnection.get_connection()
-            await connection.begin()
+            # 查询结果会写入缓存，不使用从库，避免缓存修改前的旧数据
+            connection: Connection = await MysqlConnection.get_read_connection(allow_replica=False)
             cursor: Cursor = await connection.cursor()
 
             platform_id = GameUtils.get_platform_id(platform) 
@@ -142,14 +153,10 @@ class BotUserModel:
             else:
                 data = None
 
-            await connection.commit()
             return JSONResponse.get_success_response(data)
-        except Exception as e:
-            await connection.rollback()
-            raise e
         finally:
             await cursor.close()
-            await MysqlConnection.release_connection(connection)
+            await MysqlConnection.release_read_connection(connection)
 
     @ExceptionLogger.handle_database_exception_async
     async def del_user_bind(platform: str, platform_user_id: str, del_index: int):
@@ -225,9 +232,11 @@ class BotUserModel:
                     sql,[platform_id, platform_user_id]
                 )
                 await connection.commit()
+                await BotUserModel.invalidate_cache(platform, platform_user_id)
                 return JSONResponse.API_2012_CurrentBindingBeDeleted
 
             await connection.commit()
+            await BotUserModel.invalidate_cache(platform, platform_user_id)
             return JSONResponse.API_1000_Success
         except Exception as e:
             await connection.rollback()
@@ -314,6 +323,7 @@ class BotUserModel:
             }
 
             await connection.commit()
+            await BotUserModel.invalidate_cache(platform, platform_user_id)
             return JSONResponse.get_success_response(data)
         except Exception as e:
             await connection.rollback()
@@ -452,6 +462,7 @@ class BotUserModel:
                     )
 
             await connection.commit()
+            await BotUserModel.invalidate_cache(platform, platform_user_id)
             return data
         except Exception as e:
             await connection.rollback()
@@ -460,8 +471,16 @@ class BotUserModel:
             await cursor.close()
             await MysqlConnection.release_connection(connection)
 
-    @ExceptionLogger.handle_database_exception_async
     async def premium_status(platform: str, platform_user_id: str):
+        "读取用户的会员信息，优先读取缓存"
+        return await ReadCache.load(
+            'premium',
+            (platform, platform_user_id),
+            lambda: BotUserModel.query_premium_status(platform, platform_user_id)
+        )
+
+    @ExceptionLogger.handle_database_exception_async
+    async def query_premium_status(platform: str, platform_user_id: str):
         '''
         从数据库中读取用户的会员信息
 
@@ -470,8 +489,8 @@ class BotUserModel:
             user_id: 用户id
         '''
         try:
-            connection: Connection = await MysqlConnection.get_connection()
-            await connection.begin()
+            # 查询结果会写入缓存，不使用从库，避免缓存修改前的旧数据
+            connection: Connection = await MysqlConnection.get_read_connection(allow_replica=False)
             cursor: Cursor = await connection.cursor()
 
             platform_id = GameUtils.get_platform_id(platform) 
@@ -490,7 +509,6 @@ class BotUserModel:
             )
             user = await cursor.fetchone()
             if user is None:
-                await connection.commit()
                 return JSONResponse.MySQL_4104_DataNotFoundError
             if user[1] and user[1] > TimeUtils.timestamp():
                 user_id = user[0]
@@ -531,11 +549,7 @@ class BotUserModel:
             else:
                 data = None
 
-            await connection.commit()
             return JSONResponse.get_success_response(data)
-        except Exception as e:
-            await connection.rollback()
-            raise e
         finally:
             await cursor.close()
-            await MysqlConnection.release_connection(connection)
\ No newline at end of file
+            await MysqlConnection.release_read_connection(connection)
\ No newline at end of file
@@ -0,0 +1,92 @@
+import random
+import asyncio
+from typing import Awaitable, Callable
+
+from app.core import EnvConfig
+from app.middlewares import RedisClient
+from app.utils import CallGroup
+
+
+class ReadCache:
+    '''数据库只读查询的缓存(read-through)
+
+    功能逻辑：
+    1. 先读redis，未命中时查询数据库并写入，值为完整的返回值，data为None的结果同样缓存(负缓存)
+    2. 负缓存使用更短的过期时间，过期时间带10%的随机抖动，避免大量key同时过期
+    3. 同一个key同时只有一个查询访问数据库，其余调用者等待并共享结果，查询在单独的task中执行，某个调用者被取消不影响其他调用者
+    4. 数据库写入后调用invalidate删除缓存，删除时正在进行的查询结果不再写入缓存
+    5. redis异常时直接查询数据库
+    '''
+    # 可以缓存的返回值，4104为数据不存在
+    CACHEABLE_CODES = (1000, 4104)
+    _calls = CallGroup()
+    # 查询期间被invalidate的key
+    _dirty: set[str] = set()
+    _stats: dict[str, dict] = {}
+
+    @staticmethod
+    def get_key(kind: str, *args) -> str:
+        return ':'.join(['cache:db', kind, *map(str, args)])
+
+    @classmethod
+    def _count(cls, kind: str, name: str) -> None:
+        if kind not in cls._stats:
+            cls._stats[kind] = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'merged': 0, 'invalidations': 0}
+        cls._stats[kind][name] += 1
+
+    @classmethod
+    async def load(cls, kind: str, args: tuple, loader: Callable[[], Awaitable[dict]]) -> dict:
+        '''读取缓存，未命中时调用loader查询数据库
+
+        参数：
+            kind: 数据类型，例如 bind / bind_list / premium / brief
+            args: 组成key的参数
+            loader: 查询数据库的协程函数，返回值为JSONResponse格式的dict
+        '''
+        config = EnvConfig.get_config()
+        if not config.READ_CACHE_ENABLED:
+            return await loader()
+        key = cls.get_key(kind, *args)
+        cached = await RedisClient.get(key)
+        if cached['code'] == 1000 and cached['data'] is not None:
+            cls._count(kind, 'hits' if cached['data']['data'] is not None else 'negative_hits')
+            return cached['data']
+        task, merged = cls._calls.join(key, lambda: cls._fill(key, loader))
+        cls._count(kind, 'merged' if merged else 'misses')
+        # shield避免某个调用者被取消时取消查询本身
+        return await asyncio.shield(task)
+
+    @classmethod
+    async def _fill(cls, key: str, loader: Callable[[], Awaitable[dict]]) -> dict:
+        "查询数据库并写入缓存"
+        config = EnvConfig.get_config()
+        try:
+            result = await loader()
+            if key in cls._dirty:
+                # 查询期间数据被修改，结果可能是旧数据
+                return result
+            if result['code'] in cls.CACHEABLE_CODES:
+                ttl = config.READ_CACHE_TTL if result['data'] is not None else config.READ_CACHE_NEGATIVE_TTL
+                await RedisClient.set(key, result, int(ttl * random.uniform(0.9, 1.1)) or 1)
+            return result
+        finally:
+            cls._dirty.discard(key)
+
+    @classmethod
+    async def invalidate(cls, kind: str, *args) -> None:
+        "数据库写入后删除缓存"
+        key = cls.get_key(kind, *args)
+        if key in cls._calls:
+            cls._dirty.add(key)
+        cls._count(kind, 'invalidations')
+        await RedisClient.drop(key)
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        "获取各类型的缓存命中率"
+        result = {}
+        for kind, stats in cls._stats.items():
+            total = stats['hits'] + stats['negative_hits'] + stats['misses'] + stats['merged']
+            result[kind] = dict(stats)
+            result[kind]['hit_ratio'] = 0 if total == 0 else round((total - stats['misses']) / total, 4)
+        return result
@@ -14,8 +14,7 @@ class GameModel:
         获取数据库中存储的游戏版本
         '''
         try:
-            conn: Connection = await MysqlConnection.get_connection()
-            await conn.begin()
+            conn: Connection = await MysqlConnection.get_read_connection()
             cur: Cursor = await conn.cursor()
 
             region_id = GameUtils.get_region_id(region)
@@ -32,14 +31,10 @@ class GameModel:
             game = await cur.fetchone()
             data['version'] = game[0]
 
-            await conn.commit()
             return JSONResponse.get_success_response(data)
-        except Exception as e:
-            await conn.rollback()
-            raise e
         finally:
             await cur.close()
-            await MysqlConnection.release_connection(conn)
+            await MysqlConnection.release_read_connection(conn)
 
     @ExceptionLogger.handle_database_exception_async
     async def update_game_version(region: str, game_version: str):
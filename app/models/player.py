@@ -6,10 +6,51 @@ from app.loggers import ExceptionLogger
 from app.response import JSONResponse
 from app.schemas import UserBasicData
 from app.utils import GameUtils
+from .cache import ReadCache
+
+
+# 批量写入用户时每条INSERT的最大行数
+PROVISION_BATCH_SIZE = 1000
 
 
 class PlatyerModel:
 
+    async def insert_users(cur: Cursor, region_id: int, users: dict[int, str]) -> int:
+        '''
+        在调用方的事务中写入新用户，已存在的用户跳过
+
+        每张表每PROVISION_BATCH_SIZE个用户一条多行INSERT IGNORE，返回user_base中新写入的行数
+
+        参数：
+            region_id: 服务器id
+            users: {account_id: username}
+        '''
+        inserted = 0
+        account_ids = list(users.keys())
+        for offset in range(0, len(account_ids), PROVISION_BATCH_SIZE):
+            batch = account_ids[offset:offset+PROVISION_BATCH_SIZE]
+            placeholders = ", ".join(["(%s, %s, %s)"] * len(batch))
+            sql = f"""
+                INSERT IGNORE INTO user_base (
+                    region_id, 
+                    account_id, 
+                    username
+                ) VALUES {placeholders};
+            """
+            params = []
+            for account_id in batch:
+                params += [region_id, account_id, users[account_id]]
+            inserted += await cur.execute(sql, params)
+            placeholders = ", ".join(["(%s)"] * len(batch))
+            for table in ['user_stats', 'user_clan', 'user_cache']:
+                sql = f"""
+                    INSERT IGNORE INTO {table} (
+                        account_id
+                    ) VALUES {placeholders};
+                """
+                await cur.execute(sql, batch)
+        return inserted
+
     @ExceptionLogger.handle_database_exception_async
     async def check_base(region_id: int, account_id: int, username: str = None):
         '''
@@ -32,61 +73,9 @@ class PlatyerModel:
             )
             result = await cur.fetchone()
             if result is None:
-                default_name = GameUtils.get_user_default_name(account_id)
-                sql = """
-                    INSERT INTO user_base (
-                        region_id, 
-                        account_id, 
-                        username
-                    ) VALUES (
-                        %s, %s, %s
-                    );
-                """
-                await cur.execute(
-                    sql,[region_id, account_id, default_name]
-                )
-                sql = """
-                    INSERT INTO user_stats (
-                        account_id
-                    ) VALUES (
-                        %s
-                    );
-                """
-                await cur.execute(
-                    sql,[account_id]
-                )
-                sql = """
-                    INSERT INTO user_clan (
-                        account_id
-                    ) VALUES (
-                        %s
-                    );
-                """
-                await cur.execute(
-                    sql,[account_id]
-                )
-                sql = """
-                    INSERT INTO user_cache (
-                        account_id
-                    ) VALUES (
-                        %s
-                    );
-                """
-                await cur.execute(
-                    sql,[account_id]
+                await PlatyerModel.insert_users(
+                    cur, region_id, {account_id: username or GameUtils.get_user_default_name(account_id)}
                 )
-                result = [default_name, None]
-                if username:
-                    sql = """
-                        UPDATE user_base 
-                        SET 
-                            username = %s
-                        WHERE region_id = %s 
-                          AND account_id = %s;
-                    """
-                    await cur.execute(
-                        sql,[username, region_id, account_id]
-                    )
 
             await conn.commit()
             return JSONResponse.API_1000_Success
@@ -97,20 +86,30 @@ class PlatyerModel:
             await cur.close()
             await MysqlConnection.release_connection(conn)
 
-    @ExceptionLogger.handle_database_exception_async
     async def get_user_brief(region_id: int, account_id: int):
+        "读取用户的基本数据，优先读取缓存"
+        return await ReadCache.load(
+            'brief',
+            (region_id, account_id),
+            lambda: PlatyerModel.query_user_brief(region_id, account_id)
+        )
+
+    @ExceptionLogger.handle_database_exception_async
+    async def query_user_brief(region_id: int, account_id: int):
         '''
         从数据库中获取用户的基本数据，如果玩家或者工会的缓存数据不存在则返回none
 
         用户数据为空或者隐藏战绩也返回none
 
+        用户、用户所在工会和工会数据通过一次关联查询读取
+
         参数：
             account_id: 用户id
             region_id: 服务器id
         '''
         try:
-            conn: Connection = await MysqlConnection.get_connection()
-            await conn.begin()
+            # 查询结果会写入缓存，不使用从库，避免缓存修改前的旧数据
+            conn: Connection = await MysqlConnection.get_read_connection(allow_replica=False)
             cur: Cursor = await conn.cursor()
 
             data = {
@@ -132,10 +131,20 @@ class PlatyerModel:
                     UNIX_TIMESTAMP(b.touch_at) AS name_touch_time, 
                     i.is_enabled, 
                     i.is_public, 
-                    UNIX_TIMESTAMP(i.touch_at) AS info_touch_time 
+                    UNIX_TIMESTAMP(i.touch_at) AS info_touch_time, 
+                    c.clan_id, 
+                    UNIX_TIMESTAMP(c.touch_at) AS clan_touch_time, 
+                    n.clan_id AS clan_exists, 
+                    n.tag, 
+                    n.league 
                 FROM user_base as b 
                 LEFT JOIN user_stats as i 
                   ON b.account_id = i.account_id 
+                LEFT JOIN user_clan as c 
+                  ON b.account_id = c.account_id 
+                LEFT JOIN clan_base as n 
+                  ON n.region_id = b.region_id 
+                 AND n.clan_id = c.clan_id 
                 WHERE b.region_id = %s 
                   AND b.account_id = %s;
             """
@@ -152,53 +161,69 @@ class PlatyerModel:
                 result[6] is None
             ):
                 data = None
+            # 所在工会缓存数据不存在
+            elif result[8] is None:
+                data = None
+            # 工会数据不在数据库中
+            elif result[7] != None and result[9] is None:
+                data = None
             else:
                 data['username'] = result[0]
                 data['register_time'] = result[1]
                 data['insignias'] = result[2]
-                sql = """
-                    SELECT 
-                        clan_id, 
-                        UNIX_TIMESTAMP(touch_at) 
-                    FROM user_clan 
-                    WHERE account_id = %s;
-                """
-                await cur.execute(
-                    sql,[account_id]
-                )
-                result = await cur.fetchone()
-                # 所在工会缓存数据不存在
-                if result[1] is None:
-                    data = None
-                elif result[0] != None:
-                    data['clan_id'] = result[0]
-                    sql = """
-                        SELECT 
-                            tag, 
-                            league 
-                        FROM clan_base 
-                        WHERE region_id = %s 
-                          AND clan_id = %s;
-                    """
-                    await cur.execute(
-                        sql,[region_id, result[0]]
-                    )
-                    result = await cur.fetchone()
-                    # 判断工会数据是否在数据库中
-                    if result != None:
-                        data['clan_tag'] = result[0]
-                        data['clan_league'] = result[1]
-                    else:
-                        data = None
+                if result[7] != None:
+                    data['clan_id'] = result[7]
+                    data['clan_tag'] = result[10]
+                    data['clan_league'] = result[11]
 
-            await conn.commit()
             return JSONResponse.get_success_response(data)
-        except Exception as e:
-            await conn.rollback()
-            raise e
         finally:
             await cur.close()
-            await MysqlConnection.release_connection(conn)
+            await MysqlConnection.release_read_connection(conn)
+
+    @ExceptionLogger.handle_database_exception_async
+    async def get_user_battles(region_id: int, account_id: int):
+        '''
+        从数据库中获取用户的场次数据，用于校验缓存是否过期
+
+        数据库中没有记录则返回none
+
+        参数：
+            account_id: 用户id
+            region_id: 服务器id
+        '''
+        try:
+            conn: Connection = await MysqlConnection.get_read_connection()
+            cur: Cursor = await conn.cursor()
+
+            data = None
+            sql = """
+                SELECT
+                    s.total_battles,
+                    s.pvp_battles,
+                    s.ranked_battles
+                FROM user_base as b
+                LEFT JOIN user_stats as s
+                  ON b.account_id = s.account_id
+                WHERE b.region_id = %s
+                  AND b.account_id = %s
+                  AND s.touch_at IS NOT NULL;
+            """
+            await cur.execute(
+                sql,[region_id, account_id]
+            )
+            result = await cur.fetchone()
+            if result != None:
+                data = {
+                    'total_battles': result[0],
+                    'pvp_battles': result[1],
+                    'ranked_battles': result[2]
+                }
+
+            return JSONResponse.get_success_response(data)
+        finally:
+            await cur.close()
+            await MysqlConnection.release_read_connection(conn)
 
     @ExceptionLogger.handle_database_exception_async
     async def refresh_base(data: UserBasicData):
@@ -226,48 +251,7 @@ class PlatyerModel:
             result = await cur.fetchone()
             if result is None:
                 default_name = GameUtils.get_user_default_name(data.account_id)
-                sql = """
-                    INSERT INTO user_base (
-                        region_id, 
-                        account_id, 
-                        username
-                    ) VALUES (
-                        %s, %s, %s
-                    );
-                """
-                await cur.execute(
-                    sql,[data.region_id, data.account_id, default_name]
-                )
-                sql = """
-                    INSERT INTO user_stats (
-                        account_id
-                    ) VALUES (
-                        %s
-                    );
-                """
-                await cur.execute(
-                    sql,[data.account_id]
-                )
-                sql = """
-                    INSERT INTO user_clan (
-                        account_id
-                    ) VALUES (
-                        %s
-                    );
-                """
-                await cur.execute(
-                    sql,[data.account_id]
-                )
-                sql = """
-                    INSERT INTO user_cache (
-                        account_id
-                    ) VALUES (
-                        %s
-                    );
-                """
-                await cur.execute(
-                    sql,[data.account_id]
-                )
+                await PlatyerModel.insert_users(cur, data.region_id, {data.account_id: default_name})
                 result = [default_name, None]
             if data.is_enabled == 0:
                 sql = """
@@ -427,6 +411,7 @@ class PlatyerModel:
                     )
 
             await conn.commit()
+            await ReadCache.invalidate('brief', data.region_id, data.account_id)
             return JSONResponse.get_success_response(data)
         except Exception as e:
             await conn.rollback()
@@ -5,6 +5,7 @@ from app.database import MysqlConnection
 from app.loggers import ExceptionLogger
 from app.response import JSONResponse
 from app.utils import StringUtils, GameUtils, TimeUtils
+from .cache import ReadCache
 
 
 class PremiumModel:
@@ -175,6 +176,7 @@ class PremiumModel:
             }
             
             await connection.commit()
+            await ReadCache.invalidate('premium', platform, platform_user_id)
             return JSONResponse.get_success_response(result)
         except Exception as e:
             await connection.rollback()
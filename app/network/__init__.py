@@ -1,5 +1,15 @@
 from .api import ExternalAPI
+from .pool import HttpClientPool
+from .flight import SingleFlight
+from .limiter import UpstreamLimiter
+from .breaker import CircuitBreaker
+from .cache import ResponseCache
 
 __all__ = [
-    'ExternalAPI'
+    'ExternalAPI',
+    'HttpClientPool',
+    'SingleFlight',
+    'UpstreamLimiter',
+    'CircuitBreaker',
+    'ResponseCache'
 ]
\ No newline at end of file
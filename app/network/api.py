@@ -1,10 +1,13 @@
 import asyncio
+import hashlib
 
 from .endpoints import VORTEX_API_ENDPOINTS, CLAN_API_ENDPOINTS, OFFICIAL_API_ENDPOINTS
 from .client import HttpClient
+from .cache import ResponseCache
+from .decoder import SHIPS_PVP_KEYS
 from .response import JSONResponse
 from app.loggers import ExceptionLogger
-from app.utils import JsonUtils, GameUtils, TimeUtils
+from app.utils import JsonUtils, JsonCodec, GameUtils, TimeUtils
 from app.constants import ClanColor
 from app.models import PlatyerModel
 from app.health import ServiceMetrics
@@ -39,6 +42,8 @@ class ExternalAPI:
     '''
     对外部的接口
     '''
+    # 上次处理的vehicles数据中每艘船的hash，只对比有变化的船只
+    _vehicles_hashes: dict[str, dict[str, bytes]] = {}
     @staticmethod
     @ExceptionLogger.handle_program_exception_async
     async def get_user_search(region: str, nickname: str, limit: int = 10):
@@ -177,20 +182,25 @@ class ExternalAPI:
         new_data = result['data']
         if new_data == {} or new_data == None:
             return JSONResponse.API_3008_VehiclesDataLoadFailed
-            # 加载旧数据
+        new_hashes = {
+            ship_id: hashlib.sha256(JsonCodec.dumpb(ship_data)).digest()
+            for ship_id, ship_data in new_data.items()
+        }
+        old_hashes = ExternalAPI._vehicles_hashes.get(server, {})
+        if new_hashes == old_hashes:
+            return JSONResponse.API_3009_NoVehiclesChangesFound
+        # 加载旧数据(需要修改，所以直接读取文件而不是使用只读的缓存数据)
         old_data = JsonUtils.read(f'ship_name_{server}')
         # 记录本次更新的变化
         diff_result = {'add':{},'del':{},'change':{}}
         # 去除已经删除的船只
-        for ship_id, ship_data in old_data.items():
-            if ship_id not in new_data:
-                diff_result['del'][ship_id] = ship_data
-            else:
-                pass
-        for ship_id, _ in diff_result['del'].items():
-            del old_data[ship_id]
-        # 加入新增的船只
-        for ship_id, ship_data in new_data.items():
+        for ship_id in [ship_id for ship_id in old_data if ship_id not in new_data]:
+            diff_result['del'][ship_id] = old_data.pop(ship_id)
+        # 只处理上次处理之后新增或者内容有变化的船只
+        for ship_id, new_hash in new_hashes.items():
+            if old_hashes.get(ship_id) == new_hash and ship_id in old_data:
+                continue
+            ship_data = new_data[ship_id]
             if ship_id not in old_data:
                 if server == 'wg':
                     tier = ship_data['level']
@@ -273,9 +283,11 @@ class ExternalAPI:
                     diff_result['change'][ship_id] = old_data[ship_id]
         # 更新json文件
         if diff_result['add']=={} and diff_result['del']=={} and diff_result['change']=={}:
+            ExternalAPI._vehicles_hashes[server] = new_hashes
             return JSONResponse.API_3009_NoVehiclesChangesFound
         else:
             JsonUtils.write(f'ship_name_{server}', old_data)
+            ExternalAPI._vehicles_hashes[server] = new_hashes
         # 返回数据
         return JSONResponse.get_success_response(diff_result)
         
@@ -868,7 +880,19 @@ class ExternalAPI:
         
     @staticmethod
     @ExceptionLogger.handle_program_exception_async
-    async def get_user_pvp(region: str, account_id: int, ac1: str = None, field: str = 'pvp', include_old: bool = True):
+    async def get_user_pvp(
+        region: str,
+        account_id: int,
+        ac1: str = None,
+        field: str = 'pvp',
+        include_old: bool = True,
+        battles_result: dict = None
+    ):
+        '''获取用户的船只数据并处理
+
+        参数:
+            battles_result: PlatyerModel.get_user_battles的返回值，调用方已经读取过时传入，避免重复查询
+        '''
         base_url = VORTEX_API_ENDPOINTS[region]
         if field == 'pvp':
             urls = [
@@ -882,18 +906,43 @@ class ExternalAPI:
                 f'{base_url}/api/accounts/{account_id}/ships/{field}/' + (f'?ac={ac1}' if ac1 else '')
             ]
             fields = [field]
-        tasks = []
-        responses = []
-        async with asyncio.Semaphore(len(urls)):
-            for url in urls:
-                tasks.append(HttpClient.get_user_data(url))
-            responses = await asyncio.gather(*tasks)
-        now_time = TimeUtils.now_iso()
-        await ServiceMetrics.http_incrby(region, now_time[:10], len(urls))
-        error_count, error_return = varify_responses(responses)
-        if error_count != None:
-            await ServiceMetrics.http_error_incrby(region, now_time[:10], error_count)
-            return error_return
+        # 读取数据库中的场次用于校验缓存
+        result = battles_result
+        if result is None:
+            result = await PlatyerModel.get_user_battles(GameUtils.get_region_id(region), account_id)
+        if result['code'] != 1000:
+            return result
+        battles = result['data']['pvp_battles'] if result['data'] else None
+        responses = [None] * len(urls)
+        missing = []
+        for index, field_name in enumerate(fields):
+            cache_data = None
+            if battles is not None:
+                cache_data = await ResponseCache.get(region, account_id, field_name, ac1 != None, battles)
+            if cache_data is None:
+                missing.append(index)
+            else:
+                responses[index] = JSONResponse.get_success_response(cache_data)
+        if missing != []:
+            # 只有写入缓存时才裁剪字段，裁剪后序列化和压缩的数据更小；不写入缓存时直接解析更快
+            cacheable = battles is not None and EnvConfig.get_config().RESPONSE_CACHE_ENABLED
+            keys = SHIPS_PVP_KEYS if cacheable else None
+            tasks = []
+            async with asyncio.Semaphore(len(missing)):
+                for index in missing:
+                    tasks.append(HttpClient.get_user_data(urls[index], keys))
+                fetched = await asyncio.gather(*tasks)
+            now_time = TimeUtils.now_iso()
+            await ServiceMetrics.http_incrby(region, now_time[:10], len(missing))
+            error_count, error_return = varify_responses(fetched)
+            if error_count != None:
+                await ServiceMetrics.http_error_incrby(region, now_time[:10], error_count)
+                return error_return
+            for index, response in zip(missing, fetched):
+                responses[index] = response
+                # 没有场次数据时无法校验，不写入缓存
+                if battles is not None and response['data']:
+                    await ResponseCache.set(region, account_id, fields[index], ac1 != None, response['data'], battles)
         data = []
         for response in responses:
             if response['data'] is None or response['data'][str(account_id)] == None:
@@ -924,18 +973,32 @@ class ExternalAPI:
             f'{base_url}/wows/clans/seasonstats/?application_id={api_token}&account_id={account_id}',
             f'{base_url}/wows/account/achievements/?application_id={api_token}&account_id={account_id}'
         ]
-        tasks = []
-        responses = []
-        async with asyncio.Semaphore(len(urls)):
-            for url in urls:
-                tasks.append(HttpClient.get_offical_user_data(url))
-            responses = await asyncio.gather(*tasks)
-        now_time = TimeUtils.now_iso()
-        await ServiceMetrics.http_incrby(region, now_time[:10], len(urls))
-        error_count, error_return = varify_responses(responses)
-        if error_count != None:
-            await ServiceMetrics.http_error_incrby(region, now_time[:10], error_count)
-            return error_return
+        endpoints = ['cb_seasons', 'cb_achievements']
+        responses = [None] * len(urls)
+        missing = []
+        for index, endpoint in enumerate(endpoints):
+            # 官方接口的数据没有可校验的场次，只依赖缓存时间
+            cache_data = await ResponseCache.get(region, account_id, endpoint, False)
+            if cache_data is None:
+                missing.append(index)
+            else:
+                responses[index] = JSONResponse.get_success_response(cache_data)
+        if missing != []:
+            tasks = []
+            async with asyncio.Semaphore(len(missing)):
+                for index in missing:
+                    tasks.append(HttpClient.get_offical_user_data(urls[index]))
+                fetched = await asyncio.gather(*tasks)
+            now_time = TimeUtils.now_iso()
+            await ServiceMetrics.http_incrby(region, now_time[:10], len(missing))
+            error_count, error_return = varify_responses(fetched)
+            if error_count != None:
+                await ServiceMetrics.http_error_incrby(region, now_time[:10], error_count)
+                return error_return
+            for index, response in zip(missing, fetched):
+                responses[index] = response
+                if response['data']:
+                    await ResponseCache.set(region, account_id, endpoints[index], False, response['data'])
         for response in responses:
             if response['data'] is None:
                 return JSONResponse.API_3012_FailedToFetchDataFromAPI
@@ -0,0 +1,124 @@
+import time
+from collections import deque
+
+from app.core import EnvConfig, api_logger
+
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# 视为上游故障的状态码
+# 500/503 不计入，国服的搜索接口会用这两个状态码表示不支持模糊搜索
+FAILURE_STATUS_CODES = [502, 504]
+
+
+class CircuitOpenError(Exception):
+    "熔断器处于打开状态，请求被直接拒绝"
+    pass
+
+
+class CircuitBreaker:
+    '''外部接口按host的熔断器
+
+    1. closed: 统计窗口内的错误率超过阈值后打开
+    2. open: 直接拒绝请求，等待CIRCUIT_OPEN_SECONDS后进入半开
+    3. half_open: 只放行少量试探请求，成功则关闭，失败则重新打开
+    '''
+    _circuits: dict[str, dict] = {}
+
+    @classmethod
+    def _get_circuit(cls, host: str) -> dict:
+        circuit = cls._circuits.get(host)
+        if circuit is None:
+            circuit = {
+                'state': STATE_CLOSED,
+                'records': deque(),  # (时间, 是否成功)
+                'opened_at': 0,
+                'trials': 0,         # 半开状态下进行中的试探请求
+                'open_count': 0,
+                'rejected': 0
+            }
+            cls._circuits[host] = circuit
+        return circuit
+
+    @classmethod
+    def _open(cls, host: str, circuit: dict) -> None:
+        circuit['state'] = STATE_OPEN
+        circuit['opened_at'] = time.monotonic()
+        circuit['trials'] = 0
+        circuit['records'].clear()
+        circuit['open_count'] += 1
+        api_logger.warning(f'Circuit breaker opened for {host}')
+
+    @classmethod
+    def before_request(cls, host: str) -> None:
+        "请求前检查熔断状态，不允许请求时抛出CircuitOpenError"
+        config = EnvConfig.get_config()
+        if not config.CIRCUIT_BREAKER_ENABLED:
+            return
+        circuit = cls._get_circuit(host)
+        if circuit['state'] == STATE_OPEN:
+            if time.monotonic() - circuit['opened_at'] < config.CIRCUIT_OPEN_SECONDS:
+                circuit['rejected'] += 1
+                raise CircuitOpenError(host)
+            circuit['state'] = STATE_HALF_OPEN
+            circuit['trials'] = 0
+            api_logger.info(f'Circuit breaker half-open for {host}')
+        if circuit['state'] == STATE_HALF_OPEN:
+            if circuit['trials'] >= config.CIRCUIT_HALF_OPEN_REQUESTS:
+                circuit['rejected'] += 1
+                raise CircuitOpenError(host)
+            circuit['trials'] += 1
+
+    @classmethod
+    def record(cls, host: str, success: bool) -> None:
+        "记录请求结果"
+        config = EnvConfig.get_config()
+        if not config.CIRCUIT_BREAKER_ENABLED:
+            return
+        circuit = cls._get_circuit(host)
+        if circuit['state'] == STATE_HALF_OPEN:
+            circuit['trials'] = max(circuit['trials'] - 1, 0)
+            if success:
+                circuit['state'] = STATE_CLOSED
+                circuit['records'].clear()
+                api_logger.info(f'Circuit breaker closed for {host}')
+            else:
+                cls._open(host, circuit)
+            return
+        if circuit['state'] == STATE_OPEN:
+            # 打开之前就已发出的请求，结果不再统计
+            return
+        now = time.monotonic()
+        records = circuit['records']
+        records.append((now, success))
+        while records and now - records[0][0] > config.CIRCUIT_WINDOW_SECONDS:
+            records.popleft()
+        if len(records) >= config.CIRCUIT_MIN_REQUESTS:
+            failures = sum(1 for _, ok in records if not ok)
+            if failures / len(records) >= config.CIRCUIT_ERROR_RATE:
+                cls._open(host, circuit)
+
+    @classmethod
+    def release(cls, host: str) -> None:
+        "请求被取消时释放半开状态的试探名额"
+        circuit = cls._circuits.get(host)
+        if circuit and circuit['state'] == STATE_HALF_OPEN:
+            circuit['trials'] = max(circuit['trials'] - 1, 0)
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        "获取各host的熔断状态"
+        result = {}
+        for host, circuit in cls._circuits.items():
+            records = circuit['records']
+            failures = sum(1 for _, ok in records if not ok)
+            result[host] = {
+                'state': circuit['state'],
+                'requests': len(records),
+                'failures': failures,
+                'open_count': circuit['open_count'],
+                'rejected': circuit['rejected']
+            }
+        return result
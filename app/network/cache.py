@@ -0,0 +1,90 @@
+from typing import Optional
+
+from app.core import EnvConfig
+from app.middlewares import RedisClient
+
+
+class ResponseCache:
+    '''外部接口返回数据的缓存
+
+    key按(服务器, 用户id, 接口, 是否使用ac)区分，数据gzip压缩后存入redis
+
+    写入时记录数据库中的场次，读取时场次不一致则视为过期
+    '''
+    _stats: dict[str, dict] = {}
+
+    @staticmethod
+    def get_key(region: str, account_id: int, endpoint: str, ac_present: bool) -> str:
+        return f"cache:response:{region}:{account_id}:{endpoint}:{1 if ac_present else 0}"
+
+    @staticmethod
+    def get_ttl(endpoint: str) -> int:
+        "不同类型接口的缓存时间"
+        config = EnvConfig.get_config()
+        if endpoint.startswith('cb_'):
+            return config.RESPONSE_CACHE_TTL_CB
+        return config.RESPONSE_CACHE_TTL_SHIPS
+
+    @classmethod
+    def _count(cls, endpoint: str, name: str) -> None:
+        if endpoint not in cls._stats:
+            cls._stats[endpoint] = {'hits': 0, 'misses': 0, 'stale': 0}
+        cls._stats[endpoint][name] += 1
+
+    @classmethod
+    async def get(
+        cls,
+        region: str,
+        account_id: int,
+        endpoint: str,
+        ac_present: bool,
+        battles: Optional[int] = None
+    ) -> Optional[dict]:
+        '''读取缓存，不存在或已过期返回None
+
+        参数：
+            battles: 数据库中当前的场次，为None时只依赖过期时间
+        '''
+        if not EnvConfig.get_config().RESPONSE_CACHE_ENABLED:
+            return None
+        key = cls.get_key(region, account_id, endpoint, ac_present)
+        result = await RedisClient.get_compressed(key)
+        if result['code'] != 1000 or result['data'] is None:
+            cls._count(endpoint, 'misses')
+            return None
+        if battles is not None and result['data']['battles'] != battles:
+            # 用户在缓存写入后又进行了战斗
+            cls._count(endpoint, 'stale')
+            return None
+        cls._count(endpoint, 'hits')
+        return result['data']['data']
+
+    @classmethod
+    async def set(
+        cls,
+        region: str,
+        account_id: int,
+        endpoint: str,
+        ac_present: bool,
+        data: dict,
+        battles: Optional[int] = None
+    ) -> None:
+        "写入缓存"
+        if not EnvConfig.get_config().RESPONSE_CACHE_ENABLED:
+            return None
+        key = cls.get_key(region, account_id, endpoint, ac_present)
+        await RedisClient.set_compressed(
+            key,
+            {'battles': battles, 'data': data},
+            cls.get_ttl(endpoint)
+        )
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        "获取各接口的缓存命中率"
+        result = {}
+        for endpoint, stats in cls._stats.items():
+            total = stats['hits'] + stats['misses'] + stats['stale']
+            result[endpoint] = dict(stats)
+            result[endpoint]['hit_ratio'] = 0 if total == 0 else round(stats['hits'] / total, 4)
+        return result
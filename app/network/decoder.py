@@ -0,0 +1,43 @@
+from app.utils import JsonCodec
+
+
+# ------------------------------------------------------
+# 船只数据接口的投影解析
+# 功能逻辑：
+# 1. /ships/{type}/ 接口每条船每种模式都有60多个字段，而处理时只用到其中十几个
+# 2. 先用JsonCodec(orjson)完整解析，再把每条船的统计数据替换为只包含需要字段的dict
+# 3. 不需要的字段不会留在最终的结果中，写入ResponseCache的数据也更小
+# ------------------------------------------------------
+
+# processing_pvp_data 需要的字段
+SHIPS_PVP_KEYS = frozenset([
+    'battles_count', 'wins', 'damage_dealt', 'frags', 'original_exp',
+    'max_damage_dealt', 'max_frags', 'max_exp', 'max_planes_killed',
+    'max_scouting_damage', 'max_total_agro'
+])
+
+
+def project_ships(statistics: dict, keys: frozenset) -> dict:
+    "原地替换每条船每种模式的统计数据，只保留keys中的字段"
+    for ship_data in statistics.values():
+        for battle_type, stats in ship_data.items():
+            # 包含battles_count的对象即为船只的统计数据，没有数据的模式为{}
+            if 'battles_count' in stats:
+                ship_data[battle_type] = {key: stats[key] for key in keys if key in stats}
+    return statistics
+
+def loads_projected(content: bytes | str, keys: frozenset) -> dict:
+    '''解析船只数据接口的返回值，统计数据只保留keys中的字段
+
+    参数：
+        content: 接口返回的原始数据
+        keys: 需要保留的字段
+    '''
+    result = JsonCodec.loads(content)
+    data = result.get('data') if isinstance(result, dict) else None
+    if isinstance(data, dict):
+        for user_data in data.values():
+            # 隐藏战绩的用户没有statistics
+            if isinstance(user_data, dict) and isinstance(user_data.get('statistics'), dict):
+                project_ships(user_data['statistics'], keys)
+    return result
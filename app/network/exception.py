@@ -3,6 +3,8 @@ import httpx
 import traceback
 
 from .response import JSONResponse
+from .limiter import RateLimitExceeded
+from .breaker import CircuitOpenError
 from app.loggers import write_error_info
 
 def handle_network_exception_async(func):
@@ -23,6 +25,11 @@ def handle_network_exception_async(func):
             return JSONResponse.get_error_response(5005,'HttpxReadError')
         except httpx.HTTPStatusError:
             return JSONResponse.get_error_response(5006, 'HttpxHTTPStatusError')
+        except RateLimitExceeded:
+            return JSONResponse.get_error_response(5007, 'RateLimitExceeded')
+        except CircuitOpenError:
+            # 上游故障期间直接失败，不再等待超时
+            return JSONResponse.get_error_response(5000, 'CircuitBreakerOpen')
         except Exception as e:
             error_id = str(uuid.uuid4())
             write_error_info(
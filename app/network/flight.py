@@ -0,0 +1,88 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+from app.utils import CallGroup
+
+
+class SingleFlight:
+    '''合并相同的并发请求
+
+    同一个key同时只会有一个请求在执行，其余调用者等待并共享该请求的结果
+
+    如果设置了window，结果还会在window秒内直接复用
+
+    请求在单独的task中执行，发起请求的调用者被取消时，其余调用者照常得到结果
+    '''
+    _calls = CallGroup()
+    _results: dict[str, tuple[float, Any]] = {}
+    _stats = {
+        'calls': 0,     # 总调用次数
+        'upstream': 0,  # 实际发出的请求次数
+        'merged': 0,    # 合并到进行中请求的次数
+        'hits': 0       # 命中结果窗口的次数
+    }
+    MAX_RESULTS = 1024
+
+    @classmethod
+    async def do(
+        cls,
+        key: str,
+        func: Callable[[], Awaitable[Any]],
+        window: float = 0,
+        cache_if: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        '''执行func，相同key的并发调用只执行一次
+
+        参数：
+            key: 请求的唯一标识
+            func: 实际发出请求的协程函数
+            window: 结果复用的时间(秒)，为0表示不复用
+            cache_if: 判断结果是否可以复用
+        '''
+        cls._stats['calls'] += 1
+        if window > 0:
+            cached = cls._results.get(key)
+            if cached and cached[0] > time.monotonic():
+                cls._stats['hits'] += 1
+                return cached[1]
+        task, merged = cls._calls.join(key, lambda: cls._run(key, func, window, cache_if))
+        cls._stats['merged' if merged else 'upstream'] += 1
+        # shield避免某个调用者被取消时取消请求本身
+        return await asyncio.shield(task)
+
+    @classmethod
+    async def _run(
+        cls,
+        key: str,
+        func: Callable[[], Awaitable[Any]],
+        window: float,
+        cache_if: Optional[Callable[[Any], bool]]
+    ) -> Any:
+        "执行请求并写入结果窗口"
+        result = await func()
+        if window > 0 and (cache_if is None or cache_if(result)):
+            cls._store(key, result, window)
+        return result
+
+    @classmethod
+    def _store(cls, key: str, result: Any, window: float) -> None:
+        "写入结果窗口，并清理过期的结果"
+        now = time.monotonic()
+        if len(cls._results) >= cls.MAX_RESULTS:
+            for k in [k for k, v in cls._results.items() if v[0] <= now]:
+                del cls._results[k]
+        cls._results[key] = (now + window, result)
+
+    @classmethod
+    def clear(cls) -> None:
+        "清空结果窗口"
+        cls._results.clear()
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        "获取合并请求的统计数据"
+        result = dict(cls._stats)
+        result['in_flight'] = len(cls._calls)
+        result['saved'] = cls._stats['merged'] + cls._stats['hits']
+        return result
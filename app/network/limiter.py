@@ -0,0 +1,133 @@
+import time
+import asyncio
+from urllib.parse import urlsplit
+
+from app.core import EnvConfig, api_logger
+from app.middlewares import RedisConnection
+
+
+# ------------------------------------------------------
+# 外部接口的全局限流(GCRA)
+# 功能逻辑：
+# 1. API、Celery和各个定时脚本共用redis中同一个host的限流key
+# 2. tat(理论到达时间)每放行一个请求增加interval
+# 3. tat - now 超过允许的突发容量时需要等待
+# 4. 低优先级的请求突发容量更小，高峰期优先放行交互请求
+# ------------------------------------------------------
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if tat == nil or tat < now then
+    tat = now
+end
+if tat - now > tolerance then
+    return math.ceil(tat - now - tolerance)
+end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now) + 1000)
+return 0
+"""
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BACKGROUND = 'background'
+
+
+class RateLimitExceeded(Exception):
+    "等待令牌超时"
+    pass
+
+
+def gcra(tat: float, now: float, interval: float, tolerance: float) -> tuple[float, float]:
+    '''GCRA算法的计算过程，与GCRA_SCRIPT一致
+
+    返回：
+        (新的tat, 需要等待的时间)，等待时间为0表示放行
+    '''
+    if tat < now:
+        tat = now
+    if tat - now > tolerance:
+        return tat, tat - now - tolerance
+    return tat + interval, 0
+
+
+class LocalRateLimiter:
+    '''进程内的GCRA限流
+
+    redis不可用时的替代实现，也可以用于测试
+    '''
+    def __init__(self):
+        self._tats: dict[str, float] = {}
+
+    def try_acquire(self, key: str, interval: float, tolerance: float) -> float:
+        "尝试获取令牌，返回需要等待的秒数"
+        now = time.monotonic()
+        tat, retry_after = gcra(self._tats.get(key, now), now, interval, tolerance)
+        if retry_after == 0:
+            self._tats[key] = tat
+        return retry_after
+
+
+class UpstreamLimiter:
+    '''外部接口请求的限流'''
+    _local = LocalRateLimiter()
+    _script = None
+    _stats = {'acquired': 0, 'waits': 0, 'rejected': 0, 'fallbacks': 0}
+
+    @staticmethod
+    def get_params(priority: str) -> tuple[float, float]:
+        "获取令牌间隔和对应优先级的突发容量(秒)"
+        config = EnvConfig.get_config()
+        interval = 1 / config.RATE_LIMIT_PER_SECOND
+        tolerance = max(config.RATE_LIMIT_BURST - 1, 0) * interval
+        if priority != PRIORITY_INTERACTIVE:
+            tolerance = tolerance * config.RATE_LIMIT_BACKGROUND_RATIO
+        return interval, tolerance
+
+    @classmethod
+    async def try_acquire(cls, key: str, interval: float, tolerance: float) -> float:
+        "通过redis获取令牌，redis异常时退回进程内限流"
+        try:
+            if cls._script is None:
+                cls._script = RedisConnection.get_connection().register_script(GCRA_SCRIPT)
+            retry_after = await cls._script(
+                keys=[key],
+                args=[interval * 1000, tolerance * 1000]
+            )
+            return int(retry_after) / 1000
+        except Exception as e:
+            cls._stats['fallbacks'] += 1
+            api_logger.warning(f'Rate limiter fallback to local: {type(e).__name__}')
+            return cls._local.try_acquire(key, interval, tolerance)
+
+    @classmethod
+    async def acquire(cls, url: str, priority: str = PRIORITY_INTERACTIVE) -> None:
+        '''请求外部接口前获取令牌
+
+        参数：
+            url: 请求的url，按host限流
+            priority: 请求优先级
+        '''
+        config = EnvConfig.get_config()
+        if not config.RATE_LIMIT_ENABLED:
+            return
+        key = f'ratelimit:{urlsplit(url).hostname}'
+        interval, tolerance = cls.get_params(priority)
+        deadline = time.monotonic() + config.RATE_LIMIT_MAX_WAIT
+        while True:
+            retry_after = await cls.try_acquire(key, interval, tolerance)
+            if retry_after == 0:
+                cls._stats['acquired'] += 1
+                return
+            if time.monotonic() + retry_after > deadline:
+                cls._stats['rejected'] += 1
+                raise RateLimitExceeded(key)
+            cls._stats['waits'] += 1
+            await asyncio.sleep(retry_after)
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        "获取限流的统计数据"
+        return dict(cls._stats)
@@ -0,0 +1,150 @@
+import importlib.util
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from .flight import SingleFlight
+from .limiter import UpstreamLimiter
+from .breaker import CircuitBreaker, FAILURE_STATUS_CODES
+from .endpoints import VORTEX_API_ENDPOINTS, OFFICIAL_API_ENDPOINTS, CLAN_API_ENDPOINTS
+from app.core import EnvConfig, api_logger
+
+
+# h2 为可选依赖，未安装时退回HTTP/1.1
+HTTP2_SUPPORTED = importlib.util.find_spec('h2') is not None
+
+def _build_host_map() -> dict[str, str]:
+    # 将各个接口的host映射到对应的服务器
+    host_map = {}
+    for endpoints in [VORTEX_API_ENDPOINTS, OFFICIAL_API_ENDPOINTS, CLAN_API_ENDPOINTS]:
+        for region, base_url in endpoints.items():
+            if base_url:
+                host_map[urlsplit(base_url).hostname] = region
+    return host_map
+
+HOST_REGION_MAP = _build_host_map()
+DEFAULT_POOL = 'default'
+
+
+class HttpClientPool:
+    '''管理外部API的httpx连接池
+
+    每个服务器共用一个长连接的AsyncClient，避免每次请求都重新握手
+    '''
+    _clients: dict[str, httpx.AsyncClient] = {}
+    _stats: dict[str, dict] = {}
+
+    @classmethod
+    def _init_client(cls, region: str) -> httpx.AsyncClient:
+        "初始化指定服务器的AsyncClient"
+        config = EnvConfig.get_config()
+        limits = httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY
+        )
+        client = httpx.AsyncClient(
+            limits=limits,
+            http2=config.HTTP2_ENABLED and HTTP2_SUPPORTED
+        )
+        cls._clients[region] = client
+        cls._stats[region] = {'requests': 0, 'in_flight': 0}
+        return client
+
+    @classmethod
+    def init_clients(cls) -> None:
+        "启动时为所有服务器创建连接池"
+        for region in VORTEX_API_ENDPOINTS.keys():
+            if region not in cls._clients:
+                cls._init_client(region)
+        config = EnvConfig.get_config()
+        api_logger.info(
+            f'Http client pools initialized '
+            f'(max_connections={config.HTTP_MAX_CONNECTIONS}, '
+            f'http2={config.HTTP2_ENABLED and HTTP2_SUPPORTED})'
+        )
+
+    @classmethod
+    async def close_clients(cls) -> None:
+        "关闭所有连接池"
+        try:
+            for region, client in cls._clients.items():
+                await client.aclose()
+                api_logger.info(f'Http client pool for {region} is closed')
+            cls._clients.clear()
+            cls._stats.clear()
+        except Exception as e:
+            api_logger.error(f'Failed to close http client pools')
+            api_logger.error(e)
+
+    @staticmethod
+    def get_region(url: str) -> str:
+        "根据url的host获取对应的连接池名称"
+        return HOST_REGION_MAP.get(urlsplit(url).hostname, DEFAULT_POOL)
+
+    @classmethod
+    def get_client(cls, url: str) -> httpx.AsyncClient:
+        "获取url对应服务器的AsyncClient，不存在则创建"
+        region = cls.get_region(url)
+        client = cls._clients.get(region)
+        if client is None or client.is_closed:
+            client = cls._init_client(region)
+        return client
+
+    @classmethod
+    async def request(cls, method: str, url: str, **kwargs) -> httpx.Response:
+        """通过共享连接池发送请求
+
+        相同url的并发GET请求会被合并为一次上游请求，调用者各自解析返回的Response
+        """
+        if method != 'GET':
+            return await cls._send(method, url, **kwargs)
+        return await SingleFlight.do(
+            key=f'{method}:{url}',
+            func=lambda: cls._send(method, url, **kwargs),
+            window=EnvConfig.get_config().HTTP_SINGLE_FLIGHT_WINDOW,
+            # 只复用正常的返回结果
+            cache_if=lambda res: res.status_code in [200, 404]
+        )
+
+    @classmethod
+    async def _send(cls, method: str, url: str, **kwargs) -> httpx.Response:
+        "检查熔断并获取限流令牌后发送请求，并记录请求数"
+        host = urlsplit(url).hostname
+        CircuitBreaker.before_request(host)
+        client = cls.get_client(url)
+        stats = cls._stats[cls.get_region(url)]
+        try:
+            await UpstreamLimiter.acquire(url)
+            stats['requests'] += 1
+            stats['in_flight'] += 1
+            try:
+                res = await client.request(method, url, **kwargs)
+            finally:
+                stats['in_flight'] -= 1
+        except httpx.TransportError:
+            # 超时、连接失败等网络层错误
+            CircuitBreaker.record(host, False)
+            raise
+        except BaseException:
+            CircuitBreaker.release(host)
+            raise
+        CircuitBreaker.record(host, res.status_code not in FAILURE_STATUS_CODES)
+        return res
+
+    @classmethod
+    def get_stats(cls, region: Optional[str] = None) -> dict:
+        '''获取各服务器的请求统计
+
+        httpx没有公开连接池的状态，这里只统计_send中的请求数和进行中的请求数，不是连接数
+        '''
+        result = {}
+        for name, stats in cls._stats.items():
+            if region and name != region:
+                continue
+            result[name] = {
+                'requests': stats['requests'],
+                'in_flight': stats['in_flight']
+            }
+        return result
@@ -1,4 +1,5 @@
 from app.constants import GameData
+from app.utils import ShipStats
 
 
 def processing_user_basic(user_basic: dict):
@@ -60,6 +61,7 @@ def processing_season(season_data: dict, rank_data: dict) -> dict:
 
 def processing_pvp_data(responses: list, fields: list, include_old: bool):
     # 处理pvp数据，支持pvp_solo/pvp_div2/pvp_div3
+    # 每条船各战斗类型的数据为ShipStats格式的list，没有数据的为None
     result = {}
     record = {
         'max_damage_dealt': 0,
@@ -78,25 +80,18 @@ def processing_pvp_data(responses: list, fields: list, include_old: bool):
             field_data = ship_data[field]
             if field_data == {}:
                 continue
-            if ship_id not in result:
-                result[ship_id] = {
-                    'pvp': {
-                        'battles_count': 0,
-                        'wins': 0,
-                        'damage_dealt': 0,
-                        'frags': 0,
-                        'original_exp': 0,
-                        'personal_rating': 0,
-                        'damage_rating': 0,
-                        'frags_rating': 0
-                    },
-                    'pvp_solo': {},
-                    'pvp_div2': {},
-                    'pvp_div3': {}
+            ship_result = result.get(ship_id)
+            if ship_result is None:
+                ship_result = {
+                    'pvp': ShipStats.empty(),
+                    'pvp_solo': None,
+                    'pvp_div2': None,
+                    'pvp_div3': None
                 }
-            for key in ['battles_count','wins','damage_dealt','frags','original_exp']:
-                result[ship_id]['pvp'][key] += field_data[key]
-                result[ship_id][field][key] = field_data[key]
+                result[ship_id] = ship_result
+            field_stats = ShipStats.from_response(field_data)
+            ShipStats.add(ship_result['pvp'], field_stats)
+            ship_result[field] = field_stats
             for key in ['max_damage_dealt','max_frags','max_exp','max_planes_killed','max_scouting_damage','max_total_agro']:
                 if field_data[key] > record[key]:
                     record[key] = field_data[key]
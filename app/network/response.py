@@ -53,6 +53,7 @@ class JSONResponse:
     Httpx_5004_ConnectError = {'status': 'error','code': 5004,'message': 'HttpxConnectError','data' : None}
     Httpx_5005_ReadError = {'status': 'error','code': 5005,'message': 'HttpxReadError','data' : None}
     Httpx_5006_HTTPStatusError = {'status': 'error','code': 5006,'message': 'HttpxHTTPStatusError','data' : None}
+    Httpx_5007_RateLimitExceeded = {'status': 'error','code': 5007,'message': 'RateLimitExceeded','data' : None}
 
     @staticmethod
     def get_success_response(
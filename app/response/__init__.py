@@ -1,6 +1,8 @@
 from .response import JSONResponse, ResponseDict
+from .raw import RawJSONResponse
 
 __all__ = [
     'JSONResponse',
-    'ResponseDict'
+    'ResponseDict',
+    'RawJSONResponse'
 ]
\ No newline at end of file
@@ -0,0 +1,17 @@
+from typing import Any
+from starlette.responses import Response
+
+from app.utils import JsonCodec
+
+
+class RawJSONResponse(Response):
+    '''预先序列化的json返回值
+
+    路由直接返回该对象时，FastAPI会跳过jsonable_encoder，由JsonCodec完成序列化
+
+    只适用于内容全部为dict/list/str/int/float等基础类型的返回值
+    '''
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return JsonCodec.dumpb(content)
@@ -29,4 +29,15 @@ async def getMySQLOverview(item: Literal['user', 'clan', 'trx', 'process']):
         result = await MySQLAPI.get_innodb_trx()
     else:
         result = await MySQLAPI.get_innodb_processlist()
-    return result
\ No newline at end of file
+    return result
+
+@router.get("/mysql/slow-queries/", summary="获取耗时最多的查询")
+async def getSlowQueries(
+    order: Literal['total', 'max', 'avg', 'count'] = Query('total'),
+    limit: int = Query(20, ge=1, le=200)
+):
+    return await MySQLAPI.get_slow_queries(order, limit)
+
+@router.delete("/mysql/slow-queries/", summary="清空查询耗时统计")
+async def resetSlowQueries():
+    return await MySQLAPI.reset_slow_queries()
\ No newline at end of file
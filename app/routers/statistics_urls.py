@@ -2,7 +2,7 @@ from fastapi import APIRouter, Query, Path
 
 from app.apis.statistics import StatsAPI
 from app.schemas import Region, PVPField
-from app.response import JSONResponse
+from app.response import JSONResponse, RawJSONResponse
 from app.utils import GameUtils
 
 router = APIRouter()
@@ -25,7 +25,8 @@ async def getUserBasic(
     if GameUtils.check_aid_and_rid(region, account_id) == False:
         return JSONResponse.API_2007_IllegalAccoutID
     result = await StatsAPI.get_user_pvp(region, account_id, field, include_old)
-    return result
+    # 返回数据较大，直接序列化以跳过jsonable_encoder
+    return RawJSONResponse(result)
 @router.get("/accounts/{region}/{account_id}/clanbattle/", summary="获取用户cw数据")
 async def getUserCW(
     region: Region = Path(...), 
@@ -34,4 +35,4 @@ async def getUserCW(
     if GameUtils.check_aid_and_rid(region, account_id) == False:
         return JSONResponse.API_2007_IllegalAccoutID
     result = await StatsAPI.get_user_cb(region, account_id)
-    return result
\ No newline at end of file
+    return RawJSONResponse(result)
\ No newline at end of file
@@ -1,15 +1,25 @@
 from .time_utils import TimeUtils
+from .json_codec import JsonCodec
 from .json_utils import JsonUtils
+from .reference_data import ReferenceData
 from .name_utils import NameUtils
 from .game_utils import GameUtils
 from .rating_utils import RatingUtils
+from .ship_stats import ShipStats
+from .rating_engine import RatingEngine
 from .string_utils import StringUtils
+from .call_group import CallGroup
 
 __all__ = [
     'TimeUtils',
+    'JsonCodec',
     'JsonUtils',
+    'ReferenceData',
     'NameUtils',
     'GameUtils',
     'RatingUtils',
-    'StringUtils'
+    'ShipStats',
+    'RatingEngine',
+    'StringUtils',
+    'CallGroup'
 ]
\ No newline at end of file
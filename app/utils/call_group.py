@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+class CallGroup:
+    '''合并相同key的并发调用
+
+    同一个key同时只有一个func在执行，其余调用者等待并共享结果
+
+    func在单独的task中执行，调用者被取消时func不会被取消，等待同一个key的其他调用者照常得到结果
+    '''
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._calls
+
+    def join(self, key: str, func: Callable[[], Awaitable[Any]]) -> tuple[asyncio.Task, bool]:
+        '''获取key对应的进行中的调用，没有时创建task执行func
+
+        返回(task, 是否合并到已有的调用)，调用者需要通过asyncio.shield(task)等待结果
+        '''
+        task = self._calls.get(key)
+        if task is not None:
+            return task, True
+        task = asyncio.create_task(func())
+        self._calls[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+        return task, False
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 所有调用者都被取消时没有人读取异常，标记已读取避免输出警告
+        if not task.cancelled():
+            task.exception()
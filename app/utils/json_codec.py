@@ -0,0 +1,84 @@
+import json
+from types import MappingProxyType
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    "处理json无法直接序列化的类型"
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class StdlibBackend:
+    "标准库json"
+    name = 'json'
+
+    @staticmethod
+    def dumpb(obj: Any) -> bytes:
+        return json.dumps(
+            obj,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=_default
+        ).encode('utf-8')
+
+    @staticmethod
+    def loads(data: str | bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonBackend:
+    "orjson，序列化结果直接为utf-8编码的bytes"
+    name = 'orjson'
+
+    @staticmethod
+    def dumpb(obj: Any) -> bytes:
+        # 与标准库一致，允许非str类型的key
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    @staticmethod
+    def loads(data: str | bytes) -> Any:
+        return orjson.loads(data)
+
+
+class JsonCodec:
+    '''统一的json编解码入口
+
+    安装了orjson时使用orjson，否则退回标准库json
+    '''
+    backend = OrjsonBackend if orjson else StdlibBackend
+
+    @classmethod
+    def set_backend(cls, name: str) -> None:
+        "切换编解码后端(json/orjson)"
+        if name == 'orjson':
+            if orjson is None:
+                raise ImportError('orjson is not installed')
+            cls.backend = OrjsonBackend
+        else:
+            cls.backend = StdlibBackend
+
+    @classmethod
+    def dumpb(cls, obj: Any) -> bytes:
+        "序列化为bytes"
+        return cls.backend.dumpb(obj)
+
+    @classmethod
+    def dumps(cls, obj: Any) -> str:
+        "序列化为str"
+        return cls.backend.dumpb(obj).decode('utf-8')
+
+    @classmethod
+    def loads(cls, data: str | bytes) -> Any:
+        "反序列化"
+        return cls.backend.loads(data)
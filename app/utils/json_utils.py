@@ -1,32 +1,101 @@
 import os
 import time
-import json
-import shutil
-from typing import Any
+import gzip
+import hashlib
+import tempfile
+from typing import Any, Callable
 
-from app.core import JSON_FILE_PATH, BACKUP_PATH
+from app.core import JSON_FILE_PATH, BACKUP_PATH, EnvConfig
+from .json_codec import JsonCodec
 
 
 
 class JsonUtils:
     """
     负责读取和写入json文件
+
+    写入时先写临时文件再替换，读取方不会读到写入一半的文件
+
+    每次写入后版本号加1，并通知通过subscribe注册的回调
     """
+    _versions: dict[str, int] = {}
+    _subscribers: dict[str, list[Callable]] = {}
+    # 文件名 -> (修改时间, 内容的hash)，文件没有被修改时不需要重新读取计算
+    _hashes: dict[str, tuple[int, bytes]] = {}
+
     @staticmethod
     def read(filename: str) -> dict:
         """读取json文件数据"""
         file_path = os.path.join(JSON_FILE_PATH, f'{filename}.json')
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(file_path, "rb") as f:
+            return JsonCodec.loads(f.read())
 
     @staticmethod
-    def write(filename: str, data: Any) -> None:
-        """刷新json文件数据，写入前备份一份旧数据到备份文件夹内"""
+    def write(filename: str, data: Any) -> bool:
+        """刷新json文件数据，写入前备份一份旧数据到备份文件夹内
+
+        内容没有变化时不写入，返回是否写入
+        """
         file_path = os.path.join(JSON_FILE_PATH, f'{filename}.json')
+        content = JsonCodec.dumpb(data)
+        digest = hashlib.sha256(content).digest()
         if os.path.exists(file_path):
-            backup_name = f"{filename}_{int(time.time())}.json"
-            backup_path = os.path.join(BACKUP_PATH, backup_name)
-            shutil.copy2(file_path, backup_path)
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False)
+            mtime = os.stat(file_path).st_mtime_ns
+            cached = JsonUtils._hashes.get(filename)
+            if cached is not None and cached[0] == mtime and cached[1] == digest:
+                return False
+            with open(file_path, "rb") as f:
+                old_content = f.read()
+            if hashlib.sha256(old_content).digest() == digest:
+                JsonUtils._hashes[filename] = (mtime, digest)
+                return False
+            JsonUtils.backup(filename, old_content)
+        # 写入同目录下的临时文件，完成后原子替换
+        fd, temp_path = tempfile.mkstemp(prefix=f'.{filename}_', suffix='.tmp', dir=JSON_FILE_PATH)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp创建的文件只有所有者可读，和直接open创建的文件保持一致
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        JsonUtils._hashes[filename] = (os.stat(file_path).st_mtime_ns, digest)
+        JsonUtils._versions[filename] = JsonUtils._versions.get(filename, 0) + 1
+        for callback in JsonUtils._subscribers.get(filename, []):
+            callback(filename)
+        return True
+
+    @staticmethod
+    def backup(filename: str, content: bytes) -> None:
+        """压缩备份旧数据，只保留最近的JSON_BACKUP_RETENTION份"""
+        # 使用纳秒时间戳，同一秒内的多次写入不会覆盖之前的备份
+        backup_name = f"{filename}_{time.time_ns()}.json.gz"
+        with gzip.open(os.path.join(BACKUP_PATH, backup_name), "wb") as f:
+            f.write(content)
+        prefix = f"{filename}_"
+        backups = []
+        for name in os.listdir(BACKUP_PATH):
+            timestamp = name[len(prefix):-len('.json.gz')]
+            if name.startswith(prefix) and name.endswith('.json.gz') and timestamp.isdigit():
+                backups.append((int(timestamp), name))
+        backups.sort(reverse=True)
+        for _, name in backups[EnvConfig.get_config().JSON_BACKUP_RETENTION:]:
+            os.remove(os.path.join(BACKUP_PATH, name))
+
+    @staticmethod
+    def get_version(filename: str) -> int:
+        """本进程内文件的写入次数"""
+        return JsonUtils._versions.get(filename, 0)
+
+    @staticmethod
+    def subscribe(filename: str, callback: Callable[[str], None]) -> None:
+        """注册文件更新后的回调，参数为文件名，重复注册同一个回调只保留一个"""
+        callbacks = JsonUtils._subscribers.setdefault(filename, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
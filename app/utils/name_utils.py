@@ -1,34 +1,9 @@
-from app.constants import GameData
+from app.core import EnvConfig, api_logger
 from app.schemas import ShipFilter
-from .json_utils import JsonUtils
+from .reference_data import ReferenceData
+from .ship_index import ShipIndex, ShipNameIndex, name_format
 
 
-def name_format(in_str: str) -> str:
-    in_str_list = in_str.split()
-    in_str = None
-    in_str = ''.join(in_str_list)
-    en_list = {
-        'a': ['à', 'á', 'â', 'ã', 'ä', 'å'],
-        'e': ['è', 'é', 'ê', 'ë'],
-        'i': ['ì', 'í', 'î', 'ï'],
-        'o': ['ó', 'ö', 'ô', 'õ', 'ò', 'ō'],
-        'u': ['ü', 'û', 'ú', 'ù', 'ū'],
-        'y': ['ÿ', 'ý'],
-        'l': ['ł']
-    }
-    for en, lar in en_list.items():
-        for index in lar:
-            if index in in_str:
-                in_str = in_str.replace(index, en)
-            if index.upper() in in_str:
-                in_str = in_str.replace(index.upper(), en.upper())
-    re_str = ['_', '-', '·', '.', '\'','(',')','（','）']
-    for index in re_str:
-        if index in in_str:
-            in_str = in_str.replace(index, '')
-    in_str = in_str.lower()
-    return in_str
-
 def data_format(ship_id: int, main_data: dict):
     return {
         "id": ship_id,
@@ -39,102 +14,109 @@ def data_format(ship_id: int, main_data: dict):
         "special": main_data[ship_id]['special'], 
         "index": main_data[ship_id]['index'], 
         "ship_name": {
-            'cn': main_data[ship_id]['ship_name']['cn'],
-            'en': main_data[ship_id]['ship_name']['en'],
-            'ja': main_data[ship_id]['ship_name']['ja'],
-            'ru': main_data[ship_id]['ship_name']['ru'],
-            "en_full": main_data[ship_id]['ship_name']['en_l'],
+            'cn': main_data[ship_id]['ship_name'].get('cn'),
+            'en': main_data[ship_id]['ship_name'].get('en'),
+            'ja': main_data[ship_id]['ship_name'].get('ja'),
+            'ru': main_data[ship_id]['ship_name'].get('ru'),
+            "en_full": main_data[ship_id]['ship_name'].get('en_l'),
         }
     }
 
 class NameUtils:    
+    @staticmethod
+    def get_server(region: str) -> str:
+        "船只名称数据所属的服务器"
+        if region == 'ru':
+            return 'lesta'
+        return 'wg'
+
+    @staticmethod
+    def get_name_versions(region: str) -> tuple:
+        "别名表和船只名称的数据版本"
+        return (
+            ReferenceData.get_version('ship_name_nick'),
+            ReferenceData.get_version(f'ship_name_{NameUtils.get_server(region)}')
+        )
+
+    @staticmethod
+    def has_name_index(region: str) -> bool:
+        "当前数据版本的船只名称索引是否已经构建"
+        return ShipIndex.has_name_index(NameUtils.get_server(region), NameUtils.get_name_versions(region))
+
+    @staticmethod
+    def get_name_index(region: str) -> ShipNameIndex:
+        "获取船只名称索引，数据版本变化后重新构建(包括BK树，耗时较长)"
+        server = NameUtils.get_server(region)
+        return ShipIndex.get_name_index(
+            server,
+            NameUtils.get_name_versions(region),
+            ReferenceData.get(f'ship_name_{server}'),
+            ReferenceData.get('ship_name_nick')
+        )
+
+    @staticmethod
+    def load_name_indexes() -> None:
+        "构建所有服务器的船只名称索引，在启动时调用"
+        for region in ['asia', 'ru']:
+            try:
+                NameUtils.get_name_index(region)
+            except Exception as e:
+                # 静态数据加载失败时，第一次搜索时再构建
+                api_logger.warning(f'Failed to build ship name index for {NameUtils.get_server(region)}: {e}')
+
     @staticmethod
     def search_ship(region: str, ship_name: str, language: str):
         '''
         搜索用户输出的名称对应的船只。按照先精确匹配，无果再模糊匹配的原则。
 
+        都没有结果时，按编辑距离返回最接近的几条船只。
+
         参数:
             region: 服务器
             ship_name: 搜索的名称
             language: 搜索的语言
         '''
-        if region == 'ru':
-            server = 'lesta'
-        else:
-            server = 'wg'
-        nick_data = JsonUtils.read('ship_name_nick')
-        main_data = JsonUtils.read(f'ship_name_{server}')
+        main_data = ReferenceData.get(f'ship_name_{NameUtils.get_server(region)}')
+        index = NameUtils.get_name_index(region)
         ship_name_format: str = name_format(ship_name)
-        if ship_name_format.endswith(('old','旧')):
-            old = True
-        else:
-            old = False
-
+        ship_ids = index.search(ship_name_format, language)
+        if ship_ids == []:
+            # 容错搜索，处理用户输入错误的情况
+            config = EnvConfig.get_config()
+            ship_ids = index.fuzzy_search(
+                ship_name_format,
+                config.SHIP_FUZZY_TOP_K,
+                config.SHIP_FUZZY_MAX_DISTANCE,
+                config.SHIP_FUZZY_TIME_BUDGET
+            )
         result = []
-        exists_ids = []
-        # 别名表匹配
-        for ship_id, ship_data in nick_data[language].items():
-            for index in ship_data:
-                if ship_name_format == name_format(index):
-                    result.append(data_format(ship_id, main_data)) 
-                    return result
-        for ship_id, ship_data in main_data.items():
-            if ship_name_format == name_format(ship_data['ship_name']['en']):
-                result.append(data_format(ship_id, main_data)) 
-                return result
-            if language in ['cn','ja','ru','en']:
-                if language == 'en':
-                    lang = 'en_l'
-                else:
-                    lang = language
-                if ship_name_format == name_format(ship_data['ship_name'][lang]):
-                    result.append(data_format(ship_id, main_data)) 
-                    return result
-        for ship_id, ship_data in main_data.items():
-            if ship_name_format in name_format(ship_data['ship_name']['en']):
-                if old == False and ship_id in GameData.OLD_SHIP_ID_LIST:
-                    continue
-                if ship_id not in exists_ids:
-                    result.append(data_format(ship_id, main_data)) 
-                    exists_ids.append(ship_id)
-            if language in ['cn','ja','ru','en']:
-                if language == 'en':
-                    lang = 'en_l'
-                else:
-                    lang = language
-                if ship_name_format in name_format(ship_data['ship_name'][lang]):
-                    if old == False and ship_id in GameData.OLD_SHIP_ID_LIST:
-                        continue
-                    if ship_id not in exists_ids:
-                        result.append(data_format(ship_id, main_data)) 
-                        exists_ids.append(ship_id)
+        for ship_id in ship_ids:
+            result.append(data_format(ship_id, main_data))
         return result
     
     @staticmethod
-    def query_ship(region: str, query_condition: ShipFilter):
+    def query_ship(region: str, query_condition: ShipFilter, limit: int = None):
         """
         根据输入的查询条件返回对应的船只列表
 
         参数:
             query_condition
+            limit: 最多返回的船只数量，为None时不限制
         """
         # query_condition = {
         #     'type': ['AirCarrier','Battleship','Cruiser','Destroyer','Submarine'],
         #     'tier': [1,2,3,4,5,6,7,8,9,10,11],
         #     'nation': ['commonwealth','europe','france','germany','italy','japan','netherlands','pan_america','pan_asia','spain','uk','usa','ussr']
         # }
-        if region == 'ru':
-            server = 'lesta'
-        else:
-            server = 'wg'
-        ship_data = JsonUtils.read(f'ship_name_{server}')
+        server = NameUtils.get_server(region)
+        ship_data = ReferenceData.get(f'ship_name_{server}')
+        index = ShipIndex.get_filter_index(server, ReferenceData.get_version(f'ship_name_{server}'), ship_data)
+        bits = index.match(
+            [t.value for t in query_condition.type] if query_condition.type else None,
+            [t.value for t in query_condition.tier] if query_condition.tier else None,
+            [n.value for n in query_condition.nation] if query_condition.nation else None
+        )
         result = {}
-        for ship_id, ship_info in ship_data.items():
-            if query_condition.type and ship_info["type"] not in query_condition.type:
-                continue
-            if query_condition.tier and ship_info["tier"] not in [t.value for t in query_condition.tier]:
-                continue
-            if query_condition.nation and ship_info["nation"] not in [n.value for n in query_condition.nation]:
-                continue
-            result[ship_id] = ship_info
+        for ship_id in index.get_ship_ids(bits, limit):
+            result[ship_id] = ship_data[ship_id]
         return result
@@ -0,0 +1,143 @@
+from operator import itemgetter
+
+import numpy as np
+
+from .ship_stats import BATTLES_COUNT, WINS, DAMAGE_DEALT, FRAGS, PERSONAL_RATING, FRAGS_RATING
+
+# 排位类模式使用的PR权重，其余模式使用随机战权重
+RANK_GAME_TYPES = ['rank', 'rank_solo', 'rating_solo', 'rating_div']
+RANK_WEIGHTS = (600, 350, 400)
+PVP_WEIGHTS = (700, 300, 150)
+# 计算需要的用户数据
+get_stats = itemgetter(BATTLES_COUNT, WINS, DAMAGE_DEALT, FRAGS)
+
+
+def round_6(values: np.ndarray) -> list:
+    '''批量保留6位小数，结果与内置round(x, 6)完全一致
+
+    rint(x*1e6)/1e6只有在x*1e6非常接近.5时，乘法的舍入误差才可能导致结果不同
+
+    这部分数据(以及超出精度范围的数据)单独使用内置round计算
+    '''
+    scaled = values * 1e6
+    result = (np.rint(scaled) / 1e6).tolist()
+    ambiguous = (
+        (np.abs(scaled - np.floor(scaled) - 0.5) <= np.abs(scaled) * 4.5e-16 + 1e-9) |
+        ~(np.abs(scaled) < 2.0 ** 52)
+    )
+    for index in np.flatnonzero(ambiguous).tolist():
+        result[index] = round(float(values[index]), 6)
+    return result
+
+
+class ExpectedTable:
+    '''服务器数据按列存储的期望值表
+
+    rows: ship_id -> 行号
+    values: shape为(n, 3)的数组，依次为win_rate/avg_damage/avg_frags
+    '''
+    __slots__ = ('rows', 'values')
+
+    def __init__(self, region: str, server_data: dict):
+        self.rows: dict[str, int] = {}
+        values = []
+        for ship_id, ship_server_data in server_data.items():
+            region_data = ship_server_data.get(region) if ship_server_data else None
+            if region_data == {} or region_data is None:
+                continue
+            self.rows[ship_id] = len(values)
+            values.append((
+                region_data['win_rate'],
+                region_data['avg_damage'],
+                region_data['avg_frags']
+            ))
+        self.values = np.array(values, dtype=np.float64).reshape(-1, 3)
+
+
+class RatingEngine:
+    '''批量计算PR的引擎
+
+    计算结果与RatingUtils.get_rating_by_data逐条计算的结果一致
+
+    功能逻辑：
+    1. 期望值表按(服务器, 数据版本)缓存，数据更新后重新生成
+    2. 收集所有船只所有模式的数据为列，一次性完成计算
+    3. 计算结果保留6位小数后写回原数据，与原逻辑的round结果相同
+    '''
+    _tables: dict[str, tuple[object, ExpectedTable]] = {}
+
+    @classmethod
+    def get_table(cls, region: str, server_data: dict, version: object = None) -> ExpectedTable:
+        "获取期望值表，version不变时复用"
+        cached = cls._tables.get(region)
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+        table = ExpectedTable(region, server_data)
+        cls._tables[region] = (version, table)
+        return table
+
+    @staticmethod
+    def calculate(
+        region: str,
+        data: dict,
+        keys: list,
+        server_data: dict,
+        version: object = None
+    ) -> dict:
+        '''计算用户所有船只各模式的PR，结果写入data
+
+        参数:
+            region: 服务器
+            data: 用户的船只数据 {ship_id: {game_type: ShipStats格式的list}}，没有数据的为None
+            keys: 需要计算的模式
+            server_data: ship_data.json中的ship_data
+            version: server_data的版本号，用于复用期望值表
+        '''
+        table = RatingEngine.get_table(region, server_data, version)
+        rank_keys = [key in RANK_GAME_TYPES for key in keys]
+        table_rows = table.rows
+        cells = []
+        rows = []
+        is_rank = []
+        for ship_id, ship_data in data.items():
+            row = table_rows.get(ship_id, -1)
+            for key, rank in zip(keys, rank_keys):
+                cell = ship_data.get(key)
+                if cell:
+                    cells.append(cell)
+                    rows.append(row)
+                    is_rank.append(rank)
+        if cells == []:
+            return data
+        rows = np.array(rows, dtype=np.int64)
+        stats = np.array(list(map(get_stats, cells)), dtype=np.float64)
+        battles_count = stats[:, 0]
+        # 没有场次或没有服务器数据的记为-1
+        valid = (battles_count > 0) & (rows >= 0)
+        expected = table.values[np.where(valid, rows, 0)] if len(table.values) else np.ones((len(cells), 3))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 用户数据
+            actual_wins = stats[:, 1] / battles_count * 100
+            actual_dmg = stats[:, 2] / battles_count
+            actual_frags = stats[:, 3] / battles_count
+            # Step 1 - ratios:
+            r_wins = actual_wins / expected[:, 0]
+            r_dmg = actual_dmg / expected[:, 1]
+            r_frags = actual_frags / expected[:, 2]
+        # Step 2 - normalization:
+        n_wins = np.maximum(0, (r_wins - 0.7) / (1 - 0.7))
+        n_dmg = np.maximum(0, (r_dmg - 0.4) / (1 - 0.4))
+        n_frags = np.maximum(0, (r_frags - 0.1) / (1 - 0.1))
+        # Step 3 - PR value:
+        weights = np.where(np.array(is_rank)[:, None], RANK_WEIGHTS, PVP_WEIGHTS)
+        personal_rating = weights[:, 0] * n_dmg + weights[:, 1] * n_frags + weights[:, 2] * n_wins
+        personal_rating = round_6(np.where(valid, personal_rating * battles_count, 0))
+        damage_rating = round_6(np.where(valid, r_dmg * battles_count, 0))
+        frags_rating = round_6(np.where(valid, r_frags * battles_count, 0))
+        # 写回数据
+        for cell, is_valid, pr, dr, fr in zip(cells, valid.tolist(), personal_rating, damage_rating, frags_rating):
+            if is_valid:
+                cell[PERSONAL_RATING:FRAGS_RATING+1] = (pr, dr, fr)
+            else:
+                cell[PERSONAL_RATING:FRAGS_RATING+1] = (-1, -1, -1)
+        return data
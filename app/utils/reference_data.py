@@ -0,0 +1,103 @@
+import os
+import time
+import threading
+from types import MappingProxyType
+from typing import Any
+
+from app.core import JSON_FILE_PATH, api_logger
+from .json_utils import JsonUtils
+
+
+def freeze(obj: Any) -> Any:
+    "将解析后的json数据转换为只读视图(dict->MappingProxyType, list->tuple)"
+    if isinstance(obj, dict):
+        return MappingProxyType({key: freeze(value) for key, value in obj.items()})
+    if isinstance(obj, list):
+        return tuple(freeze(value) for value in obj)
+    return obj
+
+
+class ReferenceData:
+    '''进程内共享的静态数据(船只数据、船只名称、别名表)
+
+    启动时加载一次，之后直接返回内存中的只读视图
+
+    读取时检查文件的修改时间，文件被更新后重新加载，新数据完整生成后再整体替换
+
+    本进程通过JsonUtils.write写入时，通过订阅的回调立即重新加载
+    '''
+    NAMES = ['ship_data', 'ship_name_wg', 'ship_name_lesta', 'ship_name_nick']
+    _data: dict[str, MappingProxyType] = {}
+    _mtimes: dict[str, int] = {}
+    _versions: dict[str, int] = {}
+    _stats: dict[str, dict] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_mtime(name: str) -> int:
+        file_path = os.path.join(JSON_FILE_PATH, f'{name}.json')
+        return os.stat(file_path).st_mtime_ns
+
+    @classmethod
+    def load_all(cls) -> None:
+        "程序启动时加载所有数据"
+        for name in cls.NAMES:
+            JsonUtils.subscribe(name, cls.reload)
+            try:
+                cls.reload(name)
+            except Exception as e:
+                api_logger.warning(f'Failed to load reference data {name}: {e}')
+
+    @classmethod
+    def reload(cls, name: str) -> MappingProxyType:
+        "从文件重新加载数据"
+        with cls._lock:
+            mtime = cls.get_mtime(name)
+            start_time = time.perf_counter()
+            data = freeze(JsonUtils.read(name))
+            load_time = round((time.perf_counter() - start_time) * 1000, 2)
+            # 整体替换，读取方不会拿到加载到一半的数据
+            cls._data[name] = data
+            cls._mtimes[name] = mtime
+            cls._versions[name] = cls._versions.get(name, 0) + 1
+            if name not in cls._stats:
+                cls._stats[name] = {'reloads': 0, 'load_time': 0, 'loaded_at': 0}
+            cls._stats[name]['reloads'] += 1
+            cls._stats[name]['load_time'] = load_time
+            cls._stats[name]['loaded_at'] = int(time.time())
+        api_logger.info(f'Reference data {name} loaded in {load_time} ms')
+        return data
+
+    @classmethod
+    def get(cls, name: str) -> MappingProxyType:
+        '''获取数据的只读视图
+
+        参数:
+            name: json文件名称
+        '''
+        data = cls._data.get(name)
+        if data is None or cls.get_mtime(name) != cls._mtimes[name]:
+            data = cls.reload(name)
+        return data
+
+    @classmethod
+    def get_version(cls, name: str) -> int:
+        "数据的版本号，每次重新加载后加1"
+        cls.get(name)
+        return cls._versions[name]
+
+    @classmethod
+    def get_file_version(cls, name: str) -> int:
+        "数据文件的修改时间(ns)，各进程间一致，可以用于redis等共享缓存的key"
+        cls.get(name)
+        return cls._mtimes[name]
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        "获取各数据的加载次数和加载耗时(ms)"
+        result = {}
+        for name, stats in cls._stats.items():
+            result[name] = dict(stats)
+            result[name]['version'] = cls._versions[name]
+            result[name]['file_version'] = cls._mtimes[name]
+        return result
@@ -0,0 +1,359 @@
+import time
+
+from app.constants import GameData
+
+
+def name_format(in_str: str) -> str:
+    in_str_list = in_str.split()
+    in_str = None
+    in_str = ''.join(in_str_list)
+    en_list = {
+        'a': ['à', 'á', 'â', 'ã', 'ä', 'å'],
+        'e': ['è', 'é', 'ê', 'ë'],
+        'i': ['ì', 'í', 'î', 'ï'],
+        'o': ['ó', 'ö', 'ô', 'õ', 'ò', 'ō'],
+        'u': ['ü', 'û', 'ú', 'ù', 'ū'],
+        'y': ['ÿ', 'ý'],
+        'l': ['ł']
+    }
+    for en, lar in en_list.items():
+        for index in lar:
+            if index in in_str:
+                in_str = in_str.replace(index, en)
+            if index.upper() in in_str:
+                in_str = in_str.replace(index.upper(), en.upper())
+    re_str = ['_', '-', '·', '.', '\'','(',')','（','）']
+    for index in re_str:
+        if index in in_str:
+            in_str = in_str.replace(index, '')
+    in_str = in_str.lower()
+    return in_str
+
+
+# 搜索语言对应的船只名称字段
+LANGUAGE_FIELDS = {
+    'cn': 'cn',
+    'ja': 'ja',
+    'ru': 'ru',
+    'en': 'en_l'
+}
+NAME_FIELDS = ['en', 'cn', 'ja', 'ru', 'en_l']
+OLD_SHIP_IDS = frozenset(GameData.OLD_SHIP_ID_LIST)
+
+
+def levenshtein(a: str, b: str) -> int:
+    "编辑距离，使用Myers的位并行算法"
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+    peq = {}
+    for i, c in enumerate(b):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv = mask
+    mv = 0
+    score = m
+    for c in a:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh = mh << 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return score
+
+def build_gram_index(names: list) -> dict:
+    "为名称建立单字和双字的倒排索引，值为船只的位置"
+    grams: dict[str, set] = {}
+    for position, name in enumerate(names):
+        for length in (1, 2):
+            for start in range(len(name) - length + 1):
+                gram = name[start:start+length]
+                if gram not in grams:
+                    grams[gram] = set()
+                grams[gram].add(position)
+    return grams
+
+
+class BKTree:
+    '''按编辑距离组织的BK树
+
+    节点为[名称, 船只位置集合, {距离: 子节点}]
+    '''
+    __slots__ = ('root', 'size')
+
+    def __init__(self, words: dict):
+        self.root = None
+        self.size = 0
+        for word, positions in words.items():
+            self.add(word, positions)
+
+    def add(self, word: str, positions: set) -> None:
+        if self.root is None:
+            self.root = [word, positions, {}]
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            distance = levenshtein(word, node[0])
+            if distance == 0:
+                node[1] |= positions
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [word, positions, {}]
+                self.size += 1
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int, deadline: float) -> list:
+        '''返回距离不超过max_distance的(距离, 船只位置)
+
+        超过deadline(perf_counter)后停止搜索，返回已找到的结果
+        '''
+        result = []
+        if self.root is None:
+            return result
+        stack = [self.root]
+        while stack:
+            if time.perf_counter() > deadline:
+                break
+            node = stack.pop()
+            distance = levenshtein(word, node[0])
+            if distance <= max_distance:
+                for position in node[1]:
+                    result.append((distance, position))
+            # 三角不等式，只有距离在[d-r, d+r]内的子树可能有结果
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return result
+
+
+class ShipNameIndex:
+    '''船只名称的搜索索引，每个静态数据版本构建一次
+
+    ship_ids: 船只id，顺序与ship_name_{server}.json一致
+    alias: 语言 -> {格式化后的别名: 船只id}
+    exact: 语言 -> {格式化后的名称: 船只id}
+    names: 名称字段 -> 按船只顺序排列的格式化后名称
+    grams: 名称字段 -> 单字/双字的倒排索引
+    fuzzy: 所有名称和别名的BK树
+    '''
+    __slots__ = ('ship_ids', 'alias', 'exact', 'names', 'grams', 'fuzzy')
+
+    def __init__(self, main_data: dict, nick_data: dict):
+        self.ship_ids = list(main_data)
+        # 别名表，同一个别名保留最先出现的船只
+        self.alias: dict[str, dict] = {}
+        for language, language_data in nick_data.items():
+            alias = {}
+            for ship_id, ship_data in language_data.items():
+                for index in ship_data:
+                    alias.setdefault(name_format(index), ship_id)
+            self.alias[language] = alias
+        # 缺少某个语言名称的船只记为空字符串，保持位置与ship_ids一致
+        self.names: dict[str, list] = {
+            field: [name_format(main_data[ship_id].get('ship_name', {}).get(field) or '') for ship_id in self.ship_ids]
+            for field in NAME_FIELDS
+        }
+        # 精确匹配，同一名称保留最先出现的船只，None为不额外匹配其他语言
+        self.exact: dict[str, dict] = {}
+        for language, field in list(LANGUAGE_FIELDS.items()) + [(None, None)]:
+            exact = {}
+            for position, ship_id in enumerate(self.ship_ids):
+                for name in (self.names['en'][position], self.names[field][position] if field else ''):
+                    if name:
+                        exact.setdefault(name, ship_id)
+            self.exact[language] = exact
+        self.grams: dict[str, dict] = {
+            field: build_gram_index(names) for field, names in self.names.items()
+        }
+        # BK树的构建耗时远大于其他索引，与其他索引一起构建，模糊搜索时只查询
+        self.fuzzy: BKTree = self.build_fuzzy()
+
+    def match_substring(self, field: str, content: str) -> set:
+        "返回名称中包含content的船只位置"
+        names = self.names[field]
+        if content == '':
+            return set(range(len(names)))
+        grams = self.grams[field]
+        if len(content) == 1:
+            return grams.get(content, set())
+        postings = []
+        for start in range(len(content) - 1):
+            posting = grams.get(content[start:start+2])
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        # 双字都存在不代表连续存在，需要再次确认
+        return {position for position in candidates if content in names[position]}
+
+    def search(self, content: str, language: str) -> list:
+        '''搜索船只，返回船只id列表
+
+        匹配顺序与原有的逐条匹配一致：别名表 -> 精确匹配 -> 包含匹配
+
+        参数:
+            content: 格式化后的搜索内容
+            language: 搜索的语言
+        '''
+        ship_id = self.alias.get(language, {}).get(content)
+        if ship_id is not None:
+            return [ship_id]
+        field = LANGUAGE_FIELDS.get(language)
+        ship_id = self.exact[language if field else None].get(content)
+        if ship_id is not None:
+            return [ship_id]
+        positions = self.match_substring('en', content)
+        if field:
+            positions = positions | self.match_substring(field, content)
+        old = content.endswith(('old','旧'))
+        result = []
+        for position in sorted(positions):
+            ship_id = self.ship_ids[position]
+            if old == False and ship_id in OLD_SHIP_IDS:
+                continue
+            result.append(ship_id)
+        return result
+
+    def build_fuzzy(self) -> BKTree:
+        "使用所有语言的名称和别名构建BK树"
+        words: dict[str, set] = {}
+        for names in self.names.values():
+            for position, name in enumerate(names):
+                words.setdefault(name, set()).add(position)
+        positions = {ship_id: position for position, ship_id in enumerate(self.ship_ids)}
+        for alias in self.alias.values():
+            for name, ship_id in alias.items():
+                # 别名表中可能有当前服务器不存在的船只
+                if ship_id in positions:
+                    words.setdefault(name, set()).add(positions[ship_id])
+        words.pop('', None)
+        return BKTree(words)
+
+    def fuzzy_search(self, content: str, top_k: int, max_distance: int, time_budget: float) -> list:
+        '''按编辑距离搜索船只，返回距离最小的top_k个船只id
+
+        参数:
+            content: 格式化后的搜索内容
+            top_k: 最多返回的数量
+            max_distance: 允许的最大编辑距离，同时不超过搜索内容长度的1/3
+            time_budget: 搜索的时间上限(秒)
+        '''
+        max_distance = min(max_distance, max(1, len(content) // 3))
+        deadline = time.perf_counter() + time_budget
+        old = content.endswith(('old','旧'))
+        result = []
+        for _, position in sorted(self.fuzzy.search(content, max_distance, deadline)):
+            ship_id = self.ship_ids[position]
+            if old == False and ship_id in OLD_SHIP_IDS:
+                continue
+            if ship_id not in result:
+                result.append(ship_id)
+            if len(result) >= top_k:
+                break
+        return result
+
+
+class ShipFilterIndex:
+    '''船只筛选的位图索引，每个船只类型/等级/国家对应一个位图
+
+    位图使用int保存，第i位为1表示第i条船满足条件，顺序与ship_name_{server}.json一致
+    '''
+    __slots__ = ('ship_ids', 'all', 'type', 'tier', 'nation')
+
+    def __init__(self, main_data: dict):
+        self.ship_ids = list(main_data)
+        self.all = (1 << len(self.ship_ids)) - 1
+        self.type: dict[str, int] = {}
+        self.tier: dict[int, int] = {}
+        self.nation: dict[str, int] = {}
+        for position, ship_id in enumerate(self.ship_ids):
+            ship_info = main_data[ship_id]
+            bit = 1 << position
+            for bitmaps, value in (
+                (self.type, ship_info['type']),
+                (self.tier, ship_info['tier']),
+                (self.nation, ship_info['nation'])
+            ):
+                bitmaps[value] = bitmaps.get(value, 0) | bit
+
+    def match(self, types: list, tiers: list, nations: list) -> int:
+        '''返回满足条件的船只位图，同一条件内取并集，不同条件间取交集
+
+        条件为空列表或None时不做限制
+        '''
+        bits = self.all
+        for bitmaps, values in ((self.type, types), (self.tier, tiers), (self.nation, nations)):
+            if not values:
+                continue
+            mask = 0
+            for value in values:
+                mask |= bitmaps.get(value, 0)
+            bits &= mask
+            if bits == 0:
+                break
+        return bits
+
+    def get_ship_ids(self, bits: int, limit: int = None) -> list:
+        "按顺序取出位图中的船只id，最多取limit条"
+        result = []
+        while bits and (limit is None or len(result) < limit):
+            low = bits & -bits
+            result.append(self.ship_ids[low.bit_length() - 1])
+            bits ^= low
+        return result
+
+
+class ShipIndex:
+    "按服务器缓存船只索引，静态数据版本变化后重新构建"
+    _name_indexes: dict[str, tuple[tuple, ShipNameIndex]] = {}
+    _filter_indexes: dict[str, tuple[int, ShipFilterIndex]] = {}
+
+    @classmethod
+    def get_name_index(cls, server: str, versions: tuple, main_data: dict, nick_data: dict) -> ShipNameIndex:
+        '''获取船只名称索引
+
+        参数:
+            server: wg/lesta
+            versions: 别名表和船只名称的数据版本
+        '''
+        if cls.has_name_index(server, versions):
+            return cls._name_indexes[server][1]
+        index = ShipNameIndex(main_data, nick_data)
+        cls._name_indexes[server] = (versions, index)
+        return index
+
+    @classmethod
+    def has_name_index(cls, server: str, versions: tuple) -> bool:
+        "指定版本的船只名称索引是否已经构建"
+        cached = cls._name_indexes.get(server)
+        return cached is not None and cached[0] == versions
+
+    @classmethod
+    def get_filter_index(cls, server: str, version: int, main_data: dict) -> ShipFilterIndex:
+        '''获取船只筛选索引
+
+        参数:
+            server: wg/lesta
+            version: 船只名称的数据版本，船只数据更新后重新构建
+        '''
+        cached = cls._filter_indexes.get(server)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        index = ShipFilterIndex(main_data)
+        cls._filter_indexes[server] = (version, index)
+        return index
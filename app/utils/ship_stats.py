@@ -0,0 +1,89 @@
+from operator import itemgetter
+
+
+# ShipStats中各字段的位置
+STATS_FIELDS = (
+    'battles_count',
+    'wins',
+    'damage_dealt',
+    'frags',
+    'original_exp',
+    'personal_rating',
+    'damage_rating',
+    'frags_rating'
+)
+(
+    BATTLES_COUNT,
+    WINS,
+    DAMAGE_DEALT,
+    FRAGS,
+    ORIGINAL_EXP,
+    PERSONAL_RATING,
+    DAMAGE_RATING,
+    FRAGS_RATING
+) = range(len(STATS_FIELDS))
+# 接口返回的统计数据中需要的字段，PR相关的三个字段由RatingEngine计算
+get_original_stats = itemgetter(*STATS_FIELDS[:PERSONAL_RATING])
+
+
+class ShipStats:
+    '''单条船一种战斗类型的统计数据
+
+    数据为固定顺序的list，字段顺序见STATS_FIELDS，没有数据的战斗类型为None
+
+    一个用户有上千条船x多种战斗类型，相比8个key的dict内存占用约为一半，
+    传给进程池时pickle的数据量和耗时也更少
+
+    只在进程内部使用，和json交互(接口返回值、缓存等)时通过from_dict/to_dict转换
+    '''
+
+    @staticmethod
+    def empty() -> list:
+        return [0, 0, 0, 0, 0, 0, 0, 0]
+
+    @staticmethod
+    def from_response(data: dict) -> list:
+        "从接口返回的统计数据生成，PR相关字段为0"
+        return [*get_original_stats(data), 0, 0, 0]
+
+    @staticmethod
+    def from_dict(data: dict) -> list:
+        "从dict生成，缺少的字段为0"
+        return [data.get(field, 0) for field in STATS_FIELDS]
+
+    @staticmethod
+    def to_dict(stats: list) -> dict:
+        return dict(zip(STATS_FIELDS, stats))
+
+    @staticmethod
+    def add(total: list, stats: list) -> None:
+        "累加接口返回的原始字段"
+        total[BATTLES_COUNT] += stats[BATTLES_COUNT]
+        total[WINS] += stats[WINS]
+        total[DAMAGE_DEALT] += stats[DAMAGE_DEALT]
+        total[FRAGS] += stats[FRAGS]
+        total[ORIGINAL_EXP] += stats[ORIGINAL_EXP]
+
+
+def ships_to_dict(data: dict) -> dict:
+    '''将{ship_id: {battle_type: stats}}转换为原有的dict格式
+
+    没有数据的战斗类型为{}
+    '''
+    return {
+        ship_id: {
+            battle_type: ShipStats.to_dict(stats) if stats else {}
+            for battle_type, stats in ship_data.items()
+        }
+        for ship_id, ship_data in data.items()
+    }
+
+def ships_from_dict(data: dict) -> dict:
+    "ships_to_dict的逆转换，没有数据的战斗类型为None"
+    return {
+        ship_id: {
+            battle_type: ShipStats.from_dict(stats) if stats else None
+            for battle_type, stats in ship_data.items()
+        }
+        for ship_id, ship_data in data.items()
+    }
@@ -5,6 +5,11 @@ from datetime import datetime, timezone
 
 from middlewares import db_pool
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    orjson = None
+
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
@@ -30,6 +35,8 @@ def decompress(gzip_bytes: bytes):
     # 数据解压
     if gzip_bytes:
         decompressed = gzip.decompress(gzip_bytes)
+        if orjson:
+            return orjson.loads(decompressed)
         return json.loads(decompressed)
     else:
         return None
\ No newline at end of file
@@ -20,4 +20,11 @@ MAIN_DB = os.getenv("MAIN_DB")
 
 REDIS_HOST = os.getenv("REDIS_HOST")
 REDIS_PORT = os.getenv("REDIS_PORT")
-REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
\ No newline at end of file
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", 20))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", 20))
+RATE_LIMIT_BACKGROUND_RATIO = float(os.getenv("RATE_LIMIT_BACKGROUND_RATIO", 0.5))
+# 后台任务等待令牌的最长时间(秒)，超过后按请求失败处理
+RATE_LIMIT_BACKGROUND_MAX_WAIT = 60
@@ -0,0 +1,75 @@
+import json
+from itertools import repeat
+from operator import itemgetter
+from collections import namedtuple
+
+
+# ------------------------------------------------------
+# 船只统计数据的紧凑存储
+# 功能逻辑：
+# 1. /ships/{type}/ 接口解析后，统计数据替换为固定顺序的ShipStats(namedtuple)
+# 2. 一个用户上千条船x多种战斗类型，namedtuple的内存占用约为同样字段dict的1/4
+# 3. 写入数据库的数据格式不变，仍为每种战斗类型12个值的list
+# ------------------------------------------------------
+
+# 船只数据接口需要保留的统计字段
+SHIPS_FIELDS = (
+    'battles_count', 'wins', 'losses', 'damage_dealt', 'frags', 'survived',
+    'scouting_damage', 'assist_damage', 'art_agro', 'original_exp',
+    'planes_killed', 'hits_by_main', 'shots_by_main'
+)
+ShipStats = namedtuple('ShipStats', SHIPS_FIELDS)
+# 写入数据库的12个值，第7个值为scouting_damage
+get_row = itemgetter(0, 1, 2, 3, 4, 5, 6, 8, 9, 10, 11, 12)
+# 莱服第7个值为max(assist_damage, scouting_damage)
+get_row_head = itemgetter(0, 1, 2, 3, 4, 5)
+get_row_tail = itemgetter(8, 9, 10, 11, 12)
+
+
+def project_ships(result: dict) -> dict:
+    "原地替换接口返回值中的统计数据，包含battles_count的对象即为船只的统计数据，缺少的字段记为0"
+    data = result.get('data') if isinstance(result, dict) else None
+    if not isinstance(data, dict):
+        return result
+    for user_data in data.values():
+        # 隐藏战绩的用户没有statistics
+        if not isinstance(user_data, dict) or not isinstance(user_data.get('statistics'), dict):
+            continue
+        for ship_data in user_data['statistics'].values():
+            for battle_type, stats in ship_data.items():
+                if 'battles_count' in stats:
+                    ship_data[battle_type] = ShipStats(*map(stats.get, SHIPS_FIELDS, repeat(0)))
+    return result
+
+def loads_ships(content: bytes | str) -> dict:
+    "解析船只数据接口的返回值，统计数据转换为ShipStats"
+    return project_ships(json.loads(content))
+
+
+def responeses_processing(responses: list):
+    battles_dict = {}
+    statis_dict = {}
+    if len(responses) == 4:
+        type_list = ['pvp_solo', 'pvp_div2', 'pvp_div3', 'rank_solo']
+    else:
+        type_list = ['pvp_solo', 'pvp_div2', 'pvp_div3', 'rank_solo', 'rating_solo', 'rating_div']
+    lesta = len(type_list) == 6
+    for i, response in enumerate(responses):
+        battle_type = type_list[i]
+        for ship_id, ship_data in response.items():
+            if ship_id not in battles_dict:
+                battles_dict[ship_id] = 0
+                statis_dict[ship_id] = [[] for _ in type_list]
+            stats: ShipStats = ship_data[battle_type]
+            if stats == {}:
+                continue
+            battles_dict[ship_id] += stats.battles_count
+            if lesta:
+                statis_dict[ship_id][i] = [
+                    *get_row_head(stats),
+                    max(stats.assist_damage, stats.scouting_damage),
+                    *get_row_tail(stats)
+                ]
+            else:
+                statis_dict[ship_id][i] = list(get_row(stats))
+    return battles_dict, statis_dict
@@ -8,8 +8,10 @@ import asyncio
 from datetime import datetime, timezone
 from logger import logger
 from middlewares import redis_client
+from limiter import acquire_async
 from utils import now_iso, del_recent, del_recents, update_base
 from settings import DATA_DIR
+from ship_stats import loads_ships, responeses_processing
 
 VORTEX_API_URL_LIST = {
     1: 'https://vortex.worldofwarships.asia',
@@ -82,12 +84,16 @@ def diff_lists(new_data, old_data):
         return None
     return result
 
-async def fetch_data(url):
+async def fetch_data(url, projection: bool = False):
     try:
+        await acquire_async(url)
         async with httpx.AsyncClient() as client:
             res = await client.get(url, timeout=5)
             requset_code = res.status_code
-            requset_result = res.json()
+            if projection:
+                requset_result = loads_ships(res.content)
+            else:
+                requset_result = res.json()
             if requset_code == 200:
                 return requset_result['data']
             if requset_code == 404:
@@ -121,8 +127,9 @@ async def get_data(region_id: int, account_id: int, ac1: str = None):
     tasks = []
     responses = []
     async with asyncio.Semaphore(len(urls)):
-        for url in urls:
-            tasks.append(fetch_data(url))
+        for index, url in enumerate(urls):
+            # 第一个为用户基本数据，其余为船只数据
+            tasks.append(fetch_data(url, index != 0))
         responses = await asyncio.gather(*tasks)
         return responses
 
@@ -164,67 +171,6 @@ def init_db_if_needed(
         if 'conn' in locals():
             conn.close()
 
-def responeses_processing(responses: list):
-    battles_dict = {}
-    statis_dict = {}
-    if len(responses) == 4:
-        type_list = ['pvp_solo', 'pvp_div2', 'pvp_div3', 'rank_solo']
-        i = 0
-        for response in responses:
-            for ship_id, ship_data in response.items():
-                if ship_id not in battles_dict:
-                    battles_dict[ship_id] = 0
-                    statis_dict[ship_id] = [[],[],[],[]]
-                battle_type = type_list[i]
-                if ship_data[battle_type] != {}:
-                    battles_dict[ship_id] += ship_data[battle_type]['battles_count']
-                    statis_dict[ship_id][i] = [
-                        ship_data[battle_type]['battles_count'],
-                        ship_data[battle_type]['wins'],
-                        ship_data[battle_type]['losses'],
-                        ship_data[battle_type]['damage_dealt'],
-                        ship_data[battle_type]['frags'],
-                        ship_data[battle_type]['survived'],
-                        ship_data[battle_type]['scouting_damage'],
-                        ship_data[battle_type]['art_agro'],
-                        ship_data[battle_type]['original_exp'],
-                        ship_data[battle_type]['planes_killed'],
-                        ship_data[battle_type]['hits_by_main'],
-                        ship_data[battle_type]['shots_by_main']
-                    ]
-            i += 1
-        return battles_dict, statis_dict
-    else:
-        type_list = ['pvp_solo', 'pvp_div2', 'pvp_div3', 'rank_solo', 'rating_solo', 'rating_div']
-        i = 0
-        for response in responses:
-            for ship_id, ship_data in response.items():
-                if ship_id not in battles_dict:
-                    battles_dict[ship_id] = 0
-                    statis_dict[ship_id] = [[],[],[],[],[],[]]
-                battle_type = type_list[i]
-                if ship_data[battle_type] != {}:
-                    battles_dict[ship_id] += ship_data[battle_type]['battles_count']
-                    statis_dict[ship_id][i] = [
-                        ship_data[battle_type]['battles_count'],
-                        ship_data[battle_type]['wins'],
-                        ship_data[battle_type]['losses'],
-                        ship_data[battle_type]['damage_dealt'],
-                        ship_data[battle_type]['frags'],
-                        ship_data[battle_type]['survived'],
-                        max(
-                            ship_data[battle_type]['assist_damage'], 
-                            ship_data[battle_type].get('scouting_damage', 0)
-                        ),
-                        ship_data[battle_type]['art_agro'],
-                        ship_data[battle_type]['original_exp'],
-                        ship_data[battle_type]['planes_killed'],
-                        ship_data[battle_type]['hits_by_main'],
-                        ship_data[battle_type]['shots_by_main']
-                    ]
-            i += 1
-        return battles_dict, statis_dict
-
 async def update(
     region_id: int, 
     account_id: int, 
@@ -7,7 +7,7 @@ import traceback
 
 from logger import logger
 from settings import CLIENT_NAME, REFRESH_INTERVAL, BATCH_SIZE
-from middlewares import db_pool, redis_client, celery_app
+from middlewares import redis_client, celery_app, read_connection, pool_stats
 from utils import get_refresh_time, get_max_id, get_recent_user
 
 
@@ -21,7 +21,8 @@ def main():
         max_id = get_max_id()
         recent, recents = get_recent_user()
         logger.info(f'MaxID: {max_id} | RecentUser: {len(recent)} | RecentsUser: {len(recents)}')
-        conn = db_pool.connection()
+        # 全表扫描优先使用从库，避免和接口的查询竞争主库
+        conn = read_connection()
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         try:
             for offset in range(0, max_id, BATCH_SIZE):
@@ -72,6 +73,7 @@ def main():
             cursor.close()
             conn.close()
         logger.info(f'This loop is complete. Send {send_tasks} tasks.')
+        logger.info(f'Read connections: {pool_stats}')
         ct = time.time() - st
         if ct < REFRESH_INTERVAL:
             logger.info(f'This loop took {round(ct,2)} seconds')
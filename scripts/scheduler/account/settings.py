@@ -14,6 +14,11 @@ MYSQL_HOST = os.getenv("MYSQL_HOST")
 MYSQL_PORT = int(os.getenv("MYSQL_PORT", 3306))
 MYSQL_USERNAME = os.getenv("MYSQL_USERNAME")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
+# 从库，为空时不启用，全表扫描的读取在复制延迟不超过MYSQL_REPLICA_MAX_LAG秒时使用从库
+MYSQL_REPLICA_HOST = os.getenv("MYSQL_REPLICA_HOST", "")
+MYSQL_REPLICA_PORT = int(os.getenv("MYSQL_REPLICA_PORT", 3306))
+MYSQL_REPLICA_MAX_LAG = int(os.getenv("MYSQL_REPLICA_MAX_LAG", 5))
+REPLICA_CHECK_INTERVAL = 30
 
 MAIN_DB = os.getenv("MAIN_DB")
 
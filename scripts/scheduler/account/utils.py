@@ -1,5 +1,5 @@
 import pymysql
-from middlewares import db_pool
+from middlewares import read_connection
 
 from logger import logger
 
@@ -31,7 +31,7 @@ def get_refresh_time(activity_level: int, lbt: int, enable_recent: bool, enable_
 
 def get_max_id():
     # 先获取数据库中id最大值，确定循环上限
-    conn = db_pool.connection()
+    conn = read_connection()
     cursor = conn.cursor(pymysql.cursors.DictCursor)
     try:
         sql = """
@@ -52,7 +52,7 @@ def get_recent_user():
     recent_user = set()
     recents_user = set()
     # 先获取数据库中id最大值，确定循环上限
-    conn = db_pool.connection()
+    conn = read_connection()
     cursor = conn.cursor(pymysql.cursors.DictCursor)
     try:
         sql = """
@@ -10,7 +10,7 @@ import signal
 
 from logger import logger
 from settings import CLIENT_NAME, REFRESH_INTERVAL, BATCH_SIZE, DATA_DIR
-from middlewares import redis_client, db_pool
+from middlewares import redis_client, db_pool, pool_stats
 from utils import get_max_id, get_version, get_cache_data, decompress, compress, get_update_list
 
 
@@ -25,6 +25,7 @@ async def main():
         logger.info(f'MaxID: {max_id}')
         total_update, update_list = get_update_list(max_id, BATCH_SIZE)
         logger.info(f'Database traversal complete. {total_update} users need to be updated')
+        logger.info(f'Read connections: {pool_stats}')
         versions = get_version()
         logger.info(f'ASIA: {versions[0]} | EU: {versions[1]} | NA: {versions[2]} | RU: {versions[3]} | CN: {versions[4]} ')
         i = 1
@@ -1,3 +1,4 @@
+import time
 import pymysql
 import redis
 from dbutils.pooled_db import PooledDB
@@ -5,6 +6,7 @@ from dbutils.pooled_db import PooledDB
 from logger import logger
 from settings import (
     MYSQL_HOST, MYSQL_PORT, MYSQL_USERNAME, MYSQL_PASSWORD,
+    MYSQL_REPLICA_HOST, MYSQL_REPLICA_PORT, MYSQL_REPLICA_MAX_LAG, REPLICA_CHECK_INTERVAL,
     REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, MAIN_DB
 )
 
@@ -36,4 +38,79 @@ try:
         database=MAIN_DB
     )
 except:
-    logger.error('MySQL initialization failed!')
\ No newline at end of file
+    logger.error('MySQL initialization failed!')
+
+# 从库连接池，未配置从库时为None
+replica_pool = None
+if MYSQL_REPLICA_HOST:
+    try:
+        replica_pool = PooledDB(
+            creator=pymysql,
+            maxconnections=2,     # 最大连接数
+            mincached=0,           # 第一次使用时再创建连接，从库不可用时不影响启动
+            maxcached=1,           # 池中最大空闲连接
+            blocking=True,         # 连接用完是否阻塞
+            host=MYSQL_REPLICA_HOST,
+            port=MYSQL_REPLICA_PORT,
+            user=MYSQL_USERNAME,
+            password=MYSQL_PASSWORD,
+            charset="utf8mb4",
+            autocommit=True,       # 从库只用于SELECT
+            database=MAIN_DB
+        )
+    except:
+        logger.error('MySQL replica initialization failed!')
+
+# 从库状态，lag为None表示从库不可用
+replica_state = {'lag': None, 'checked_at': 0.0}
+# 只读连接来自各连接池的次数
+pool_stats = {'primary': 0, 'replica': 0, 'fallbacks': 0}
+
+def check_replica_lag():
+    "读取从库的复制延迟(秒)，从库不可用或者复制停止时返回None"
+    try:
+        conn = replica_pool.connection()
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS;")
+            except pymysql.err.ProgrammingError:
+                # MySQL 8.0.22之前的版本不支持REPLICA关键字
+                cursor.execute("SHOW SLAVE STATUS;")
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception as e:
+        logger.warning(f'MySQL replica check failed: {type(e).__name__}')
+        return None
+    # 没有结果说明该实例不是从库，延迟记为0
+    if not row:
+        return 0
+    for key in ('Seconds_Behind_Source', 'Seconds_Behind_Master'):
+        if key in row:
+            return row[key]
+    return None
+
+def read_connection():
+    '''获取只读查询使用的连接
+
+    从库可用且复制延迟不超过MYSQL_REPLICA_MAX_LAG时使用从库，否则使用主库的db_pool
+    '''
+    if replica_pool is not None:
+        now = time.monotonic()
+        if now - replica_state['checked_at'] > REPLICA_CHECK_INTERVAL:
+            replica_state['lag'] = check_replica_lag()
+            replica_state['checked_at'] = now
+        lag = replica_state['lag']
+        if lag is not None and lag <= MYSQL_REPLICA_MAX_LAG:
+            try:
+                conn = replica_pool.connection()
+                pool_stats['replica'] += 1
+                return conn
+            except Exception as e:
+                replica_state['lag'] = None
+                logger.warning(f'MySQL replica connection failed: {type(e).__name__}')
+        pool_stats['fallbacks'] += 1
+    pool_stats['primary'] += 1
+    return db_pool.connection()
\ No newline at end of file
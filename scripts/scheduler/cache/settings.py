@@ -15,9 +15,21 @@ MYSQL_HOST = os.getenv("MYSQL_HOST")
 MYSQL_PORT = int(os.getenv("MYSQL_PORT", 3306))
 MYSQL_USERNAME = os.getenv("MYSQL_USERNAME")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
+# 从库，为空时不启用，全表扫描的读取在复制延迟不超过MYSQL_REPLICA_MAX_LAG秒时使用从库
+MYSQL_REPLICA_HOST = os.getenv("MYSQL_REPLICA_HOST", "")
+MYSQL_REPLICA_PORT = int(os.getenv("MYSQL_REPLICA_PORT", 3306))
+MYSQL_REPLICA_MAX_LAG = int(os.getenv("MYSQL_REPLICA_MAX_LAG", 5))
+REPLICA_CHECK_INTERVAL = 30
 
 MAIN_DB = os.getenv("MAIN_DB")
 
 REDIS_HOST = os.getenv("REDIS_HOST")
 REDIS_PORT = os.getenv("REDIS_PORT")
-REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
\ No newline at end of file
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", 20))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", 20))
+RATE_LIMIT_BACKGROUND_RATIO = float(os.getenv("RATE_LIMIT_BACKGROUND_RATIO", 0.5))
+# 后台任务等待令牌的最长时间(秒)，超过后按请求失败处理
+RATE_LIMIT_BACKGROUND_MAX_WAIT = 60
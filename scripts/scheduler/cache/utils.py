@@ -6,8 +6,14 @@ import pymysql
 import asyncio
 import httpx
 from datetime import datetime
-from middlewares import db_pool, redis_client
+from middlewares import db_pool, redis_client, read_connection
 from logger import logger
+from limiter import acquire_async
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    orjson = None
 
 
 VORTEX_API_URL_LIST = {
@@ -24,12 +30,15 @@ def now_iso() -> str:
 def compress(data: dict):
     # 数据压缩
     if data:
-        json_str = json.dumps(
-            data,
-            ensure_ascii=False,
-            separators=(",", ":")  # 去空格，减小体积
-        )
-        json_bytes = json_str.encode("utf-8")
+        if orjson:
+            json_bytes = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            json_str = json.dumps(
+                data,
+                ensure_ascii=False,
+                separators=(",", ":")  # 去空格，减小体积
+            )
+            json_bytes = json_str.encode("utf-8")
         return gzip.compress(json_bytes)
     else:
         return None
@@ -38,13 +47,15 @@ def decompress(gzip_bytes: bytes):
     # 数据解压
     if gzip_bytes:
         decompressed = gzip.decompress(gzip_bytes)
+        if orjson:
+            return orjson.loads(decompressed)
         return json.loads(decompressed)
     else:
         return None
 
 def get_max_id():
     # 先获取数据库中id最大值，确定循环上限
-    conn = db_pool.connection()
+    conn = read_connection()
     cursor = conn.cursor(pymysql.cursors.DictCursor)
     try:
         sql = f"""
@@ -61,7 +72,7 @@ def get_max_id():
 
 def get_version():
     # 先获取数据库中的游戏版本
-    conn = db_pool.connection()
+    conn = read_connection()
     cursor = conn.cursor(pymysql.cursors.DictCursor)
     try:
         sql = f"""
@@ -87,7 +98,7 @@ def get_update_list(max_id: int, batch_size: int):
     # 从数据库中批量读取并判断那些用户需要更新
     total_update = 0
     update_list = [[],[],[],[],[]]
-    conn = db_pool.connection()
+    conn = read_connection()
     cursor = conn.cursor(pymysql.cursors.DictCursor)
     try:
         for offset in range(0, max_id, batch_size):
@@ -117,12 +128,38 @@ def get_update_list(max_id: int, batch_size: int):
         conn.close()
     return total_update, update_list
 
-async def fetch_data(url):
+# 船只数据接口只保留需要的统计字段，减少解析后的内存占用
+SHIPS_KEYS = frozenset([
+    'battles_count', 'wins', 'damage_dealt', 'frags', 'original_exp',
+    'survived', 'max_exp', 'max_damage_dealt', 'max_frags'
+])
+
+def loads_ships(content: bytes) -> dict:
+    "解析船只数据接口的返回值，包含battles_count的对象即为船只的统计数据，只保留SHIPS_KEYS中的字段"
+    result = orjson.loads(content) if orjson else json.loads(content)
+    data = result.get('data') if isinstance(result, dict) else None
+    if not isinstance(data, dict):
+        return result
+    for user_data in data.values():
+        # 隐藏战绩的用户没有statistics
+        if not isinstance(user_data, dict) or not isinstance(user_data.get('statistics'), dict):
+            continue
+        for ship_data in user_data['statistics'].values():
+            for battle_type, stats in ship_data.items():
+                if 'battles_count' in stats:
+                    ship_data[battle_type] = {key: stats[key] for key in SHIPS_KEYS if key in stats}
+    return result
+
+async def fetch_data(url, projection: bool = False):
     try:
+        await acquire_async(url)
         async with httpx.AsyncClient() as client:
             res = await client.get(url, timeout=5)
             requset_code = res.status_code
-            requset_result = res.json()
+            if projection:
+                requset_result = loads_ships(res.content)
+            else:
+                requset_result = res.json()
             if requset_code == 200:
                 return requset_result['data']
             if requset_code == 404:
@@ -161,8 +198,9 @@ async def get_cache_data(
     tasks = []
     responses = []
     async with asyncio.Semaphore(len(urls)):
-        for url in urls:
-            tasks.append(fetch_data(url))
+        for index, url in enumerate(urls):
+            # 第一个为用户基本数据，其余为船只数据
+            tasks.append(fetch_data(url, index != 0))
         responses = await asyncio.gather(*tasks)
     now_time = now_iso()
     key = f"metrics:http:{now_time[:10]}:{region}_total"
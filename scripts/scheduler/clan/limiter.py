@@ -0,0 +1,91 @@
+import time
+import asyncio
+from urllib.parse import urlsplit
+
+from logger import logger
+from middlewares import redis_client
+from settings import (
+    RATE_LIMIT_ENABLED, RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_BACKGROUND_RATIO,
+    RATE_LIMIT_BACKGROUND_MAX_WAIT
+)
+
+
+# ------------------------------------------------------
+# 外部接口的全局限流(GCRA)，与API共用redis中同一个host的限流key
+# 脚本均为后台任务，突发容量按RATE_LIMIT_BACKGROUND_RATIO缩小，
+# 高峰期优先放行API的交互请求
+# 等待超过RATE_LIMIT_BACKGROUND_MAX_WAIT时抛出RateLimitExceeded，
+# 由调用方按请求失败处理，避免redis中的key异常时一直阻塞
+# ------------------------------------------------------
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if tat == nil or tat < now then
+    tat = now
+end
+if tat - now > tolerance then
+    return math.ceil(tat - now - tolerance)
+end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now) + 1000)
+return 0
+"""
+
+INTERVAL = 1 / RATE_LIMIT_PER_SECOND
+TOLERANCE = max(RATE_LIMIT_BURST - 1, 0) * INTERVAL * RATE_LIMIT_BACKGROUND_RATIO
+
+gcra_script = redis_client.register_script(GCRA_SCRIPT)
+# redis不可用时退回进程内限流
+local_tats = {}
+
+
+class RateLimitExceeded(Exception):
+    "等待令牌超时"
+    pass
+
+
+def try_acquire(key: str) -> float:
+    # 尝试获取令牌，返回需要等待的秒数
+    try:
+        retry_after = gcra_script(keys=[key], args=[INTERVAL * 1000, TOLERANCE * 1000])
+        return int(retry_after) / 1000
+    except Exception as e:
+        logger.warning(f'Rate limiter fallback to local: {type(e).__name__}')
+        now = time.monotonic()
+        tat = max(local_tats.get(key, now), now)
+        if tat - now > TOLERANCE:
+            return tat - now - TOLERANCE
+        local_tats[key] = tat + INTERVAL
+        return 0
+
+def acquire(url: str) -> None:
+    # 请求外部接口前获取令牌(阻塞)
+    if not RATE_LIMIT_ENABLED:
+        return
+    key = f'ratelimit:{urlsplit(url).hostname}'
+    deadline = time.monotonic() + RATE_LIMIT_BACKGROUND_MAX_WAIT
+    while True:
+        retry_after = try_acquire(key)
+        if retry_after == 0:
+            return
+        if time.monotonic() + retry_after > deadline:
+            raise RateLimitExceeded(f'{key} retry after {round(retry_after, 2)}s')
+        time.sleep(retry_after)
+
+async def acquire_async(url: str) -> None:
+    # 请求外部接口前获取令牌(协程)
+    if not RATE_LIMIT_ENABLED:
+        return
+    key = f'ratelimit:{urlsplit(url).hostname}'
+    deadline = time.monotonic() + RATE_LIMIT_BACKGROUND_MAX_WAIT
+    while True:
+        # redis_client为同步客户端，在线程中执行避免阻塞事件循环
+        retry_after = await asyncio.to_thread(try_acquire, key)
+        if retry_after == 0:
+            return
+        if time.monotonic() + retry_after > deadline:
+            raise RateLimitExceeded(f'{key} retry after {round(retry_after, 2)}s')
+        await asyncio.sleep(retry_after)
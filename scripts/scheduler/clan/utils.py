@@ -5,6 +5,7 @@ from datetime import datetime, time
 from logger import logger
 from settings import SEASON_ID, SEASON_FINISH, SEASON_START
 from middlewares import db_pool, redis_client
+from limiter import acquire
 
 
 CLAN_API_URL_LIST = {
@@ -71,6 +72,7 @@ def formtime2timestamp(formtime: str):
 
 def fetch_data(url):
     try:
+        acquire(url)
         resp = requests.get(url,timeout=5)
         if resp.status_code == 200:
             result = resp.json()
@@ -6,7 +6,7 @@ import signal
 from logger import logger
 from settings import CLIENT_NAME, REFRESH_INTERVAL
 from middlewares import db_pool, redis_client
-from utils import get_clan_users, get_max_id
+from utils import get_clan_users, get_max_id, provision_users
 
 
 
@@ -60,52 +60,8 @@ def main():
                 cursor.execute(sql, user_ids)
                 existing_ids = {row['account_id'] for row in cursor.fetchall()}
                 missing_ids = set(user_ids) - existing_ids
-                # 写入数据库中不存在的用户
-                for account_id in missing_ids:
-                    sql = """
-                        INSERT INTO user_base (
-                            region_id, 
-                            account_id, 
-                            username
-                        ) VALUES (
-                            %s, %s, %s
-                        );
-                    """
-                    cursor.execute(sql, [region_id, account_id, f'User_{account_id}'])
-                    sql = """
-                        INSERT INTO user_stats (
-                            account_id
-                        ) VALUES (
-                            %s
-                        );
-                    """
-                    cursor.execute(sql, [account_id])
-                    sql = """
-                        INSERT INTO user_clan (
-                            account_id
-                        ) VALUES (
-                            %s
-                        );
-                    """
-                    cursor.execute(sql, [account_id])
-                    sql = """
-                        INSERT INTO user_cache (
-                            account_id
-                        ) VALUES (
-                            %s
-                        );
-                    """
-                    cursor.execute(sql, [account_id])
-                    sql = """
-                        UPDATE user_base 
-                        SET 
-                            username = %s, 
-                            touch_at = CURRENT_TIMESTAMP 
-                        WHERE region_id = %s 
-                        AND account_id = %s;
-                    """
-                    cursor.execute(sql,[users[account_id], region_id, account_id])
-                    conn.commit()
+                # 写入数据库中不存在的用户，和工会成员的更新在同一个事务中提交
+                provision_users(cursor, region_id, {account_id: users[account_id] for account_id in missing_ids})
                 # 删除已不再工会内的用户
                 sql = """
                     SELECT 
@@ -114,16 +70,20 @@ def main():
                     WHERE clan_id = %s;
                 """
                 cursor.execute(sql,[clan_id])
-                for existing_clan_user in cursor.fetchall():
-                    if existing_clan_user['account_id'] not in user_ids:
-                        sql = """
-                            UPDATE user_clan 
-                            SET 
-                                clan_id = NULL, 
-                                touch_at = CURRENT_TIMESTAMP 
-                            WHERE account_id = %s;
-                        """
-                        cursor.execute(sql,[existing_clan_user['account_id']])
+                left_ids = [
+                    row['account_id'] for row in cursor.fetchall() 
+                    if row['account_id'] not in users
+                ]
+                if left_ids:
+                    left_placeholders = ",".join(["%s"] * len(left_ids))
+                    sql = f"""
+                        UPDATE user_clan 
+                        SET 
+                            clan_id = NULL, 
+                            touch_at = CURRENT_TIMESTAMP 
+                        WHERE account_id IN ({left_placeholders});
+                    """
+                    cursor.execute(sql, left_ids)
                 # 刷新工会内所有用户的记录
                 sql = f"""
                     UPDATE user_clan 
@@ -134,7 +94,7 @@ def main():
                 """
                 cursor.execute(sql, [clan_id] + user_ids)
                 conn.commit()
-                logger.info(f'[{index}/{max_id}] {region_id}-{clan_id} | Members: {len(user_ids)}')
+                logger.info(f'[{index}/{max_id}] {region_id}-{clan_id} | Members: {len(user_ids)} | New: {len(missing_ids)}')
             except Exception as e:
                 conn.rollback()
                 logger.error((f"{traceback.format_exc()}"))
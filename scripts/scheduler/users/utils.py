@@ -4,6 +4,8 @@ from datetime import datetime
 
 from logger import logger
 from middlewares import db_pool, redis_client
+from settings import PROVISION_BATCH_SIZE
+from limiter import acquire
 
 
 CLAN_API_URL_LIST = {
@@ -34,8 +36,39 @@ def get_max_id():
         cursor.close()
         conn.close()
 
+def provision_users(cursor, region_id: int, users: dict):
+    # 在调用方的事务中批量写入新用户，已存在的用户跳过
+    # 每张表每PROVISION_BATCH_SIZE个用户一条多行INSERT IGNORE，返回user_base中新写入的行数
+    inserted = 0
+    account_ids = list(users.keys())
+    for offset in range(0, len(account_ids), PROVISION_BATCH_SIZE):
+        batch = account_ids[offset:offset+PROVISION_BATCH_SIZE]
+        placeholders = ", ".join(["(%s, %s, %s, CURRENT_TIMESTAMP)"] * len(batch))
+        sql = f"""
+            INSERT IGNORE INTO user_base (
+                region_id, 
+                account_id, 
+                username, 
+                touch_at
+            ) VALUES {placeholders};
+        """
+        params = []
+        for account_id in batch:
+            params += [region_id, account_id, users[account_id]]
+        inserted += cursor.execute(sql, params)
+        placeholders = ", ".join(["(%s)"] * len(batch))
+        for table in ['user_stats', 'user_clan', 'user_cache']:
+            sql = f"""
+                INSERT IGNORE INTO {table} (
+                    account_id
+                ) VALUES {placeholders};
+            """
+            cursor.execute(sql, batch)
+    return inserted
+
 def fetch_data(url):
     try:
+        acquire(url)
         resp = requests.get(url)
         if resp.status_code == 200:
             result = resp.json()
@@ -8,6 +8,7 @@ from datetime import datetime
 
 from .exception import handle_program_exception_sync
 from .middlewares import redis_client, db_pool
+from .limiter import acquire
 from celery.app.base import logger
 
 VORTEX_API_ENDPOINTS = {
@@ -64,6 +65,7 @@ def refresh_user(user_id: dict):
     base_url = VORTEX_API_ENDPOINTS[region_id]
     url = f'{base_url}/api/accounts/{account_id}/' + (f'?ac={ac}' if ac else '')
     try:
+        acquire(url)
         response = requests.get(url=url,timeout=3)
     except:
         key = f"metrics:http:{now_time[:10]}:{region}_total"
@@ -208,6 +210,8 @@ def refresh_user(user_id: dict):
                     ]
                 )
         conn.commit()
+        # 删除API中用户基本数据的缓存(ReadCache)
+        redis_client.delete(f"cache:db:brief:{region_id}:{account_id}")
     except Exception as e:
         conn.rollback()
         raise e
@@ -17,4 +17,11 @@ REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
 
 RABBITMQ_HOST = os.getenv("RABBITMQ_HOST")
 RABBITMQ_USERNAME = os.getenv("RABBITMQ_USERNAME")
-RABBITMQ_PASSWORD = os.getenv("RABBITMQ_PASSWORD")
\ No newline at end of file
+RABBITMQ_PASSWORD = os.getenv("RABBITMQ_PASSWORD")
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", 20))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", 20))
+RATE_LIMIT_BACKGROUND_RATIO = float(os.getenv("RATE_LIMIT_BACKGROUND_RATIO", 0.5))
+# 后台任务等待令牌的最长时间(秒)，超过后按请求失败处理
+RATE_LIMIT_BACKGROUND_MAX_WAIT = 60
@@ -0,0 +1,94 @@
+import sys
+import time
+import random
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.utils.json_codec import StdlibBackend, OrjsonBackend, orjson
+
+
+ROUNDS = 50
+
+
+def build_ships_payload() -> dict:
+    "模拟vortex船只数据接口的返回值(600条船)"
+    random.seed(0)
+    keys = [f'stat_{i}' for i in range(60)] + ['battles_count', 'wins', 'damage_dealt', 'frags']
+    statistics = {}
+    for i in range(600):
+        statistics[str(3_000_000_000 + i * 4321)] = {
+            'pvp_solo': {key: random.randint(0, 100_000) for key in keys},
+            'pvp_div2': {},
+            'pvp_div3': {}
+        }
+    return {'status': 'ok', 'data': {'2017740247': {'name': 'Bench', 'statistics': statistics}}}
+
+def build_stats_result() -> dict:
+    "模拟StatsAPI.get_user_pvp的返回值"
+    random.seed(1)
+    def overall():
+        return {
+            'battles_count': '{:,}'.format(random.randint(0, 50_000)).replace(',', ' '),
+            'win_rate': f'{round(random.random() * 100, 2)}%',
+            'avg_damage': '{:,}'.format(random.randint(0, 200_000)).replace(',', ' '),
+            'avg_frags': round(random.random() * 3, 2),
+            'avg_exp': random.randint(0, 3000),
+            'rating': random.randint(0, 5000),
+            'rating_class': random.randint(0, 8),
+            'rating_next': random.randint(0, 1000)
+        }
+    return {
+        'status': 'ok', 'code': 1000, 'message': 'Success',
+        'data': {
+            'type': 'pvp',
+            'basic': {'region': 'asia', 'account_id': 2017740247, 'username': '测试用户'},
+            'statistics': {
+                'overall': overall(),
+                'battle_type': {t: overall() for t in ['pvp_solo', 'pvp_div2', 'pvp_div3']},
+                'ship_type': {t: overall() for t in ['AirCarrier', 'Battleship', 'Cruiser', 'Destroyer', 'Submarine']},
+                'record': {'max_damage_dealt': 352_000, 'max_frags': 9},
+                'chart': {'keys': list(range(1, 12)), 'series': [[random.randint(0, 500) for _ in range(11)] for _ in range(5)]}
+            }
+        }
+    }
+
+def build_ship_names() -> dict:
+    "模拟ship_name_wg.json"
+    random.seed(2)
+    return {
+        str(3_000_000_000 + i * 4321): {
+            'tier': random.randint(1, 11), 'type': 'Cruiser', 'nation': 'japan',
+            'premium': False, 'special': False,
+            'ship_name': {'cn': '测试船只', 'en': f'Ship {i}', 'ja': 'テスト'}
+        } for i in range(900)
+    }
+
+def measure(func, data) -> float:
+    st = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(data)
+    return (time.perf_counter() - st) / ROUNDS * 1000
+
+
+if __name__ == "__main__":
+    backends = [StdlibBackend]
+    if orjson:
+        backends.append(OrjsonBackend)
+    else:
+        print('orjson is not installed, only the stdlib backend is measured')
+    payloads = {
+        'ships_payload': build_ships_payload(),
+        'stats_result': build_stats_result(),
+        'ship_names': build_ship_names()
+    }
+    print(f'{"payload":<14} | {"backend":<7} | {"size":>9} | {"dumps":>9} | {"loads":>9}')
+    for name, data in payloads.items():
+        for backend in backends:
+            encoded = backend.dumpb(data)
+            dumps_ms = measure(backend.dumpb, data)
+            loads_ms = measure(backend.loads, encoded)
+            print(
+                f'{name:<14} | {backend.name:<7} | {len(encoded):>9} | '
+                f'{round(dumps_ms, 3):>6} ms | {round(loads_ms, 3):>6} ms'
+            )
@@ -0,0 +1,103 @@
+import sys
+import gzip
+import json
+import time
+import random
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.utils import JsonCodec
+from app.network.decoder import loads_projected, SHIPS_PVP_KEYS
+
+
+# vortex /ships/{type}/ 接口单个模式下的统计字段
+LEAF_KEYS = [
+    'battles_count', 'wins', 'losses', 'survived', 'frags', 'damage_dealt', 'original_exp', 'exp',
+    'art_agro', 'tpd_agro', 'scouting_damage', 'assist_damage', 'planes_killed', 'ships_spotted',
+    'hits_by_main', 'shots_by_main', 'hits_by_skip', 'shots_by_skip', 'hits_by_atba', 'shots_by_atba',
+    'hits_by_rocket', 'shots_by_rocket', 'hits_by_bomb', 'shots_by_bomb', 'hits_by_tbomb',
+    'shots_by_tbomb', 'hits_by_torpedo', 'shots_by_torpedo', 'dropped_capture_points',
+    'captured_points', 'control_captured_points', 'control_dropped_points',
+    'team_dropped_capture_points', 'team_capture_points', 'premium_exp', 'survive_wins',
+    'win_and_survived', 'battles_count_0910', 'battles_count_078', 'battles_count_0711',
+    'battles_count_512', 'max_damage_dealt', 'max_damage_dealt_vehicle', 'max_frags',
+    'max_frags_vehicle', 'max_exp', 'max_exp_vehicle', 'max_planes_killed',
+    'max_planes_killed_vehicle', 'max_scouting_damage', 'max_scouting_damage_vehicle',
+    'max_total_agro', 'max_total_agro_vehicle', 'max_ships_spotted', 'max_ships_spotted_vehicle',
+    'max_premium_exp', 'max_premium_exp_vehicle', 'max_damage_dealt_to_buildings', 'frags_by_ram',
+    'frags_by_main', 'frags_by_atba', 'frags_by_torpedo', 'frags_by_planes', 'frags_by_dbomb'
+]
+SHIPS = 600
+ROUNDS = 20
+REPEAT = 5
+
+
+# ------------------------------------------------------
+# 船只数据接口的解析耗时和内存占用
+# full: JsonCodec.loads完整解析
+# projected: JsonCodec.loads后只保留SHIPS_PVP_KEYS
+# +cache: 再加上ResponseCache写入前的序列化和gzip压缩(与RedisClient.set_compressed一致)
+# 只有写入ResponseCache时才裁剪字段，不写入缓存时请求路径就是full
+# ------------------------------------------------------
+
+
+def build_fixture(field: str = 'pvp_solo') -> bytes:
+    "生成一个600条船的老玩家船只数据"
+    random.seed(0)
+    statistics = {}
+    for i in range(SHIPS):
+        ship_id = str(3_000_000_000 + i * 4321)
+        statistics[ship_id] = {
+            'pvp': {}, 'pvp_solo': {}, 'pvp_div2': {}, 'pvp_div3': {}, 'pve': {}, 'rank_solo': {}
+        }
+        statistics[ship_id][field] = {key: random.randint(0, 100_000) for key in LEAF_KEYS}
+    body = {'status': 'ok', 'data': {'2017740247': {'name': 'Bench', 'statistics': statistics}}}
+    return json.dumps(body).encode('utf-8')
+
+def timeit(func) -> float:
+    "重复REPEAT轮，取最快一轮的平均耗时(ms)"
+    results = []
+    for _ in range(REPEAT):
+        st = time.perf_counter()
+        for _ in range(ROUNDS):
+            func()
+        results.append((time.perf_counter() - st) / ROUNDS * 1000)
+    return min(results)
+
+def cache_write(data: dict) -> bytes:
+    return gzip.compress(JsonCodec.dumpb({'battles': 0, 'data': data['data']}), compresslevel=5)
+
+def measure(name: str, func) -> tuple[dict, float]:
+    elapsed = timeit(func)
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f'{name:<10} | {round(elapsed, 2):>7} ms | '
+        f'retained {round(current / 1024 / 1024, 2):>5} MB | peak {round(peak / 1024 / 1024, 2):>5} MB'
+    )
+    return result, elapsed
+
+
+if __name__ == "__main__":
+    body = build_fixture()
+    print(f'Fixture: {SHIPS} ships, {round(len(body) / 1024 / 1024, 2)} MB, {JsonCodec.backend.name} backend')
+    full, full_ms = measure('full', lambda: JsonCodec.loads(body))
+    projected, projected_ms = measure('projected', lambda: loads_projected(body, SHIPS_PVP_KEYS))
+    full_cache_ms = timeit(lambda: cache_write(JsonCodec.loads(body)))
+    projected_cache_ms = timeit(lambda: cache_write(loads_projected(body, SHIPS_PVP_KEYS)))
+    print(
+        f'+cache     | full {round(full_cache_ms, 2):>7} ms | projected {round(projected_cache_ms, 2):>7} ms | '
+        f'{len(cache_write(full)) // 1024} KB -> {len(cache_write(projected)) // 1024} KB gzip'
+    )
+    print(f'projection overhead {round(projected_ms - full_ms, 2)} ms per decode')
+    # 裁剪只在写入ResponseCache时进行，解析加写入缓存的整体耗时不能比完整解析慢
+    assert projected_cache_ms <= full_cache_ms, 'projected decode is slower than the full parse'
+    # 投影后的字段需要和完整解析的结果一致
+    for ship_id, ship_data in full['data']['2017740247']['statistics'].items():
+        for key in SHIPS_PVP_KEYS:
+            assert projected['data']['2017740247']['statistics'][ship_id]['pvp_solo'][key] == ship_data['pvp_solo'][key]
+    print('Projected fields match the full parse')
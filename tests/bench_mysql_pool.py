@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'tests'))
+
+import aiomysql.pool
+
+from app.core import EnvConfig
+from app.database import MysqlConnection
+from app.database.metrics import PoolMetrics
+from helpers import LocalConnection, load_env_example
+
+
+# ------------------------------------------------------
+# 连接池压测：并发数远大于连接池大小，观察等待时间和占用时间的分布
+# 默认连接.env中配置的MySQL，使用SELECT SLEEP模拟查询耗时
+# --local: 没有MySQL时用进程内的连接代替aiomysql的connect，连接池本身的排队逻辑不变
+# ------------------------------------------------------
+
+CONCURRENCY = 100
+DURATION = 3
+# 快查询和慢查询的耗时(秒)，慢查询占1/10
+FAST_QUERY = 0.002
+SLOW_QUERY = 0.02
+# 模拟建立连接的耗时(秒)
+CONNECT_LATENCY = 0.005
+POOL_SIZES = [5, 10, 20]
+
+
+async def sleep_query(sql: str, args: list = None) -> list:
+    "SELECT SLEEP(%s)"
+    await asyncio.sleep(args[0])
+    return [(0,)]
+
+def use_local_mysql() -> None:
+    async def connect(**kwargs):
+        await asyncio.sleep(CONNECT_LATENCY)
+        return LocalConnection(sleep_query)
+    aiomysql.pool.connect = connect
+
+
+async def query(conn, seconds: float) -> None:
+    cur = await conn.cursor()
+    await cur.execute("SELECT SLEEP(%s);", [seconds])
+    await cur.fetchone()
+    await cur.close()
+
+async def fast_query() -> None:
+    conn = await MysqlConnection.get_read_connection()
+    try:
+        await query(conn, FAST_QUERY)
+    finally:
+        await MysqlConnection.release_read_connection(conn)
+
+async def slow_query() -> None:
+    conn = await MysqlConnection.get_read_connection()
+    try:
+        await query(conn, SLOW_QUERY)
+    finally:
+        await MysqlConnection.release_read_connection(conn)
+
+async def worker(index: int, deadline: float, done: list) -> None:
+    i = 0
+    while time.perf_counter() < deadline:
+        if (index + i) % 10 == 0:
+            await slow_query()
+        else:
+            await fast_query()
+        i += 1
+    done[0] += i
+
+async def reset(maxsize: int) -> None:
+    "关闭并重新创建连接池，清空计数"
+    await MysqlConnection.close_mysql()
+    MysqlConnection._MysqlConnection__pool = None
+    MysqlConnection._MysqlConnection__read_pool = None
+    for stats in MysqlConnection._stats.values():
+        for key in stats:
+            stats[key] = 0
+    PoolMetrics._methods.clear()
+    PoolMetrics._held.clear()
+    PoolMetrics._leaks = 0
+    os.environ['MYSQL_POOL_MAXSIZE'] = str(maxsize)
+    EnvConfig.load_config()
+
+async def bench(maxsize: int) -> None:
+    await reset(maxsize)
+    done = [0]
+    deadline = time.perf_counter() + DURATION
+    await asyncio.gather(*[worker(i, deadline, done) for i in range(CONCURRENCY)])
+    stats = MysqlConnection.get_stats()
+    methods = stats['connections']['methods']
+    print(
+        f'maxsize {maxsize:>3} | {round(done[0] / DURATION):>6} qps | '
+        f'queued acquires {stats["read"]["waits"]:>6}/{stats["read"]["acquires"]:<6}'
+    )
+    for method in ['fast_query', 'slow_query']:
+        wait, hold = methods[method]['wait'], methods[method]['hold']
+        print(
+            f'    {method:<10} | wait p50 {wait["p50_ms"]:>6} ms p95 {wait["p95_ms"]:>6} ms | '
+            f'hold p50 {hold["p50_ms"]:>6} ms p95 {hold["p95_ms"]:>6} ms'
+        )
+
+async def leaked_query(release: asyncio.Event) -> None:
+    "获取连接后忘记释放"
+    conn = await MysqlConnection.get_read_connection()
+    await release.wait()
+    await MysqlConnection.release_read_connection(conn)
+
+async def bench_leak() -> None:
+    await reset(POOL_SIZES[0])
+    release = asyncio.Event()
+    task = asyncio.create_task(leaked_query(release))
+    await asyncio.sleep(1.2)
+    leaked = PoolMetrics.check_leaks(1)
+    assert [item['method'] for item in leaked] == ['leaked_query'], leaked
+    print(f'leak detection: {leaked}')
+    release.set()
+    await task
+    assert PoolMetrics.get_stats(1)['held'] == 0
+
+async def main() -> None:
+    print(f'{CONCURRENCY} concurrent workers, {DURATION}s per pool size, 10% slow queries')
+    for maxsize in POOL_SIZES:
+        await bench(maxsize)
+    await bench_leak()
+    await MysqlConnection.close_mysql()
+
+
+if __name__ == "__main__":
+    load_env_example()
+    os.environ['MYSQL_REPLICA_HOST'] = ''
+    if '--local' in sys.argv:
+        use_local_mysql()
+    EnvConfig.load_config()
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from test_pvp_statistics import (
+    build_fixture,
+    processing_overall_data,
+    processing_battle_type_data,
+    processing_ship_type_data,
+    processing_pvp_chart
+)
+from app.utils.ship_stats import ships_from_dict
+from app.apis.statistics.processing import processing_pvp_statistics
+
+
+ROUNDS = 200
+REPEAT = 5
+
+
+def four_pass(data: dict, shipid_data: dict):
+    "原有的四次遍历"
+    return (
+        processing_overall_data(data, 'pvp'),
+        processing_battle_type_data(data),
+        processing_ship_type_data(data, 'pvp', shipid_data),
+        processing_pvp_chart(data, shipid_data)
+    )
+
+def measure(name: str, func, data: dict, shipid_data: dict) -> float:
+    "重复REPEAT轮，取最快一轮的平均耗时"
+    results = []
+    for _ in range(REPEAT):
+        st = time.perf_counter()
+        for _ in range(ROUNDS):
+            func(data, shipid_data)
+        results.append((time.perf_counter() - st) / ROUNDS * 1000)
+    elapsed = min(results)
+    print(f'{name:<10} | {round(elapsed, 3):>7} ms')
+    return elapsed
+
+
+if __name__ == "__main__":
+    data, shipid_data = build_fixture(0, 600)
+    print('Fixture: 600 ships x 4 battle types')
+    four_pass_ms = measure('four_pass', four_pass, data, shipid_data)
+    fused_ms = measure('fused', processing_pvp_statistics, ships_from_dict(data), shipid_data)
+    print(f'Speedup: {round(four_pass_ms / fused_ms, 2)}x')
@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'tests'))
+
+from aiomysql.cursors import Cursor
+
+from app.core import EnvConfig
+from app.database import profiler
+from app.database.profiler import ProfilingCursor, QueryProfiler, normalize_sql
+from helpers import LocalConnection, load_env_example
+
+
+# ------------------------------------------------------
+# 慢查询统计的额外开销
+# 用不访问网络的连接和_query替换aiomysql的网络部分，只测量execute本身在Python中的耗时
+# 关闭统计时连接池使用原本的Cursor，开销为0
+# ------------------------------------------------------
+
+ROUNDS = 50_000
+SQL = """
+    SELECT
+        b.username,
+        UNIX_TIMESTAMP(b.register_time) AS register_time,
+        i.activity_level
+    FROM user_base AS b
+    LEFT JOIN user_stats AS i
+        ON i.account_id = b.account_id
+    WHERE b.region_id = %s
+        AND b.account_id = %s;
+"""
+
+
+class LocalMixin:
+    "替换掉访问网络的部分"
+    async def nextset(self):
+        return None
+
+    async def _query(self, query):
+        self._rowcount = 1
+
+class LocalCursor(LocalMixin, Cursor):
+    pass
+
+class LocalProfilingCursor(LocalMixin, ProfilingCursor):
+    pass
+
+
+async def query_user_brief(cursor: Cursor):
+    await cursor.execute(SQL, [1, 2017740247])
+
+async def timeit(cursor_class) -> float:
+    "每次execute的平均耗时(us)"
+    cursor = cursor_class(LocalConnection())
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            await query_user_brief(cursor)
+        elapsed = (time.perf_counter() - start) / ROUNDS * 1_000_000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def check_normalize() -> None:
+    assert normalize_sql(SQL) == (
+        'SELECT b.username, UNIX_TIMESTAMP(b.register_time) AS register_time, i.activity_level '
+        'FROM user_base AS b LEFT JOIN user_stats AS i ON i.account_id = b.account_id '
+        'WHERE b.region_id = ? AND b.account_id = ?;'
+    )
+    assert normalize_sql("SELECT 1 FROM t WHERE a IN (%s, %s, %s) AND b = 'x y'") == \
+        'SELECT ? FROM t WHERE a IN (?, ...) AND b = ?'
+    assert normalize_sql('INSERT IGNORE INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s);') == \
+        'INSERT IGNORE INTO t (a, b) VALUES (?, ?), ...;'
+    assert normalize_sql('INSERT IGNORE INTO t (a, b) VALUES (%s, %s);') == \
+        'INSERT IGNORE INTO t (a, b) VALUES (?, ?), ...;'
+    assert normalize_sql('SELECT * FROM user_stats2 WHERE id = 10') == 'SELECT * FROM user_stats2 WHERE id = ?'
+
+async def query_bind_list(cursor: Cursor, account_ids: list):
+    placeholders = ', '.join(['%s'] * len(account_ids))
+    await cursor.execute(f"SELECT * FROM user_base WHERE account_id IN ({placeholders});", account_ids)
+
+async def check_grouping() -> None:
+    "参数个数不同的IN列表归为同一条"
+    QueryProfiler.reset()
+    cursor = LocalProfilingCursor(LocalConnection())
+    for n in range(1, 6):
+        await query_bind_list(cursor, list(range(n)))
+    top = QueryProfiler.get_top()
+    assert len(top) == 1 and top[0]['count'] == 5, top
+    QueryProfiler.reset()
+
+async def main() -> None:
+    check_normalize()
+    await check_grouping()
+    baseline = await timeit(LocalCursor)
+    profiled = await timeit(LocalProfilingCursor)
+    top = QueryProfiler.get_top()[0]
+    assert top['site'].startswith('query_user_brief:') and top['count'] == ROUNDS * 5, top
+    print(f'Cursor.execute           {round(baseline, 2):>6} us')
+    print(f'ProfilingCursor.execute  {round(profiled, 2):>6} us (+{round(profiled - baseline, 2)} us per query)')
+    # 慢查询日志
+    os.environ['SLOW_QUERY_THRESHOLD'] = '0'
+    EnvConfig.load_config()
+    cursor = LocalProfilingCursor(LocalConnection())
+    with tempfile.TemporaryDirectory() as path:
+        profiler.SLOW_QUERY_LOG_PATH = path
+        await query_user_brief(cursor)
+        QueryProfiler.close()
+        with open(os.path.join(path, 'slow_query.log'), encoding='utf-8') as f:
+            print(f'slow query log: {f.read().strip()}')
+
+
+if __name__ == "__main__":
+    load_env_example()
+    EnvConfig.load_config()
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.network.limiter import LocalRateLimiter, GCRA_SCRIPT
+
+
+RATE = 20          # 每秒令牌数
+BURST = 20         # 突发容量
+BACKGROUND_RATIO = 0.5
+DURATION = 5       # 测试时长(秒)
+WORKERS = 50       # 每个优先级的并发数
+
+
+class RedisBackend:
+    "使用redis的GCRA脚本，需要本地有redis服务"
+    def __init__(self):
+        import redis
+        self.client = redis.Redis(decode_responses=True)
+        self.client.delete('ratelimit:bench')
+        self.script = self.client.register_script(GCRA_SCRIPT)
+
+    def try_acquire(self, key: str, interval: float, tolerance: float) -> float:
+        return int(self.script(keys=[key], args=[interval * 1000, tolerance * 1000])) / 1000
+
+
+async def worker(backend, tolerance: float, counter: dict, name: str, deadline: float, pause: float):
+    interval = 1 / RATE
+    while time.monotonic() < deadline:
+        retry_after = backend.try_acquire('ratelimit:bench', interval, tolerance)
+        if retry_after == 0:
+            counter[name] += 1
+            # 模拟交互请求的到达间隔
+            await asyncio.sleep(pause)
+        else:
+            await asyncio.sleep(retry_after)
+
+async def run(backend, interactive_pause: float = 0):
+    interval = 1 / RATE
+    tolerance = (BURST - 1) * interval
+    counter = {'interactive': 0, 'background': 0}
+    deadline = time.monotonic() + DURATION
+    tasks = []
+    for _ in range(WORKERS):
+        tasks.append(worker(backend, tolerance, counter, 'interactive', deadline, interactive_pause))
+        tasks.append(worker(backend, tolerance * BACKGROUND_RATIO, counter, 'background', deadline, 0))
+    await asyncio.gather(*tasks)
+    total = counter['interactive'] + counter['background']
+    print(f'Backend: {type(backend).__name__} | Interactive pause: {interactive_pause}s')
+    print(f'Ceiling: {RATE}/s (+{BURST} burst) | Expected max: {RATE * DURATION + BURST}')
+    print(f'Acquired: {total} | Throughput: {round(total / DURATION, 2)}/s')
+    print(f'Interactive: {counter["interactive"]} | Background: {counter["background"]}')
+    print('-' * 50)
+
+
+if __name__ == "__main__":
+    # 两种优先级都满载 / 交互请求约为上限的一半
+    for pause in [0, 5]:
+        asyncio.run(run(LocalRateLimiter(), pause))
+        if '--redis' in sys.argv:
+            asyncio.run(run(RedisBackend(), pause))
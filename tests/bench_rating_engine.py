@@ -0,0 +1,88 @@
+import sys
+import copy
+import time
+import random
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.utils.rating_utils import RatingUtils
+from app.utils.rating_engine import RatingEngine
+from app.utils.ship_stats import ships_to_dict, ships_from_dict
+
+
+KEYS = ['pvp', 'pvp_solo', 'pvp_div2', 'pvp_div3', 'rating_solo', 'rating_div']
+SHIPS = 600
+ROUNDS = 50
+REPEAT = 5
+
+
+def build_fixture() -> tuple[dict, dict]:
+    "生成一个600条船的ru服用户数据和对应的服务器数据"
+    random.seed(0)
+    data = {}
+    server_data = {}
+    for i in range(SHIPS):
+        ship_id = str(3_000_000_000 + i * 4321)
+        if i % 50 == 0:
+            # 没有服务器数据的船只
+            server_data[ship_id] = {'ru': {}}
+        else:
+            server_data[ship_id] = {
+                'ru': {
+                    'win_rate': round(random.uniform(45, 55), 2),
+                    'avg_damage': round(random.uniform(15_000, 90_000), 2),
+                    'avg_frags': round(random.uniform(0.5, 1.3), 2)
+                }
+            }
+        data[ship_id] = {}
+        for key in KEYS:
+            if random.random() < 0.2:
+                data[ship_id][key] = {}
+                continue
+            battles_count = random.choice([0, random.randint(1, 2000)])
+            data[ship_id][key] = {
+                'battles_count': battles_count,
+                'wins': random.randint(0, battles_count),
+                'damage_dealt': battles_count * random.randint(0, 150_000),
+                'frags': random.randint(0, battles_count * 3),
+                'original_exp': battles_count * random.randint(0, 3000)
+            }
+    return data, server_data
+
+def loop_calculate(data: dict, server_data: dict) -> dict:
+    "原有的逐条计算"
+    for ship_id, ship_data in data.items():
+        for key in KEYS:
+            RatingUtils.get_rating_by_data(key, ship_data[key], server_data.get(ship_id).get('ru'))
+    return data
+
+def engine_calculate(data: dict, server_data: dict) -> dict:
+    return RatingEngine.calculate('ru', data, KEYS, server_data, version=1)
+
+def measure(name: str, func, data: dict, server_data: dict) -> float:
+    "重复REPEAT轮，取最快一轮的平均耗时"
+    results = []
+    for _ in range(REPEAT):
+        copies = [copy.deepcopy(data) for _ in range(ROUNDS)]
+        st = time.perf_counter()
+        for item in copies:
+            func(item, server_data)
+        results.append((time.perf_counter() - st) / ROUNDS * 1000)
+    elapsed = min(results)
+    print(f'{name:<7} | {round(elapsed, 3):>7} ms')
+    return elapsed
+
+
+if __name__ == "__main__":
+    data, server_data = build_fixture()
+    print(f'Fixture: {SHIPS} ships x {len(KEYS)} battle types')
+    # RatingEngine使用ShipStats格式的数据
+    compact = ships_from_dict(data)
+    expected = loop_calculate(copy.deepcopy(data), server_data)
+    actual = ships_to_dict(engine_calculate(copy.deepcopy(compact), server_data))
+    assert expected == actual, 'results differ from RatingUtils.get_rating_by_data'
+    print('Results match RatingUtils.get_rating_by_data')
+    loop_ms = measure('loop', loop_calculate, data, server_data)
+    engine_ms = measure('engine', engine_calculate, compact, server_data)
+    print(f'Speedup: {round(loop_ms / engine_ms, 2)}x')
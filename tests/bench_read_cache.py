@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import random
+import asyncio
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'tests'))
+
+from app.core import EnvConfig
+from app.response import JSONResponse
+from app.models import ReadCache
+from helpers import load_env_example, use_local_redis
+
+
+USERS = 2000
+# 没有绑定账号的用户比例
+UNBOUND_RATIO = 0.2
+REQUESTS = 20_000
+# 每批并发的请求数
+CONCURRENCY = 50
+WRITE_RATIO = 0.01
+# 模拟一次MySQL查询的耗时(秒)
+QUERY_LATENCY = 0.002
+# 各类查询的比例
+WORKLOAD = [('bind', 0.5), ('brief', 0.3), ('premium', 0.15), ('bind_list', 0.05)]
+# --local: 没有redis时使用进程内的redis替身，只用于回放统计数据库查询次数，不能反映redis本身的耗时
+
+
+class Database:
+    "模拟数据库，只记录查询次数"
+    queries = 0
+
+    @classmethod
+    async def query(cls, kind: str, user: int) -> dict:
+        cls.queries += 1
+        await asyncio.sleep(QUERY_LATENCY)
+        if kind in ('bind', 'premium') and user < USERS * UNBOUND_RATIO:
+            if kind == 'premium':
+                return JSONResponse.MySQL_4104_DataNotFoundError
+            return JSONResponse.get_success_response(None)
+        return JSONResponse.get_success_response({'user': user, 'kind': kind})
+
+
+def build_workload() -> list[tuple[str, int, bool]]:
+    "少数活跃用户占大部分请求(幂律分布)"
+    random.seed(0)
+    kinds = [kind for kind, _ in WORKLOAD]
+    weights = [weight for _, weight in WORKLOAD]
+    workload = []
+    for _ in range(REQUESTS):
+        user = min(int(random.paretovariate(1.2)) - 1, USERS - 1)
+        user = (user * 7919) % USERS
+        workload.append((random.choices(kinds, weights)[0], user, random.random() < WRITE_RATIO))
+    return workload
+
+async def replay(workload: list) -> tuple[int, float]:
+    Database.queries = 0
+    start_time = time.perf_counter()
+    for start in range(0, len(workload), CONCURRENCY):
+        tasks = []
+        for kind, user, write in workload[start:start+CONCURRENCY]:
+            if write:
+                for name in ['bind', 'bind_list', 'premium']:
+                    tasks.append(ReadCache.invalidate(name, 'qq', user))
+                continue
+            tasks.append(ReadCache.load(kind, ('qq', user), lambda kind=kind, user=user: Database.query(kind, user)))
+        await asyncio.gather(*tasks)
+    return Database.queries, time.perf_counter() - start_time
+
+async def check_cancel() -> None:
+    "第一个调用者被取消时，合并的调用者照常得到结果，结果照常写入缓存"
+    Database.queries = 0
+    loader = lambda: Database.query('bind', USERS - 1)
+    leader = asyncio.create_task(ReadCache.load('bind', ('qq', 'cancel'), loader))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(ReadCache.load('bind', ('qq', 'cancel'), loader))
+    await asyncio.sleep(0)
+    leader.cancel()
+    result = await follower
+    assert result['data']['user'] == USERS - 1 and leader.cancelled(), result
+    await ReadCache.load('bind', ('qq', 'cancel'), loader)
+    assert Database.queries == 1, Database.queries
+
+def report(name: str, queries: int, elapsed: float) -> None:
+    print(
+        f'{name:<8} | mysql queries {queries:>6} | {round(queries / elapsed):>6} qps | '
+        f'{round(queries / REQUESTS * 100, 1):>5}% of requests | {round(elapsed, 2)} s'
+    )
+
+
+if __name__ == "__main__":
+    load_env_example()
+    if '--local' in sys.argv:
+        use_local_redis()
+    workload = build_workload()
+    print(f'Replaying {REQUESTS} requests over {USERS} users, {CONCURRENCY} concurrent')
+    os.environ['READ_CACHE_ENABLED'] = 'false'
+    EnvConfig.load_config()
+    report('no cache', *asyncio.run(replay(workload)))
+    os.environ['READ_CACHE_ENABLED'] = 'true'
+    EnvConfig.load_config()
+    report('cache', *asyncio.run(replay(workload)))
+    asyncio.run(check_cancel())
+    print(ReadCache.get_stats())
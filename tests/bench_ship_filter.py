@@ -0,0 +1,72 @@
+import sys
+import time
+import random
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.utils.ship_index import ShipFilterIndex
+
+
+SHIPS = 900
+QUERIES = 2000
+LIMIT = 50
+TYPES = ['AirCarrier', 'Battleship', 'Cruiser', 'Destroyer', 'Submarine']
+NATIONS = [
+    'commonwealth', 'europe', 'france', 'germany', 'italy', 'japan', 'netherlands',
+    'pan_america', 'pan_asia', 'spain', 'uk', 'usa', 'ussr'
+]
+
+
+def build_fixture() -> dict:
+    random.seed(0)
+    return {
+        str(3_000_000_000 + i * 4321): {
+            'tier': random.randint(1, 11), 'type': random.choice(TYPES), 'nation': random.choice(NATIONS)
+        } for i in range(SHIPS)
+    }
+
+def build_queries() -> list:
+    random.seed(1)
+    queries = []
+    for _ in range(QUERIES):
+        queries.append((
+            random.sample(TYPES, random.randint(1, 2)) if random.random() < 0.7 else None,
+            random.sample(range(1, 12), random.randint(1, 3)) if random.random() < 0.7 else None,
+            random.sample(NATIONS, random.randint(1, 2)) if random.random() < 0.7 else None
+        ))
+    return queries
+
+def linear_query(ship_data: dict, types: list, tiers: list, nations: list) -> list:
+    "原有的逐条筛选"
+    result = []
+    for ship_id, ship_info in ship_data.items():
+        if types and ship_info['type'] not in types:
+            continue
+        if tiers and ship_info['tier'] not in tiers:
+            continue
+        if nations and ship_info['nation'] not in nations:
+            continue
+        result.append(ship_id)
+    return result
+
+
+if __name__ == "__main__":
+    ship_data = build_fixture()
+    queries = build_queries()
+    st = time.perf_counter()
+    index = ShipFilterIndex(ship_data)
+    print(f'Index build: {round((time.perf_counter() - st) * 1000, 2)} ms ({SHIPS} ships)')
+    for query in queries:
+        assert index.get_ship_ids(index.match(*query)) == linear_query(ship_data, *query), query
+    print(f'{QUERIES} filters match the linear scan')
+    st = time.perf_counter()
+    for query in queries:
+        linear_query(ship_data, *query)
+    linear_ms = (time.perf_counter() - st) / QUERIES * 1000
+    st = time.perf_counter()
+    for query in queries:
+        index.get_ship_ids(index.match(*query), LIMIT)
+    index_ms = (time.perf_counter() - st) / QUERIES * 1000
+    print(f'linear | {round(linear_ms, 4):>8} ms/query')
+    print(f'bitmap | {round(index_ms, 4):>8} ms/query')
@@ -0,0 +1,138 @@
+import sys
+import time
+import random
+import string
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.constants import GameData
+from app.utils.ship_index import ShipNameIndex, name_format
+
+
+SHIPS = 900
+QUERIES = 2000
+
+
+def build_fixture() -> tuple[dict, dict]:
+    "生成和ship_name_wg.json/ship_name_nick.json结构一致的数据"
+    random.seed(0)
+    old_ids = list(GameData.OLD_SHIP_ID_LIST)
+    main_data = {}
+    for i in range(SHIPS):
+        ship_id = old_ids[i] if i < len(old_ids) else str(3_000_000_000 + i * 4321)
+        en = ''.join(random.choices(string.ascii_letters, k=random.randint(3, 10)))
+        if random.random() < 0.2:
+            en += random.choice([' II', '-B', " (old)", ' Pan-Asia'])
+        cn = ''.join(random.choices('大和长门武藏金刚比叡雪风岛风夕立胡德俾斯麦', k=random.randint(2, 4)))
+        main_data[ship_id] = {
+            'tier': random.randint(1, 11), 'type': 'Cruiser', 'nation': 'japan',
+            'premium': False, 'special': False, 'index': ship_id,
+            'ship_name': {'cn': cn, 'en': en, 'en_l': en + ' Full', 'ja': cn, 'ru': en.upper()}
+        }
+    ship_ids = list(main_data)
+    nick_data = {}
+    for language in ['cn', 'en', 'ja']:
+        nick_data[language] = {}
+        for ship_id in random.sample(ship_ids, 200):
+            nick_data[language][ship_id] = [
+                ''.join(random.choices(string.ascii_lowercase + '雪风岛', k=random.randint(2, 5)))
+                for _ in range(random.randint(1, 3))
+            ]
+    return main_data, nick_data
+
+def legacy_search(main_data: dict, nick_data: dict, ship_name: str, language: str) -> list:
+    "原有的逐条匹配，返回船只id"
+    ship_name_format: str = name_format(ship_name)
+    old = ship_name_format.endswith(('old','旧'))
+    result = []
+    for ship_id, ship_data in nick_data[language].items():
+        for index in ship_data:
+            if ship_name_format == name_format(index):
+                return [ship_id]
+    lang = 'en_l' if language == 'en' else language
+    for ship_id, ship_data in main_data.items():
+        if ship_name_format == name_format(ship_data['ship_name']['en']):
+            return [ship_id]
+        if ship_name_format == name_format(ship_data['ship_name'][lang]):
+            return [ship_id]
+    for ship_id, ship_data in main_data.items():
+        if ship_name_format in name_format(ship_data['ship_name']['en']) or \
+            ship_name_format in name_format(ship_data['ship_name'][lang]):
+            if old == False and ship_id in GameData.OLD_SHIP_ID_LIST:
+                continue
+            if ship_id not in result:
+                result.append(ship_id)
+    return result
+
+def build_queries(main_data: dict, nick_data: dict) -> list:
+    "别名、完整名称、名称片段和不存在的名称"
+    random.seed(1)
+    queries = []
+    ships = list(main_data.values())
+    for _ in range(QUERIES):
+        language = random.choice(['cn', 'en', 'ja'])
+        kind = random.random()
+        if kind < 0.2:
+            ship_id = random.choice(list(nick_data[language]))
+            content = random.choice(nick_data[language][ship_id])
+        elif kind < 0.5:
+            content = random.choice(ships)['ship_name'][random.choice(['en', 'cn', 'en_l'])]
+        elif kind < 0.9:
+            name = random.choice(ships)['ship_name'][random.choice(['en', 'cn'])]
+            start = random.randint(0, len(name) - 1)
+            content = name[start:start + random.randint(1, 4)]
+        else:
+            content = ''.join(random.choices(string.ascii_lowercase, k=5)) + random.choice(['', 'old', '旧'])
+        queries.append((content, language))
+    return queries
+
+def check_missing_names(main_data: dict, nick_data: dict) -> None:
+    "缺少某个语言名称的船只不影响索引的构建和其他船只的搜索"
+    main_data = {ship_id: dict(ship_data, ship_name=dict(ship_data['ship_name'])) for ship_id, ship_data in main_data.items()}
+    first, second = list(main_data)[-2:]
+    del main_data[first]['ship_name']['ja']
+    main_data[second]['ship_name']['ru'] = None
+    index = ShipNameIndex(main_data, nick_data)
+    name = main_data[first]['ship_name']['en']
+    assert first in index.search(name_format(name), 'ja'), name
+    assert index.search(name_format(main_data[second]['ship_name']['en']), 'ru')
+
+
+if __name__ == "__main__":
+    main_data, nick_data = build_fixture()
+    queries = build_queries(main_data, nick_data)
+    st = time.perf_counter()
+    index = ShipNameIndex(main_data, nick_data)
+    print(f'Index build: {round((time.perf_counter() - st) * 1000, 2)} ms ({SHIPS} ships, including the BK tree)')
+    assert index.fuzzy is not None
+    for content, language in queries:
+        expected = legacy_search(main_data, nick_data, content, language)
+        actual = index.search(name_format(content), language)
+        assert expected == actual, (content, language)
+    print(f'{QUERIES} queries match the linear search')
+    check_missing_names(main_data, nick_data)
+    st = time.perf_counter()
+    for content, language in queries[:200]:
+        legacy_search(main_data, nick_data, content, language)
+    legacy_ms = (time.perf_counter() - st) / 200 * 1000
+    st = time.perf_counter()
+    for content, language in queries:
+        index.search(name_format(content), language)
+    index_ms = (time.perf_counter() - st) / QUERIES * 1000
+    print(f'linear | {round(legacy_ms, 3):>8} ms/query')
+    print(f'index  | {round(index_ms, 3):>8} ms/query')
+    # 模糊搜索：对名称做一次随机修改
+    random.seed(2)
+    ship_ids = [ship_id for ship_id in main_data if ship_id not in GameData.OLD_SHIP_ID_LIST]
+    found = 0
+    st = time.perf_counter()
+    for _ in range(200):
+        ship_id = random.choice(ship_ids)
+        name = name_format(main_data[ship_id]['ship_name']['en'])
+        position = random.randint(0, len(name) - 1)
+        typo = name[:position] + random.choice(string.ascii_lowercase) + name[position + 1:]
+        if ship_id in index.fuzzy_search(typo, 5, 2, 0.02):
+            found += 1
+    fuzzy_ms = (time.perf_counter() - st) / 200 * 1000
+    print(f'fuzzy  | {round(fuzzy_ms, 3):>8} ms/query, {found}/200 typos resolved')
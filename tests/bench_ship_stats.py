@@ -0,0 +1,197 @@
+import sys
+import json
+import time
+import pickle
+import random
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'tests'))
+sys.path.append(str(ROOT / 'scripts' / 'recent'))
+
+from app.constants import GameData
+from app.network.processing import processing_pvp_data
+from app.utils.ship_stats import ships_to_dict
+from bench_json_projection import LEAF_KEYS
+from ship_stats import loads_ships, responeses_processing
+
+
+SHIPS = 1500
+FIELDS = ['pvp_solo', 'pvp_div2', 'pvp_div3']
+RECENT_FIELDS = ['pvp_solo', 'pvp_div2', 'pvp_div3', 'rank_solo']
+ROUNDS = 20
+REPEAT = 5
+
+
+def build_stats() -> dict:
+    battles_count = random.randint(1, 2000)
+    stats = {key: random.randint(0, 100_000) for key in LEAF_KEYS}
+    stats['battles_count'] = battles_count
+    stats['wins'] = random.randint(0, battles_count)
+    return stats
+
+def build_fixture(fields: list) -> list[bytes]:
+    "生成一个1500条船的老玩家各模式的船只数据接口返回值"
+    random.seed(0)
+    bodies = []
+    for field in fields:
+        statistics = {}
+        for i in range(SHIPS):
+            ship_id = str(3_000_000_000 + i * 4321)
+            statistics[ship_id] = {
+                'pvp': {}, 'pvp_solo': {}, 'pvp_div2': {}, 'pvp_div3': {}, 'pve': {}, 'rank_solo': {}
+            }
+            if random.random() < 0.8:
+                statistics[ship_id][field] = build_stats()
+        body = {'status': 'ok', 'data': {'2017740247': {'name': 'Bench', 'statistics': statistics}}}
+        bodies.append(json.dumps(body).encode('utf-8'))
+    return bodies
+
+# ------------------------------------------------------
+# 原有的dict实现，作为对照
+# ------------------------------------------------------
+def legacy_processing_pvp_data(responses: list, fields: list, include_old: bool):
+    result = {}
+    record = {
+        'max_damage_dealt': 0,
+        'max_frags': 0,
+        'max_exp': 0,
+        'max_planes_killed': 0,
+        'max_scouting_damage': 0,
+        'max_total_agro': 0
+    }
+    for i in range(len(fields)):
+        response = responses[i]
+        field = fields[i]
+        for ship_id, ship_data in response.items():
+            if include_old is False and ship_id in GameData.OLD_SHIP_ID_LIST:
+                continue
+            field_data = ship_data[field]
+            if field_data == {}:
+                continue
+            if ship_id not in result:
+                result[ship_id] = {
+                    'pvp': {
+                        'battles_count': 0,
+                        'wins': 0,
+                        'damage_dealt': 0,
+                        'frags': 0,
+                        'original_exp': 0,
+                        'personal_rating': 0,
+                        'damage_rating': 0,
+                        'frags_rating': 0
+                    },
+                    'pvp_solo': {},
+                    'pvp_div2': {},
+                    'pvp_div3': {}
+                }
+            for key in ['battles_count','wins','damage_dealt','frags','original_exp']:
+                result[ship_id]['pvp'][key] += field_data[key]
+                result[ship_id][field][key] = field_data[key]
+            for key in ['max_damage_dealt','max_frags','max_exp','max_planes_killed','max_scouting_damage','max_total_agro']:
+                if field_data[key] > record[key]:
+                    record[key] = field_data[key]
+    # RatingEngine会为每个模式补上PR相关的三个字段
+    for ship_data in result.values():
+        for cell in ship_data.values():
+            if cell:
+                cell.update({'personal_rating': 0, 'damage_rating': 0, 'frags_rating': 0})
+    return result, record
+
+LEGACY_KEYS = [
+    'battles_count', 'wins', 'losses', 'damage_dealt', 'frags', 'survived',
+    'scouting_damage', 'assist_damage', 'art_agro', 'original_exp',
+    'planes_killed', 'hits_by_main', 'shots_by_main'
+]
+
+def legacy_loads(body: bytes) -> dict:
+    "统计数据只保留LEGACY_KEYS中的字段，仍为dict"
+    result = json.loads(body)
+    for ship_data in result['data']['2017740247']['statistics'].values():
+        for battle_type, stats in ship_data.items():
+            if 'battles_count' in stats:
+                ship_data[battle_type] = {key: stats[key] for key in LEGACY_KEYS if key in stats}
+    return result
+
+def legacy_responeses_processing(responses: list):
+    battles_dict = {}
+    statis_dict = {}
+    type_list = ['pvp_solo', 'pvp_div2', 'pvp_div3', 'rank_solo']
+    i = 0
+    for response in responses:
+        for ship_id, ship_data in response.items():
+            if ship_id not in battles_dict:
+                battles_dict[ship_id] = 0
+                statis_dict[ship_id] = [[],[],[],[]]
+            battle_type = type_list[i]
+            if ship_data[battle_type] != {}:
+                battles_dict[ship_id] += ship_data[battle_type]['battles_count']
+                statis_dict[ship_id][i] = [
+                    ship_data[battle_type][key]
+                    for key in LEGACY_KEYS if key != 'assist_damage'
+                ]
+        i += 1
+    return battles_dict, statis_dict
+
+# ------------------------------------------------------
+
+def timeit(func) -> float:
+    "重复REPEAT轮，取最快一轮的平均耗时(ms)"
+    results = []
+    for _ in range(REPEAT):
+        st = time.perf_counter()
+        for _ in range(ROUNDS):
+            func()
+        results.append((time.perf_counter() - st) / ROUNDS * 1000)
+    return min(results)
+
+def retained(func):
+    "函数返回值占用的内存(MB)"
+    tracemalloc.start()
+    result = func()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 1024 / 1024
+
+def report(name: str, build_ms: float, memory: float, extra: str = '') -> None:
+    print(f'{name:<8} | build {round(build_ms, 3):>7} ms | retained {round(memory, 2):>5} MB{extra}')
+
+def bench_api(bodies: list) -> None:
+    responses = [json.loads(body)['data']['2017740247']['statistics'] for body in bodies]
+    (legacy, _), _ = retained(lambda: legacy_processing_pvp_data(responses, FIELDS, True))
+    (compact, _), _ = retained(lambda: processing_pvp_data(responses, FIELDS, True))
+    assert ships_to_dict(compact) == legacy, 'ShipStats differs from the dict implementation'
+    print(f'processing_pvp_data: {len(compact)} ships x {len(FIELDS) + 1} battle types, results match')
+    for name, func in (
+        ('dict', lambda: legacy_processing_pvp_data(responses, FIELDS, True)[0]),
+        ('compact', lambda: processing_pvp_data(responses, FIELDS, True)[0])
+    ):
+        result, memory = retained(func)
+        content = pickle.dumps(result)
+        pickle_ms = timeit(lambda: pickle.loads(pickle.dumps(result)))
+        report(
+            name, timeit(func), memory,
+            f' | pickle {round(len(content) / 1024):>4} KB, round trip {round(pickle_ms, 3):>6} ms'
+        )
+
+def bench_recent(bodies: list) -> None:
+    def legacy():
+        return legacy_responeses_processing([
+            legacy_loads(body)['data']['2017740247']['statistics'] for body in bodies
+        ])
+    def compact():
+        return responeses_processing([
+            loads_ships(body)['data']['2017740247']['statistics'] for body in bodies
+        ])
+    assert json.dumps(legacy()) == json.dumps(compact()), 'rows differ from the dict implementation'
+    print(f'recent responeses_processing: {SHIPS} ships x {len(RECENT_FIELDS)} battle types, rows match')
+    for name, loads in (('dict', legacy_loads), ('compact', loads_ships)):
+        _, memory = retained(lambda: [loads(body) for body in bodies])
+        report(name, timeit(legacy if name == 'dict' else compact), memory, ' (decoded responses)')
+
+
+if __name__ == "__main__":
+    bench_api(build_fixture(FIELDS))
+    bench_recent(build_fixture(RECENT_FIELDS))
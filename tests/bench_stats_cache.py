@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'tests'))
+
+from app.core import EnvConfig
+from app.response import JSONResponse
+from app.models import PlatyerModel, ReadCache
+from app.utils import ReferenceData
+from app.network import ExternalAPI
+from app.apis.statistics.stats import StatsAPI
+from app.apis.statistics.cache import StatsCache
+from app.apis.statistics.executor import StatsExecutor
+from helpers import load_env_example, use_local_redis
+
+
+# ------------------------------------------------------
+# /pvp/ 接口在统计结果缓存各个状态下的开销
+# 使用进程内的redis、数据库、外部接口和计算的替身，耗时为下面的延迟模型(不是实测数据)
+# 命中缓存时仍需读取场次(MySQL)校验缓存，并从brief的ReadCache读取基本数据(redis)
+# ------------------------------------------------------
+
+REDIS_RTT = 0.0003
+MYSQL_QUERY = 0.001
+UPSTREAM = 0.2
+COMPUTE = 0.02
+ROUNDS = 20
+REGION = 'asia'
+
+next_account_id = 2_000_000_000
+
+
+class Counter:
+    "记录各类调用次数"
+    calls: dict[str, int] = {}
+
+    @classmethod
+    def add(cls, name: str) -> None:
+        cls.calls[name] = cls.calls.get(name, 0) + 1
+
+async def get_user_battles(region_id: int, account_id: int):
+    Counter.add('mysql')
+    await asyncio.sleep(MYSQL_QUERY)
+    return JSONResponse.get_success_response({'pvp_battles': 1000, 'total_battles': 1200})
+
+async def query_user_brief(region_id: int, account_id: int):
+    Counter.add('mysql')
+    await asyncio.sleep(MYSQL_QUERY)
+    return JSONResponse.get_success_response({'region': REGION, 'account_id': account_id, 'username': 'Bench'})
+
+async def get_user_pvp(*args):
+    Counter.add('upstream')
+    await asyncio.sleep(UPSTREAM)
+    return JSONResponse.get_success_response({'original_data': {}, 'record': {}})
+
+async def get_user_brief(*args):
+    Counter.add('upstream')
+    await asyncio.sleep(UPSTREAM)
+    return JSONResponse.get_success_response(None)
+
+async def run(func, size, *args):
+    Counter.add('compute')
+    await asyncio.sleep(COMPUTE)
+    return {}, {}, {}, {}
+
+def use_stand_ins():
+    local = use_local_redis(REDIS_RTT)
+    PlatyerModel.get_user_battles = get_user_battles
+    PlatyerModel.query_user_brief = query_user_brief
+    ExternalAPI.get_user_pvp = get_user_pvp
+    ExternalAPI.get_user_brief = get_user_brief
+    StatsExecutor.run = run
+    ReferenceData.get_file_version = classmethod(lambda cls, name: 1)
+    return local
+
+async def request(account_id: int) -> dict:
+    result = await StatsAPI.get_user_pvp(REGION, account_id, 'pvp', True)
+    assert result['code'] == 1000 and result['data']['basic']['username'] == 'Bench', result
+    return result
+
+async def measure(local, name: str, prepare) -> None:
+    "每轮使用没有请求过的用户，prepare准备好缓存状态后只统计请求本身"
+    global next_account_id
+    calls = {}
+    round_trips = 0
+    elapsed = 0.0
+    for _ in range(ROUNDS):
+        next_account_id += 1
+        account_id = next_account_id
+        await prepare(account_id)
+        Counter.calls = {}
+        start_trips = local.round_trips
+        start = time.perf_counter()
+        await request(account_id)
+        elapsed += time.perf_counter() - start
+        round_trips += local.round_trips - start_trips
+        for key, value in Counter.calls.items():
+            calls[key] = calls.get(key, 0) + value / ROUNDS
+    print(
+        f'{name:<22} | {round(elapsed / ROUNDS * 1000, 2):>7} ms | redis {round(round_trips / ROUNDS, 1):>4} | '
+        f'mysql {round(calls.get("mysql", 0), 1):>3} | upstream {round(calls.get("upstream", 0), 1):>3} | compute {round(calls.get("compute", 0), 1):>3}'
+    )
+
+async def nothing(account_id: int) -> None:
+    pass
+
+async def main(local) -> None:
+    print(f'MODELLED, not measured: redis {REDIS_RTT * 1000} ms, mysql {MYSQL_QUERY * 1000} ms, upstream {UPSTREAM * 1000} ms, compute {COMPUTE * 1000} ms')
+    os.environ['STATS_CACHE_ENABLED'] = 'false'
+    EnvConfig.load_config()
+    await measure(local, 'no stats cache', nothing)
+    os.environ['STATS_CACHE_ENABLED'] = 'true'
+    EnvConfig.load_config()
+    await measure(local, 'miss', nothing)
+    # 统计结果已缓存，brief的ReadCache已过期
+    async def cached_without_brief(account_id: int) -> None:
+        await request(account_id)
+        await ReadCache.invalidate('brief', 1, account_id)
+    # 统计结果和brief都已缓存
+    async def cached(account_id: int) -> None:
+        await request(account_id)
+    await measure(local, 'hit, brief not cached', cached_without_brief)
+    await measure(local, 'hit', cached)
+    print(StatsCache.get_stats())
+
+
+if __name__ == "__main__":
+    load_env_example()
+    EnvConfig.load_config()
+    asyncio.run(main(use_stand_ins()))
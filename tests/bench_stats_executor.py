@@ -0,0 +1,94 @@
+import sys
+import time
+import asyncio
+import statistics
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'tests'))
+
+from app.core import EnvConfig
+from app.utils import RatingEngine
+from app.utils.ship_stats import ships_from_dict
+from app.apis.statistics.executor import StatsExecutor
+from app.apis.statistics.processing import processing_pvp_statistics
+from test_pvp_statistics import build_fixture
+from helpers import load_env_example
+
+
+HEAVY_SHIPS = 1500
+HEAVY_REQUESTS = 40
+HEAVY_INTERVAL = 0.05
+LIGHT_INTERVAL = 0.002
+WORKERS = 2
+KEYS = ['pvp', 'pvp_solo', 'pvp_div2', 'pvp_div3']
+
+_reference = None
+
+
+def get_reference() -> tuple[dict, dict]:
+    "模拟子进程中预先加载的静态数据"
+    global _reference
+    if _reference is None:
+        data, shipid_data = build_fixture(0, HEAVY_SHIPS)
+        server_data = {
+            ship_id: {'asia': {'win_rate': 50, 'avg_damage': 40_000, 'avg_frags': 0.9}}
+            for ship_id in data
+        }
+        _reference = (server_data, shipid_data)
+    return _reference
+
+def heavy(data: dict):
+    "一个大号用户的PR计算和聚合"
+    server_data, shipid_data = get_reference()
+    RatingEngine.calculate('asia', data, KEYS, server_data, 1)
+    return processing_pvp_statistics(data, shipid_data)
+
+async def light_requests(stop: asyncio.Event, latencies: list):
+    "模拟轻量接口，记录从发起到完成的耗时"
+    while not stop.is_set():
+        start_time = time.perf_counter()
+        await asyncio.sleep(0)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        await asyncio.sleep(LIGHT_INTERVAL)
+
+async def heavy_requests(data: dict, latencies: list):
+    tasks = []
+    async def one():
+        start_time = time.perf_counter()
+        await StatsExecutor.run(heavy, len(data), data)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    for _ in range(HEAVY_REQUESTS):
+        tasks.append(asyncio.create_task(one()))
+        await asyncio.sleep(HEAVY_INTERVAL)
+    await asyncio.gather(*tasks)
+
+async def scenario(name: str, data: dict):
+    light, heavy_latencies = [], []
+    stop = asyncio.Event()
+    light_task = asyncio.create_task(light_requests(stop, light))
+    await heavy_requests(data, heavy_latencies)
+    stop.set()
+    await light_task
+    light.sort()
+    p50 = light[len(light) // 2]
+    p99 = light[int(len(light) * 0.99)]
+    print(
+        f'{name:<7} | light p50 {round(p50, 3):>7} ms | light p99 {round(p99, 3):>8} ms | '
+        f'heavy avg {round(statistics.mean(heavy_latencies), 1):>7} ms'
+    )
+
+
+if __name__ == "__main__":
+    load_env_example()
+    EnvConfig.load_config()
+    data, _ = build_fixture(0, HEAVY_SHIPS)
+    data = ships_from_dict(data)
+    get_reference()
+    print(f'{HEAVY_REQUESTS} heavy requests ({HEAVY_SHIPS} ships) every {int(HEAVY_INTERVAL * 1000)} ms')
+    asyncio.run(scenario('inline', data))
+    asyncio.run(StatsExecutor.init_pool(WORKERS))
+    asyncio.run(scenario(f'pool({WORKERS})', data))
+    StatsExecutor.close_pool()
+    print(StatsExecutor.get_stats())
@@ -0,0 +1,115 @@
+import sys
+import time
+import random
+import asyncio
+from pathlib import Path
+from datetime import datetime, timedelta
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'tests'))
+
+from app.core import EnvConfig
+from app.response import JSONResponse
+from app.middlewares import RedisConnection
+from app.health import ServiceMetrics
+from app.health.metrics import HTTP_METRICS_KEYS
+from app.apis.platform import StatusAPI
+from helpers import LocalRedis, load_env_example, use_local_redis
+
+
+# ------------------------------------------------------
+# /status/ 接口读取redis指标的耗时
+# 原有实现：api和celery各一个pipeline，外部接口每天一个pipeline，共17次往返
+# 现在：一个pipeline中的三条MGET，1次往返
+# 默认使用进程内的redis替身，每次往返固定等待ROUND_TRIP秒
+# --live: 使用.env中配置的redis，只读取不写入
+# ------------------------------------------------------
+
+ROUNDS = 50
+ROUND_TRIP = 0.0005
+
+
+def use_local_metrics() -> LocalRedis:
+    random.seed(0)
+    local = use_local_redis(ROUND_TRIP)
+    now = datetime.now()
+    for i in range(31):
+        day = (now - timedelta(days=i)).date().isoformat()
+        local.write(f'metrics:api:{day}', str(random.randint(0, 50000)))
+        local.write(f'metrics:celery:{day}', str(random.randint(0, 5000)))
+        for name in HTTP_METRICS_KEYS:
+            local.write(f'metrics:http:{day}:{name}', str(random.randint(1, 20000)))
+    return local
+
+# ------------------------------------------------------
+# 原有的实现，作为对照(修正了今天的外部接口计数读取的是昨天的key)
+# ------------------------------------------------------
+async def get_by_pipe(redis_key: str, keys: list) -> dict:
+    redis_client = RedisConnection.get_connection()
+    pipe = redis_client.pipeline()
+    for key in keys:
+        pipe.get(redis_key.replace('key', key))
+    values = await pipe.execute()
+    return JSONResponse.get_success_response([int(v) if v else 0 for v in values])
+
+async def legacy_collect_daily(prefix: str):
+    now = datetime.now()
+    keys = [(now - timedelta(days=i)).date().isoformat() for i in range(30, 0, -1)]
+    values = await get_by_pipe(f"metrics:{prefix}:key", keys)
+    return ServiceMetrics.build_daily_chart(keys, values['data'])
+
+async def legacy_collect_http():
+    now = datetime.now()
+    dates = []
+    values = []
+    for i in range(14, -1, -1):
+        day = (now - timedelta(days=i)).date().isoformat()
+        if i != 0:
+            dates.append(day)
+        result = await get_by_pipe(f"metrics:http:{day}:key", HTTP_METRICS_KEYS)
+        values += result['data']
+    return ServiceMetrics.build_http_charts(dates, values)
+
+async def legacy_collect_redis_metrics():
+    return (
+        await legacy_collect_daily('api'),
+        await legacy_collect_daily('celery'),
+        await legacy_collect_http()
+    )
+
+# ------------------------------------------------------
+
+async def timeit(func) -> float:
+    "平均耗时(ms)"
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await func()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+async def main(local) -> None:
+    collect_redis_metrics = ServiceMetrics.collect_redis_metrics
+    assert await legacy_collect_redis_metrics() == await collect_redis_metrics(), 'metrics differ'
+    for name, func in (('legacy', legacy_collect_redis_metrics), ('pipeline', collect_redis_metrics)):
+        ServiceMetrics.collect_redis_metrics = func
+        round_trips = local.round_trips if local else 0
+        await func()
+        if local:
+            round_trips = local.round_trips - round_trips
+        metrics_ms = await timeit(func)
+        status_ms = await timeit(StatusAPI.api_stats)
+        print(
+            f'{name:<8} | redis round trips {round_trips if local else "-":>3} | '
+            f'metrics {round(metrics_ms, 2):>6} ms | /status/ {round(status_ms, 2):>6} ms'
+        )
+    ServiceMetrics.collect_redis_metrics = collect_redis_metrics
+
+
+if __name__ == "__main__":
+    load_env_example()
+    EnvConfig.load_config()
+    local = None
+    if '--live' not in sys.argv:
+        local = use_local_metrics()
+        print(f'local redis stand-in, {ROUND_TRIP * 1000} ms per round trip')
+    asyncio.run(main(local))
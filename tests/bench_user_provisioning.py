@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'tests'))
+
+import aiomysql
+
+from app.models.player import PlatyerModel
+from helpers import LocalConnection, load_env_example
+
+
+# ------------------------------------------------------
+# 新用户写入：逐个用户的INSERT vs 每张表一条多行INSERT IGNORE
+# 默认不连接MySQL，统计语句数和提交次数，并按下面的延迟模型估算耗时(不是实测数据)
+# --live: 连接.env中配置的MySQL，在tests/create_db.sql创建的game_test库中实际写入，结束后删除
+# ------------------------------------------------------
+
+# 延迟模型(ms)：每条语句一次往返，每行的写入开销，每次提交的刷盘
+STATEMENT_RTT = 0.3
+ROW_COST = 0.01
+COMMIT_COST = 1.0
+BENCH_DB = 'game_test'
+# 使用不会和真实用户冲突的id
+BASE_ACCOUNT_ID = 9_900_000_000
+SCENARIOS = [('clan of 50', 50), ('import of 10k', 10_000)]
+
+
+def row_count(sql: str) -> int:
+    "多行INSERT按VALUES中的行数计算，其余语句按1行"
+    return max(sql.count('%s, %s, %s'), sql.count('(%s)'), 1)
+
+async def insert_rows(sql: str, args: list = None) -> list:
+    "检查参数个数和占位符是否一致，返回写入的行数"
+    args = args or []
+    assert sql.count('%s') == len(args), sql
+    return [()] * row_count(sql)
+
+def modelled_ms(conn: LocalConnection) -> float:
+    rows = sum(row_count(sql) for sql, _ in conn.executed)
+    return len(conn.executed) * STATEMENT_RTT + rows * ROW_COST + conn.commits * COMMIT_COST
+
+class CommitCursor:
+    "aiomysql的cursor，commit提交所在连接的事务"
+    def __init__(self, conn: aiomysql.Connection, cur: aiomysql.Cursor):
+        self.conn = conn
+        self.cur = cur
+
+    async def execute(self, sql: str, args: list = None):
+        return await self.cur.execute(sql, args)
+
+    async def commit(self):
+        await self.conn.commit()
+
+
+async def legacy_provision(cur, region_id: int, users: dict) -> None:
+    "原有的实现：每个用户4条INSERT和1条UPDATE，每个用户提交一次"
+    for account_id, username in users.items():
+        await cur.execute("INSERT INTO user_base (region_id, account_id, username) VALUES (%s, %s, %s);", [region_id, account_id, f'User_{account_id}'])
+        await cur.execute("INSERT INTO user_stats (account_id) VALUES (%s);", [account_id])
+        await cur.execute("INSERT INTO user_clan (account_id) VALUES (%s);", [account_id])
+        await cur.execute("INSERT INTO user_cache (account_id) VALUES (%s);", [account_id])
+        await cur.execute("UPDATE user_base SET username = %s, touch_at = CURRENT_TIMESTAMP WHERE region_id = %s AND account_id = %s;", [username, region_id, account_id])
+        await cur.commit()
+
+async def bulk_provision(cur, region_id: int, users: dict) -> None:
+    inserted = await PlatyerModel.insert_users(cur, region_id, users)
+    assert inserted == len(users), inserted
+    await cur.commit()
+
+def build_users(count: int) -> dict:
+    return {BASE_ACCOUNT_ID + i: f'Bench_{i}' for i in range(count)}
+
+
+async def run_local() -> None:
+    print(f'MODELLED, not measured: {STATEMENT_RTT} ms per statement, {ROW_COST} ms per row, {COMMIT_COST} ms per commit')
+    print('run with --live against tests/create_db.sql for real timings')
+    for name, count in SCENARIOS:
+        users = build_users(count)
+        result = {}
+        for label, func in (('per-user', legacy_provision), ('bulk', bulk_provision)):
+            conn = LocalConnection(insert_rows)
+            async with conn.cursor() as cur:
+                await func(CommitCursor(conn, cur), 1, users)
+            result[label] = modelled_ms(conn)
+            print(
+                f'{name:<14} | {label:<8} | {len(conn.executed):>6} statements | '
+                f'{conn.commits:>6} commits | modelled {round(result[label], 1):>8} ms'
+            )
+        print(f'{name:<14} | modelled speedup {round(result["per-user"] / result["bulk"], 1)}x')
+
+async def cleanup(conn: aiomysql.Connection, users: dict) -> None:
+    async with conn.cursor() as cur:
+        # 外键为ON DELETE CASCADE，其余三张表的数据一起删除
+        await cur.execute("DELETE FROM user_base WHERE account_id BETWEEN %s AND %s;", [min(users), max(users)])
+    await conn.commit()
+
+async def run_live() -> None:
+    conn = await aiomysql.connect(
+        host=os.environ['MYSQL_HOST'],
+        port=int(os.environ['MYSQL_PORT']),
+        user=os.environ['MYSQL_USERNAME'],
+        password=os.environ['MYSQL_PASSWORD'],
+        db=os.environ.get('BENCH_DB', BENCH_DB),
+        autocommit=False
+    )
+    try:
+        for name, count in SCENARIOS:
+            users = build_users(count)
+            result = {}
+            for label, func in (('per-user', legacy_provision), ('bulk', bulk_provision)):
+                await cleanup(conn, users)
+                async with conn.cursor() as cur:
+                    start = time.perf_counter()
+                    await func(CommitCursor(conn, cur), 1, users)
+                    result[label] = (time.perf_counter() - start) * 1000
+                print(f'{name:<14} | {label:<8} | measured {round(result[label], 1):>8} ms')
+            await cleanup(conn, users)
+            print(f'{name:<14} | measured speedup {round(result["per-user"] / result["bulk"], 1)}x')
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    load_env_example()
+    if '--live' in sys.argv:
+        asyncio.run(run_live())
+    else:
+        asyncio.run(run_local())
@@ -0,0 +1,218 @@
+import os
+import time
+import asyncio
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from app.middlewares import RedisConnection
+
+
+# ------------------------------------------------------
+# 测试和压测脚本共用的环境变量加载以及MySQL/Redis替身
+# 脚本以__main__运行时需要先把tests目录加入sys.path
+# ------------------------------------------------------
+
+ROOT = Path(__file__).resolve().parents[1]
+
+Handler = Callable[[str, Optional[list]], Awaitable[Optional[list]]]
+
+
+def load_env_example() -> None:
+    "没有配置环境变量时使用.env.example中的值"
+    with open(ROOT / '.env.example', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                os.environ.setdefault(key, value)
+
+
+class LocalContext:
+    "模拟aiomysql的_ContextManager，既可以await也可以async with"
+    def __init__(self, coro: Awaitable, exit: Optional[Callable[[Any], Awaitable]] = None):
+        self._coro = coro
+        self._exit = exit
+        self._obj = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self):
+        self._obj = await self._coro
+        return self._obj
+
+    async def __aexit__(self, *args):
+        if self._exit:
+            await self._exit(self._obj)
+        return False
+
+
+class LocalReader:
+    "aiomysql.Pool检查连接是否可用时读取的状态"
+    eof_received = False
+
+    def at_eof(self):
+        return False
+
+    def exception(self):
+        return None
+
+
+class LocalCursor:
+    "execute交给连接的handler处理，handler返回的行供fetch读取"
+    def __init__(self, connection: 'LocalConnection'):
+        self.connection = connection
+        self.rows = []
+
+    async def execute(self, sql: str, args: list = None) -> int:
+        self.connection.executed.append((sql, args))
+        self.rows = await self.connection.handler(sql, args) or []
+        return len(self.rows)
+
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    async def fetchall(self):
+        return self.rows
+
+    async def close(self):
+        pass
+
+
+async def no_rows(sql: str, args: list = None) -> None:
+    return None
+
+
+class LocalConnection:
+    '''aiomysql连接的替身，不访问网络
+
+    同时满足aiomysql.Pool(回收检查)和aiomysql.Cursor(转义参数)用到的接口，
+    executed和commits记录执行过的语句和提交次数
+    '''
+    encoding = 'utf8'
+
+    def __init__(self, handler: Handler = no_rows, pool: 'LocalPool' = None):
+        self.handler = handler
+        self.pool = pool
+        self.loop = asyncio.get_running_loop()
+        self._reader = LocalReader()
+        self.closed = False
+        self.last_usage = self.loop.time()
+        self.executed = []
+        self.commits = 0
+
+    def escape(self, value):
+        return str(value)
+
+    def literal(self, value):
+        return str(value)
+
+    def get_transaction_status(self):
+        return False
+
+    def cursor(self, *args) -> LocalContext:
+        return LocalContext(self._cursor(), lambda cur: cur.close())
+
+    async def _cursor(self) -> LocalCursor:
+        return LocalCursor(self)
+
+    async def commit(self):
+        self.commits += 1
+
+    def close(self):
+        self.closed = True
+
+    async def ensure_closed(self):
+        self.closed = True
+
+
+class LocalPool:
+    "aiomysql.Pool的替身，fail为True时获取连接失败"
+    def __init__(self, name: str, handler: Handler = no_rows, maxsize: int = 10):
+        self.name = name
+        self.handler = handler
+        self.fail = False
+        self._used = set()
+        self.size = 0
+        self.freesize = 0
+        self.maxsize = maxsize
+
+    def acquire(self) -> LocalContext:
+        return LocalContext(self._acquire(), self.release)
+
+    async def _acquire(self) -> LocalConnection:
+        if self.fail:
+            raise ConnectionError(f'{self.name} is down')
+        conn = LocalConnection(self.handler, self)
+        self._used.add(conn)
+        return conn
+
+    async def release(self, conn: LocalConnection):
+        self._used.discard(conn)
+
+
+class LocalPipeline:
+    def __init__(self, redis: 'LocalRedis'):
+        self.redis = redis
+        self.commands = []
+
+    def get(self, key: str):
+        self.commands.append(lambda: self.redis.read(key))
+
+    def mget(self, keys: list):
+        self.commands.append(lambda: [self.redis.read(key) for key in keys])
+
+    async def execute(self):
+        await self.redis.round_trip()
+        return [command() for command in self.commands]
+
+
+class LocalRedis:
+    '''redis.asyncio.Redis的替身，只实现用到的命令
+
+    每次往返固定等待latency秒，round_trips记录往返次数
+    '''
+    def __init__(self, latency: float = 0):
+        self.latency = latency
+        self.store: dict[str, tuple[float, Any]] = {}
+        self.round_trips = 0
+
+    async def round_trip(self):
+        self.round_trips += 1
+        await asyncio.sleep(self.latency)
+
+    def read(self, key: str):
+        item = self.store.get(key)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def write(self, key: str, value: Any, ex: int = None):
+        self.store[key] = (time.monotonic() + (ex or 1 << 30), value)
+
+    async def get(self, key: str):
+        await self.round_trip()
+        return self.read(key)
+
+    async def mget(self, keys: list):
+        await self.round_trip()
+        return [self.read(key) for key in keys]
+
+    async def set(self, name: str, value: Any, ex: int = None):
+        await self.round_trip()
+        self.write(name, value, ex)
+        return True
+
+    async def delete(self, key: str):
+        await self.round_trip()
+        return int(self.store.pop(key, None) is not None)
+
+    def pipeline(self, transaction: bool = True):
+        return LocalPipeline(self)
+
+
+def use_local_redis(latency: float = 0) -> LocalRedis:
+    "RedisConnection.get_connection改为返回进程内的LocalRedis"
+    local = LocalRedis(latency)
+    RedisConnection.get_connection = lambda db=0: local
+    return local
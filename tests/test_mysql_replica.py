@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'tests'))
+
+from app.core import EnvConfig
+from app.database import MysqlConnection
+from app.database.mysql import get_replica_lag
+from helpers import LocalPool, load_env_example
+
+
+# ------------------------------------------------------
+# 从库路由测试
+# 默认使用进程内的连接池替身，不需要MySQL
+# --live: 使用.env中配置的主库和从库(可以是两个独立的本地实例)检测并打印路由结果
+# ------------------------------------------------------
+
+class ReplicaPool(LocalPool):
+    "status为SHOW REPLICA STATUS的结果，连接失败时查询也失败"
+    def __init__(self, name: str, status: dict = None):
+        super().__init__(name, self.show_status)
+        self.status = status
+
+    async def show_status(self, sql: str, args: list = None) -> list:
+        if self.fail:
+            raise ConnectionError(f'{self.name} is down')
+        return [self.status]
+
+
+def setup(replica_host: str = 'replica') -> tuple[ReplicaPool, ReplicaPool]:
+    load_env_example()
+    os.environ['MYSQL_REPLICA_HOST'] = replica_host
+    os.environ['MYSQL_REPLICA_MAX_LAG'] = '5'
+    EnvConfig.load_config()
+    read_pool, replica_pool = ReplicaPool('read'), ReplicaPool('replica', {'Seconds_Behind_Source': 0})
+    MysqlConnection._MysqlConnection__read_pool = read_pool
+    MysqlConnection._MysqlConnection__replica_pool = replica_pool
+    MysqlConnection._replica.update(lag=None, checked_at=0.0, error=None)
+    return read_pool, replica_pool
+
+async def route(max_lag: int = None, allow_replica: bool = True) -> str:
+    "获取一条只读连接并释放，返回连接所属的连接池"
+    conn = await MysqlConnection.get_read_connection(max_lag, allow_replica)
+    name = conn.pool.name
+    await MysqlConnection.release_read_connection(conn)
+    assert not conn.pool._used
+    return name
+
+
+def test_replica_lag_parsing():
+    assert get_replica_lag(None) == 0
+    assert get_replica_lag({'Seconds_Behind_Source': 3}) == 3
+    assert get_replica_lag({'Seconds_Behind_Master': 7}) == 7
+    assert get_replica_lag({'Seconds_Behind_Source': None}) is None
+
+def test_routing_by_lag():
+    _, replica_pool = setup()
+    # 还没有检测过从库
+    assert asyncio.run(route()) == 'read'
+    asyncio.run(MysqlConnection.check_replica())
+    assert asyncio.run(route()) == 'replica'
+    assert asyncio.run(route(max_lag=0)) == 'replica'
+    # 写入缓存的查询不使用从库，延迟为0时也可能落后不到1秒
+    assert asyncio.run(route(allow_replica=False)) == 'read'
+    replica_pool.status = {'Seconds_Behind_Source': 3}
+    asyncio.run(MysqlConnection.check_replica())
+    assert asyncio.run(route()) == 'replica'
+    assert asyncio.run(route(max_lag=0)) == 'read'
+    replica_pool.status = {'Seconds_Behind_Source': 60}
+    asyncio.run(MysqlConnection.check_replica())
+    assert asyncio.run(route()) == 'read'
+    # 复制线程停止
+    replica_pool.status = {'Seconds_Behind_Source': None}
+    asyncio.run(MysqlConnection.check_replica())
+    assert asyncio.run(route()) == 'read'
+    assert MysqlConnection.get_stats()['replica']['error'] == 'ReplicationStopped'
+
+def test_fallback_when_replica_down():
+    _, replica_pool = setup()
+    asyncio.run(MysqlConnection.check_replica())
+    assert asyncio.run(route()) == 'replica'
+    replica_pool.fail = True
+    errors = MysqlConnection.get_stats()['replica']['errors']
+    # 连接失败后立即回落到主库，并且在下一次检测成功前不再尝试从库
+    assert asyncio.run(route()) == 'read'
+    assert asyncio.run(route()) == 'read'
+    assert MysqlConnection.get_stats()['replica']['errors'] == errors + 1
+    asyncio.run(MysqlConnection.check_replica())
+    assert MysqlConnection.get_stats()['replica']['in_use'] is False
+    replica_pool.fail = False
+    asyncio.run(MysqlConnection.check_replica())
+    assert asyncio.run(route()) == 'replica'
+
+def test_stale_check_and_disabled():
+    setup()
+    asyncio.run(MysqlConnection.check_replica())
+    assert asyncio.run(route()) == 'replica'
+    # 检测任务停止后不再信任旧的检测结果
+    MysqlConnection._replica['checked_at'] = time.monotonic() - 3600
+    assert asyncio.run(route()) == 'read'
+    setup(replica_host='')
+    asyncio.run(MysqlConnection.check_replica())
+    assert asyncio.run(route()) == 'read'
+    assert MysqlConnection.get_stats()['replica']['enabled'] is False
+
+
+async def live() -> None:
+    "使用.env中配置的两个实例检测路由"
+    EnvConfig.load_config()
+    config = EnvConfig.get_config()
+    print(f'primary {config.MYSQL_HOST}:{config.MYSQL_PORT} | replica {config.MYSQL_REPLICA_HOST}:{config.MYSQL_REPLICA_PORT}')
+    await MysqlConnection.check_replica()
+    for allow_replica in [True, False]:
+        conn = await MysqlConnection.get_read_connection(allow_replica=allow_replica)
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT @@hostname, @@port;")
+            print(f'allow_replica={allow_replica}: read from {await cur.fetchone()}')
+        await MysqlConnection.release_read_connection(conn)
+    print(MysqlConnection.get_stats())
+    await MysqlConnection.close_mysql()
+
+
+if __name__ == "__main__":
+    if '--live' in sys.argv:
+        asyncio.run(live())
+    else:
+        test_replica_lag_parsing()
+        test_routing_by_lag()
+        test_fallback_when_replica_down()
+        test_stale_check_and_disabled()
+        print('replica routing matches the expected pools')
@@ -0,0 +1,318 @@
+import sys
+import json
+import copy
+import random
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from typing import Dict
+
+from app.utils import RatingUtils
+from app.utils.ship_stats import ShipStats, ships_from_dict, ships_to_dict
+from app.schemas import ShipDataDict, ShipInfoDict
+from app.apis.statistics.processing import (
+    NoneProcessedData,
+    ProcessedData,
+    processing_pvp_statistics
+)
+
+
+KEYS = ['pvp', 'pvp_solo', 'pvp_div2', 'pvp_div3']
+SHIP_TYPES = ['AirCarrier', 'Battleship', 'Cruiser', 'Destroyer', 'Submarine']
+
+
+# ------------------------------------------------------
+# 原有的四次遍历的实现，使用dict格式(ships_to_dict)的数据，作为单次遍历的对照
+# ------------------------------------------------------
+def processing_overall_data(data: Dict[str, Dict], field: str):
+    original_data = NoneProcessedData.copy()
+    for _, ship_info in data.items():
+        ship_data: ShipDataDict = ship_info[field]
+        if ship_data == {}:
+            continue
+        for key in ['battles_count','wins','damage_dealt','frags','original_exp']:
+            original_data[key] += ship_data[key]
+        if ship_data['personal_rating'] != -1:
+            original_data['value_battles_count'] += ship_data['battles_count']
+            original_data['personal_rating'] += ship_data['personal_rating']
+            original_data['n_damage_dealt'] += ship_data['damage_rating']
+            original_data['n_frags'] += ship_data['frags_rating']
+    result = ProcessedData.copy()
+    result['type'] = 'pr'
+    if original_data['battles_count'] == 0:
+        result['battles_count'] = '-'
+        result['win_rate'] = '-'
+        result['avg_damage'] = '-'
+        result['avg_frags'] = '-'
+        result['avg_exp'] = '-'
+        result['rating'] = '-1'
+        result['rating_next'] = '1'
+    else:
+        result['battles_count'] = original_data['battles_count']
+        result['win_rate'] = round(original_data['wins']/original_data['battles_count']*100,2)
+        result['avg_damage'] = original_data['damage_dealt']//original_data['battles_count']
+        result['avg_frags'] = round(original_data['frags']/original_data['battles_count'],2)
+        result['avg_exp'] = original_data['original_exp']//original_data['battles_count']
+        if original_data['value_battles_count'] != 0:
+            result['rating'] = original_data['personal_rating']//original_data['value_battles_count']
+            rating_class, rating_next = RatingUtils.get_pr_rating_class(result['rating'],True)
+            result['rating_next'] = str(rating_next)
+            result['win_rate_class'] = RatingUtils.get_content_class(0, result['win_rate'])
+            result['avg_damage_class'] = RatingUtils.get_content_class(1, original_data['n_damage_dealt']/original_data['value_battles_count'])
+            result['avg_frags_class'] = RatingUtils.get_content_class(2, original_data['n_frags']/original_data['value_battles_count'])
+            result['rating_class'] = rating_class
+        else:
+            result['rating'] = -1
+            rating_class, rating_next = RatingUtils.get_pr_rating_class(-1,True)
+            result['rating_next'] = str(rating_next)
+            result['win_rate_class'] = RatingUtils.get_content_class(0, -1)
+            result['avg_damage_class'] = RatingUtils.get_content_class(1, -1)
+            result['avg_frags_class'] = RatingUtils.get_content_class(2, -1)
+            result['rating_class'] = rating_class
+        result['battles_count'] = '{:,}'.format(result['battles_count']).replace(',', ' ')
+        result['win_rate'] = '{:.2f}%'.format(result['win_rate'])
+        result['avg_damage'] = '{:,}'.format(result['avg_damage']).replace(',', ' ')
+        result['avg_frags'] = '{:.2f}'.format(result['avg_frags'])
+        result['avg_exp'] = '{:,}'.format(result['avg_exp']).replace(',', ' ')
+        result['rating'] = '{:,}'.format(result['rating']).replace(',', ' ')
+    return result
+
+def processing_battle_type_data(data: Dict[str, Dict]):
+    original_data = {
+        'pvp_solo': NoneProcessedData.copy(),
+        'pvp_div2': NoneProcessedData.copy(),
+        'pvp_div3': NoneProcessedData.copy()
+    }
+    for _, ship_info in data.items():
+        for field in ['pvp_solo', 'pvp_div2', 'pvp_div3']:
+            ship_data: ShipDataDict = ship_info[field]
+            if ship_data == {}:
+                continue
+            for key in ['battles_count','wins','damage_dealt','frags','original_exp']:
+                original_data[field][key] += ship_data[key]
+            if ship_data['personal_rating'] != -1:
+                original_data[field]['value_battles_count'] += ship_data['battles_count']
+                original_data[field]['personal_rating'] += ship_data['personal_rating']
+                original_data[field]['n_damage_dealt'] += ship_data['damage_rating']
+                original_data[field]['n_frags'] += ship_data['frags_rating']
+    result = {
+        'pvp_solo': ProcessedData.copy(),
+        'pvp_div2': ProcessedData.copy(),
+        'pvp_div3': ProcessedData.copy()
+    }
+    for field in ['pvp_solo', 'pvp_div2', 'pvp_div3']:
+        if original_data[field]['battles_count'] == 0:
+            result[field]['battles_count'] = '-'
+            result[field]['win_rate'] = '-'
+            result[field]['avg_damage'] = '-'
+            result[field]['avg_frags'] = '-'
+            result[field]['avg_exp'] = '-'
+            result[field]['rating'] = '-1'
+            result[field]['rating_next'] = '1'
+        else:
+            result[field]['battles_count'] = original_data[field]['battles_count']
+            result[field]['win_rate'] = round(original_data[field]['wins']/original_data[field]['battles_count']*100,2)
+            result[field]['avg_damage'] = int(original_data[field]['damage_dealt']/original_data[field]['battles_count'])
+            result[field]['avg_frags'] = round(original_data[field]['frags']/original_data[field]['battles_count'],2)
+            result[field]['avg_exp'] = int(original_data[field]['original_exp']/original_data[field]['battles_count'])
+            if original_data[field]['value_battles_count'] != 0:
+                result[field]['rating'] = int(original_data[field]['personal_rating']/original_data[field]['value_battles_count'])
+                rating_class, rating_next = RatingUtils.get_pr_rating_class(result[field]['rating'])
+                result[field]['rating_next'] = str(rating_next)
+                result[field]['win_rate_class'] = RatingUtils.get_content_class(0, result[field]['win_rate'])
+                result[field]['avg_damage_class'] = RatingUtils.get_content_class(1, original_data[field]['n_damage_dealt']/original_data[field]['value_battles_count'])
+                result[field]['avg_frags_class'] = RatingUtils.get_content_class(2, original_data[field]['n_frags']/original_data[field]['value_battles_count'])
+                result[field]['rating_class'] = rating_class
+            else:
+                result[field]['rating'] = -1
+                rating_class, rating_next = RatingUtils.get_pr_rating_class(-1)
+                result[field]['rating_next'] = str(rating_next)
+                result[field]['win_rate_class'] = RatingUtils.get_content_class(0, -1)
+                result[field]['avg_damage_class'] = RatingUtils.get_content_class(1, -1)
+                result[field]['avg_frags_class'] = RatingUtils.get_content_class(2, -1)
+                result[field]['rating_class'] = rating_class
+            result[field]['battles_count'] = '{:,}'.format(result[field]['battles_count']).replace(',', ' ')
+            result[field]['win_rate'] = '{:.2f}%'.format(result[field]['win_rate'])
+            result[field]['avg_damage'] = '{:,}'.format(result[field]['avg_damage']).replace(',', ' ')
+            result[field]['avg_frags'] = '{:.2f}'.format(result[field]['avg_frags'])
+            result[field]['avg_exp'] = '{:,}'.format(result[field]['avg_exp']).replace(',', ' ')
+            result[field]['rating'] = '{:,}'.format(result[field]['rating']).replace(',', ' ')
+    return result
+
+def processing_ship_type_data(data: Dict[str, Dict], battle_field: str, shipid_data: dict):
+    original_data = {
+        'AirCarrier': NoneProcessedData.copy(),
+        'Battleship': NoneProcessedData.copy(),
+        'Cruiser': NoneProcessedData.copy(),
+        'Destroyer': NoneProcessedData.copy(),
+        'Submarine': NoneProcessedData.copy()
+    }
+    for ship_id, ship_info in data.items():
+        ship_data: ShipDataDict = ship_info[battle_field]
+        if ship_data == {}:
+            continue
+        field = shipid_data.get(ship_id).get('type')
+        if field is None:
+            continue
+        for key in ['battles_count','wins','damage_dealt','frags','original_exp']:
+            original_data[field][key] += ship_data[key]
+        if ship_data['personal_rating'] != -1:
+            original_data[field]['value_battles_count'] += ship_data['battles_count']
+            original_data[field]['personal_rating'] += ship_data['personal_rating']
+            original_data[field]['n_damage_dealt'] += ship_data['damage_rating']
+            original_data[field]['n_frags'] += ship_data['frags_rating']
+    result = {
+        'AirCarrier': ProcessedData.copy(),
+        'Battleship': ProcessedData.copy(),
+        'Cruiser': ProcessedData.copy(),
+        'Destroyer': ProcessedData.copy(),
+        'Submarine': ProcessedData.copy()
+    }
+    for field in ['AirCarrier', 'Battleship', 'Cruiser', 'Destroyer', 'Submarine']:
+        if original_data[field]['battles_count'] == 0:
+            result[field]['battles_count'] = '-'
+            result[field]['win_rate'] = '-'
+            result[field]['avg_damage'] = '-'
+            result[field]['avg_frags'] = '-'
+            result[field]['avg_exp'] = '-'
+            result[field]['rating'] = '-1'
+            result[field]['rating_next'] = '1'
+        else:
+            result[field]['battles_count'] = original_data[field]['battles_count']
+            result[field]['win_rate'] = round(original_data[field]['wins']/original_data[field]['battles_count']*100,2)
+            result[field]['avg_damage'] = int(original_data[field]['damage_dealt']/original_data[field]['battles_count'])
+            result[field]['avg_frags'] = round(original_data[field]['frags']/original_data[field]['battles_count'],2)
+            result[field]['avg_exp'] = int(original_data[field]['original_exp']/original_data[field]['battles_count'])
+            if original_data[field]['value_battles_count'] != 0:
+                result[field]['rating'] = int(original_data[field]['personal_rating']/original_data[field]['value_battles_count'])
+                rating_class, rating_next = RatingUtils.get_pr_rating_class(result[field]['rating'])
+                result[field]['rating_next'] = str(rating_next)
+                result[field]['win_rate_class'] = RatingUtils.get_content_class(0, result[field]['win_rate'])
+                result[field]['avg_damage_class'] = RatingUtils.get_content_class(1, original_data[field]['n_damage_dealt']/original_data[field]['value_battles_count'])
+                result[field]['avg_frags_class'] = RatingUtils.get_content_class(2, original_data[field]['n_frags']/original_data[field]['value_battles_count'])
+                result[field]['rating_class'] = rating_class
+            else:
+                result[field]['rating'] = -1
+                rating_class, rating_next = RatingUtils.get_pr_rating_class(-1)
+                result[field]['rating_next'] = str(rating_next)
+                result[field]['win_rate_class'] = RatingUtils.get_content_class(0, -1)
+                result[field]['avg_damage_class'] = RatingUtils.get_content_class(1, -1)
+                result[field]['avg_frags_class'] = RatingUtils.get_content_class(2, -1)
+                result[field]['rating_class'] = rating_class
+            result[field]['battles_count'] = '{:,}'.format(result[field]['battles_count']).replace(',', ' ')
+            result[field]['win_rate'] = '{:.2f}%'.format(result[field]['win_rate'])
+            result[field]['avg_damage'] = '{:,}'.format(result[field]['avg_damage']).replace(',', ' ')
+            result[field]['avg_frags'] = '{:.2f}'.format(result[field]['avg_frags'])
+            result[field]['avg_exp'] = '{:,}'.format(result[field]['avg_exp']).replace(',', ' ')
+            result[field]['rating'] = '{:,}'.format(result[field]['rating']).replace(',', ' ')
+    return result
+
+def processing_pvp_chart(data: Dict[str, Dict], shipid_data: dict):
+    result = [[0,0,0,0,0] for _ in range(11)]
+    for ship_id, ship_info in data.items():
+        ship_data: ShipDataDict = ship_info['pvp']
+        if ship_data == {}:
+            continue
+        ship_name:ShipInfoDict = shipid_data.get(ship_id)
+        if ship_name is None:
+            continue
+        ship_tier = ship_name['tier']
+        ship_type = ship_name['type']
+        ship_type_dict = {
+            'AirCarrier': 0,
+            'Battleship': 1,
+            'Cruiser': 2,
+            'Destroyer': 3,
+            'Submarine': 4
+            }
+        result[ship_tier-1][ship_type_dict[ship_type]] += ship_data['battles_count']
+    return result
+
+# ------------------------------------------------------
+
+def build_fixture(seed: int, ships: int = 600) -> tuple[dict, dict]:
+    "生成计算过PR的用户数据和船只信息"
+    random.seed(seed)
+    data = {}
+    shipid_data = {}
+    for i in range(ships):
+        ship_id = str(3_000_000_000 + i * 4321)
+        shipid_data[ship_id] = {'tier': random.randint(1, 11), 'type': random.choice(SHIP_TYPES)}
+        data[ship_id] = {}
+        for key in KEYS:
+            if random.random() < 0.3:
+                data[ship_id][key] = {}
+                continue
+            battles_count = random.choice([0, random.randint(1, 2000)])
+            data[ship_id][key] = {
+                'battles_count': battles_count,
+                'wins': random.randint(0, battles_count),
+                'damage_dealt': battles_count * random.randint(0, 150_000),
+                'frags': random.randint(0, battles_count * 3),
+                'original_exp': battles_count * random.randint(0, 3000)
+            }
+            server_data = None if random.random() < 0.1 else {
+                'win_rate': random.uniform(45, 55),
+                'avg_damage': random.uniform(15_000, 90_000),
+                'avg_frags': random.uniform(0.5, 1.3)
+            }
+            RatingUtils.get_rating_by_data(key, data[ship_id][key], server_data)
+    return data, shipid_data
+
+def golden(data: dict, shipid_data: dict) -> bytes:
+    "原有的四个函数分别计算"
+    result = (
+        processing_overall_data(data, 'pvp'),
+        processing_battle_type_data(data),
+        processing_ship_type_data(data, 'pvp', shipid_data),
+        processing_pvp_chart(data, shipid_data)
+    )
+    return json.dumps(result, ensure_ascii=False).encode('utf-8')
+
+def fused(data: dict, shipid_data: dict) -> bytes:
+    "单次遍历，使用ShipStats格式的数据"
+    result = processing_pvp_statistics(ships_from_dict(data), shipid_data)
+    return json.dumps(result, ensure_ascii=False).encode('utf-8')
+
+
+def test_random_accounts():
+    for seed in range(20):
+        data, shipid_data = build_fixture(seed, random.Random(seed).randint(1, 600))
+        assert fused(copy.deepcopy(data), shipid_data) == golden(data, shipid_data), seed
+
+def test_empty_account():
+    assert fused({}, {}) == golden({}, {})
+
+def test_unrated_account():
+    data, shipid_data = build_fixture(0, 50)
+    for ship_data in data.values():
+        for cell in ship_data.values():
+            if cell:
+                cell['personal_rating'] = -1
+                cell['damage_rating'] = -1
+                cell['frags_rating'] = -1
+    assert fused(data, shipid_data) == golden(data, shipid_data)
+
+def test_ship_stats_round_trip():
+    data, _ = build_fixture(2, 100)
+    assert ships_to_dict(ships_from_dict(data)) == data
+    stats = ShipStats.from_response({'battles_count': 3, 'wins': 2, 'damage_dealt': 10, 'frags': 1, 'original_exp': 5, 'max_frags': 1})
+    assert stats == [3, 2, 10, 1, 5, 0, 0, 0]
+    assert ShipStats.to_dict(stats)['frags_rating'] == 0
+
+def test_missing_battle_types():
+    data, shipid_data = build_fixture(1, 100)
+    for ship_data in data.values():
+        ship_data['pvp_div2'] = {}
+        ship_data['pvp_div3'] = {}
+    assert fused(data, shipid_data) == golden(data, shipid_data)
+
+
+if __name__ == "__main__":
+    test_random_accounts()
+    test_empty_account()
+    test_unrated_account()
+    test_ship_stats_round_trip()
+    test_missing_battle_types()
+    print('processing_pvp_statistics matches the golden output')